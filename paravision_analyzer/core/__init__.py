@@ -4,5 +4,7 @@ Core analysis modules for ParaVision Analyzer
 
 from paravision_analyzer.core.analyzer import ParathyroidTumorAnalyzer
 from paravision_analyzer.core.features import FeatureExtractor
+from paravision_analyzer.core.masks import LabelMaskStore, load_label_mask
+from paravision_analyzer.core.region import RegionContext
 
-__all__ = ['ParathyroidTumorAnalyzer', 'FeatureExtractor']
+__all__ = ['ParathyroidTumorAnalyzer', 'FeatureExtractor', 'RegionContext', 'LabelMaskStore', 'load_label_mask']
@@ -0,0 +1,387 @@
+"""
+Streaming aggregation of result rows
+
+Dataset, per-image and per-clip summaries (count, mean, standard deviation,
+extremes and percentiles of every feature) and the list of outlier tumors are
+maintained while rows are produced, so no second pass over the results is
+needed. Rows are folded in batches of columns:
+
+- Moments use Welford's algorithm, batches merged with Chan's formula.
+- Percentiles come from a logarithmic bin sketch (relative error of about
+  1% of the value), mergeable and independent of the number of rows.
+- For outliers the most extreme values of every feature (the largest and
+  smallest max_outliers per dataset group) are kept in bounded buffers; at the
+  end they are scored against the final mean and standard deviation, which
+  finds exactly the rows a second pass would flag, up to max_outliers per
+  feature and side.
+
+With sweep results the dataset group is the configuration (Config_ID).
+"""
+
+import os
+
+import numpy as np
+import pandas as pd
+
+from paravision_analyzer.core.utils import atomic_path
+
+# Percentiles reported per feature
+SUMMARY_PERCENTILES = (5, 25, 50, 75, 95)
+
+# Columns that group rows in the summary (besides the whole dataset)
+SUMMARY_GROUP_COLUMNS = ('Image', 'Clip')
+
+# Sketch bins: relative accuracy, largest bin key and smallest nonzero magnitude
+_SKETCH_ACCURACY = 0.01
+_SKETCH_MAX_KEY = 2048
+_SKETCH_MIN_VALUE = 1e-12
+
+
+class RunningMoments:
+    """Count, mean, M2 and extremes of several features, NaN ignored"""
+
+    def __init__(self, features):
+        """
+        Initialize moments
+
+        Args:
+            features (int): Number of features
+        """
+        self.count = np.zeros(features, dtype=np.int64)
+        self.mean = np.zeros(features)
+        self.m2 = np.zeros(features)
+        self.min = np.full(features, np.inf)
+        self.max = np.full(features, -np.inf)
+
+    def update(self, values):
+        """
+        Fold in a batch of rows
+
+        Args:
+            values (numpy.ndarray): Rows x features float array
+        """
+        valid = np.isfinite(values)
+        count = valid.sum(axis=0)
+        if not count.any():
+            return
+        with np.errstate(invalid='ignore', divide='ignore'):
+            mean = np.where(valid, values, 0.0).sum(axis=0) / np.maximum(count, 1)
+            m2 = np.where(valid, (values - mean) ** 2, 0.0).sum(axis=0)
+
+        total = self.count + count
+        delta = mean - self.mean
+        share = np.divide(count, total, out=np.zeros(len(total)), where=total > 0)
+        self.mean = self.mean + delta * share
+        self.m2 = self.m2 + m2 + delta ** 2 * self.count * share
+        self.count = total
+        self.min = np.fmin(self.min, np.where(valid, values, np.inf).min(axis=0))
+        self.max = np.fmax(self.max, np.where(valid, values, -np.inf).max(axis=0))
+
+    @property
+    def std(self):
+        """numpy.ndarray: Sample standard deviation (NaN below two values)"""
+        with np.errstate(invalid='ignore', divide='ignore'):
+            return np.where(self.count > 1, np.sqrt(self.m2 / (self.count - 1)), np.nan)
+
+
+class QuantileSketch:
+    """
+    Logarithmic bin sketch of several features
+
+    Magnitudes fall in bins growing by a factor of (1 + a) / (1 - a), so the
+    value reported for a bin is within a relative error a of every value in it.
+    Bins are kept sparse, per feature.
+    """
+
+    def __init__(self, features, accuracy=_SKETCH_ACCURACY):
+        """
+        Initialize sketch
+
+        Args:
+            features (int): Number of features
+            accuracy (float): Relative accuracy of the quantiles (default: 0.01)
+        """
+        self.features = features
+        self.gamma = (1 + accuracy) / (1 - accuracy)
+        self._log_gamma = np.log(self.gamma)
+        self._span = 4 * _SKETCH_MAX_KEY + 3
+        self.bins = {}
+
+    def _signed_keys(self, values):
+        """Bin keys ordered like the values: negative, zero (0), positive"""
+        magnitude = np.abs(values)
+        with np.errstate(divide='ignore'):
+            keys = np.ceil(np.log(np.maximum(magnitude, _SKETCH_MIN_VALUE)) / self._log_gamma)
+        keys = np.clip(keys, -_SKETCH_MAX_KEY, _SKETCH_MAX_KEY).astype(np.int64) + _SKETCH_MAX_KEY + 1
+        keys[magnitude < _SKETCH_MIN_VALUE] = 0
+        return np.where(values < 0, -keys, keys)
+
+    def update(self, values):
+        """
+        Fold in a batch of rows
+
+        Args:
+            values (numpy.ndarray): Rows x features float array (NaN ignored)
+        """
+        rows, columns = np.nonzero(np.isfinite(values))
+        if not len(rows):
+            return
+        keys = self._signed_keys(values[rows, columns])
+        codes, counts = np.unique(columns * self._span + keys + 2 * _SKETCH_MAX_KEY + 1, return_counts=True)
+        bins = self.bins
+        for code, count in zip(codes.tolist(), counts.tolist()):
+            bins[code] = bins.get(code, 0) + count
+
+    def _bin_values(self, keys):
+        """Representative values of signed bin keys"""
+        exponent = np.abs(keys) - _SKETCH_MAX_KEY - 1
+        values = 2 * self.gamma ** exponent.astype(np.float64) / (self.gamma + 1)
+        return np.where(keys == 0, 0.0, np.where(keys > 0, values, -values))
+
+    def quantiles(self, percentiles):
+        """
+        Estimate percentiles of every feature
+
+        Args:
+            percentiles (tuple): Percentiles in [0, 100]
+
+        Returns:
+            numpy.ndarray: Features x percentiles (NaN for features without values)
+        """
+        result = np.full((self.features, len(percentiles)), np.nan)
+        if not self.bins:
+            return result
+        # Codes sort by feature, then by value
+        codes = np.fromiter(self.bins.keys(), dtype=np.int64, count=len(self.bins))
+        counts = np.fromiter(self.bins.values(), dtype=np.int64, count=len(self.bins))
+        order = np.argsort(codes)
+        codes, cumulative = codes[order], np.cumsum(counts[order])
+        features = codes // self._span
+        keys = codes % self._span - 2 * _SKETCH_MAX_KEY - 1
+
+        present = np.unique(features)
+        start = np.searchsorted(features, present, side='left')
+        end = np.searchsorted(features, present, side='right')
+        before = np.where(start > 0, cumulative[start - 1], 0)
+        total = cumulative[end - 1] - before
+        ranks = before[:, None] + np.asarray(percentiles, dtype=np.float64) / 100.0 * (total[:, None] - 1)
+        index = np.minimum(np.searchsorted(cumulative, ranks, side='right'), (end - 1)[:, None])
+        result[present] = self._bin_values(keys[index])
+        return result
+
+
+class _GroupStats:
+    """Moments and sketch of one group"""
+
+    def __init__(self, features):
+        self.moments = RunningMoments(features)
+        self.sketch = QuantileSketch(features)
+
+    def update(self, values):
+        self.moments.update(values)
+        self.sketch.update(values)
+
+
+class _ExtremeValues:
+    """Largest and smallest values of every feature with their Tumor_ID and Image"""
+
+    def __init__(self, features, size):
+        self.size = size
+        self.values = np.zeros((0, features))
+        self.labels = np.zeros((0, 2), dtype=object)
+        # Batches are collected and pruned together once the rows double
+        self._pending = []
+        self._rows = 0
+        self._limit = 4 * size
+
+    def update(self, values, labels):
+        """Add a batch; (at least) the size largest and smallest finite values per feature are kept"""
+        self._pending.append((values, labels))
+        self._rows += len(values)
+        if self._rows > self._limit:
+            self.prune()
+
+    def prune(self):
+        """Merge the collected batches and drop rows extreme in no feature"""
+        values = np.concatenate([self.values] + [batch for batch, _ in self._pending])
+        labels = np.concatenate([self.labels] + [batch for _, batch in self._pending])
+        self._pending = []
+        keep = np.zeros(len(values), dtype=bool)
+        for feature in range(values.shape[1]):
+            column = values[:, feature]
+            finite = np.flatnonzero(np.isfinite(column))
+            if len(finite) <= 2 * self.size:
+                keep[finite] = True
+                continue
+            order = np.argpartition(column[finite], (self.size, len(finite) - self.size - 1))
+            keep[finite[order[:self.size]]] = True
+            keep[finite[order[-self.size:]]] = True
+        # Rows kept for any feature; values of other features are only used
+        # when they are among that feature's extremes as well
+        self.values, self.labels = values[keep], labels[keep]
+        self._rows = len(self.values)
+        self._limit = max(2 * self._rows, 4 * self.size)
+
+
+class FeatureAggregator:
+    """Streaming dataset, per-group summary and outlier aggregation"""
+
+    def __init__(self, features, outlier_threshold=3.0, max_outliers=100):
+        """
+        Initialize aggregator
+
+        Args:
+            features (list): Numeric result columns to aggregate
+            outlier_threshold (float): Absolute z-score from which a tumor is
+                flagged as an outlier of a feature (default: 3.0)
+            max_outliers (int): Outliers kept per feature and side (above and
+                below the mean) of a dataset group (default: 100)
+        """
+        self.features = list(features)
+        self.outlier_threshold = outlier_threshold
+        self.max_outliers = max_outliers
+        self.groups = {}
+        self.extremes = {}
+
+    def _group(self, key):
+        group = self.groups.get(key)
+        if group is None:
+            group = self.groups[key] = _GroupStats(len(self.features))
+        return group
+
+    def update(self, columns):
+        """
+        Fold in a batch of result rows
+
+        Args:
+            columns (dict): Result columns of the batch (column name -> array,
+                see ResultBuffer.columns); missing feature columns count as NaN
+        """
+        count = len(columns['Tumor_ID']) if 'Tumor_ID' in columns else 0
+        if not count:
+            return
+        values = np.column_stack([
+            np.asarray(columns[name], dtype=np.float64) if name in columns else np.full(count, np.nan)
+            for name in self.features
+        ])
+        configs = columns.get('Config_ID')
+        configs = np.asarray(configs, dtype=object) if configs is not None else np.full(count, '', dtype=object)
+
+        for config in pd.unique(configs):
+            in_config = configs == config
+            config_values = values[in_config]
+            self._group((config, 'Dataset', 'all')).update(config_values)
+
+            extremes = self.extremes.get(config)
+            if extremes is None:
+                extremes = self.extremes[config] = _ExtremeValues(len(self.features), self.max_outliers)
+            labels = np.column_stack([
+                np.asarray(columns['Tumor_ID'], dtype=object)[in_config],
+                np.asarray(columns['Image'], dtype=object)[in_config]
+            ])
+            extremes.update(config_values, labels)
+
+            for column in SUMMARY_GROUP_COLUMNS:
+                if column not in columns:
+                    continue
+                keys = np.asarray(columns[column], dtype=object)[in_config]
+                for key in pd.unique(keys):
+                    if key is None or (isinstance(key, float) and np.isnan(key)):
+                        continue
+                    self._group((config, column, key)).update(config_values[keys == key])
+
+    def summary(self):
+        """
+        Build the summary table
+
+        Returns:
+            pandas.DataFrame: One row per group and feature with Group_By
+                ('Dataset', 'Image' or 'Clip'), Group, Feature, Count, Mean, Std,
+                Min, P<percentile> and Max (plus Config_ID for sweeps)
+        """
+        features = np.array(self.features, dtype=object)
+        parts = []
+        for (config, group_by, group), stats in self.groups.items():
+            moments = stats.moments
+            has_values = moments.count > 0
+            part = {'Config_ID': np.full(len(features), config, dtype=object)}
+            part.update({
+                'Group_By': np.full(len(features), group_by, dtype=object),
+                'Group': np.full(len(features), group, dtype=object),
+                'Feature': features,
+                'Count': moments.count,
+                'Mean': np.where(has_values, moments.mean, np.nan),
+                'Std': moments.std,
+                'Min': np.where(has_values, moments.min, np.nan),
+            })
+            # Sketch estimates never leave the exact range
+            quantiles = stats.sketch.quantiles(SUMMARY_PERCENTILES)
+            for k, p in enumerate(SUMMARY_PERCENTILES):
+                part[f'P{p}'] = np.where(has_values, np.clip(quantiles[:, k], moments.min, moments.max), np.nan)
+            part['Max'] = np.where(has_values, moments.max, np.nan)
+            parts.append(part)
+        if not parts:
+            return pd.DataFrame()
+
+        summary = pd.DataFrame({name: np.concatenate([part[name] for part in parts]) for name in parts[0]})
+        if not any(config for config, _, _ in self.groups):
+            summary = summary.drop(columns='Config_ID')
+        return summary
+
+    def outliers(self):
+        """
+        Score the kept extreme values against the final dataset statistics
+
+        Returns:
+            pandas.DataFrame: Flagged tumors with Tumor_ID, Image, Feature,
+                Value, Z_Score, Dataset_Mean and Dataset_Std, largest |z| first
+                (plus Config_ID for sweeps)
+        """
+        rows = []
+        for config, extremes in self.extremes.items():
+            moments = self.groups[(config, 'Dataset', 'all')].moments
+            std = moments.std
+            extremes.prune()
+            for f, feature in enumerate(self.features):
+                if not std[f] > 0:
+                    continue
+                values = extremes.values[:, f]
+                with np.errstate(invalid='ignore'):
+                    z_scores = (values - moments.mean[f]) / std[f]
+                    flagged = np.flatnonzero(np.abs(z_scores) >= self.outlier_threshold)
+                for k in flagged:
+                    tumor_id, image = extremes.labels[k]
+                    row = {'Config_ID': config} if config else {}
+                    row.update({
+                        'Tumor_ID': tumor_id,
+                        'Image': image,
+                        'Feature': feature,
+                        'Value': values[k],
+                        'Z_Score': z_scores[k],
+                        'Dataset_Mean': moments.mean[f],
+                        'Dataset_Std': std[f],
+                    })
+                    rows.append(row)
+        outliers = pd.DataFrame(rows)
+        if rows:
+            order = outliers['Z_Score'].abs().sort_values(ascending=False).index
+            outliers = outliers.loc[order].reset_index(drop=True)
+        return outliers
+
+    def save(self, output_dir):
+        """
+        Write feature_summary.csv and outliers.csv
+
+        Args:
+            output_dir (str): Output directory
+
+        Returns:
+            tuple: (summary path, outliers path)
+        """
+        summary_path = os.path.join(output_dir, "feature_summary.csv")
+        outliers_path = os.path.join(output_dir, "outliers.csv")
+        with atomic_path(summary_path) as temp_path:
+            self.summary().to_csv(temp_path, index=False)
+        with atomic_path(outliers_path) as temp_path:
+            self.outliers().to_csv(temp_path, index=False)
+        return summary_path, outliers_path
@@ -0,0 +1,276 @@
+"""
+Inter-rater agreement analysis
+
+Compares annotations of the same images made by several raters (one LabelMe
+directory per rater). For every rater pair the polygons of an image are
+matched by IoU, and each match is scored with Dice, IoU, symmetric Hausdorff
+distance and per-feature differences. Masks are only rasterized inside the
+union of the two bounding boxes, and images are processed in parallel.
+"""
+
+import os
+import json
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import nullcontext
+from glob import glob
+from itertools import combinations
+
+import cv2
+import numpy as np
+import pandas as pd
+from scipy.optimize import linear_sum_assignment
+from scipy.spatial.distance import directed_hausdorff
+
+from paravision_analyzer.core.readers import load_grayscale
+from paravision_analyzer.core.region import bboxes_overlap, region_from_shape, union_bbox
+from paravision_analyzer.core.utils import find_image_file
+
+
+def _load_regions(json_file, image_shape):
+    """Load the regions of one rater's annotation as (index, label, RegionContext)"""
+    with open(json_file, 'r', encoding='utf-8') as f:
+        annotation_data = json.load(f)
+
+    if image_shape is None:
+        height = annotation_data.get('imageHeight')
+        width = annotation_data.get('imageWidth')
+        if height is None or width is None:
+            points = [p for s in annotation_data['shapes'] for p in s['points']] or [[0, 0]]
+            width, height = (np.max(np.asarray(points), axis=0) + 1).astype(int)
+        image_shape = (int(height), int(width))
+
+    regions = [
+        (idx, shape.get('label', ''), region_from_shape(shape, image_shape))
+        for idx, shape in enumerate(annotation_data['shapes'])
+    ]
+    return [(idx, label, region) for idx, label, region in regions if region is not None]
+
+
+def _region_features(feature_extractor, gray_image, region):
+    """Features of one region; geometric features only when no image is available"""
+    if gray_image is not None:
+        return feature_extractor.calculate_region_features(gray_image, region) or {}
+
+    features = {
+        'Area_Pixels': region.area,
+        'Area_mm2': region.area * (feature_extractor.px_to_mm ** 2),
+        'Perimeter_Pixels': region.perimeter,
+        'Perimeter_mm': region.perimeter * feature_extractor.px_to_mm,
+    }
+    features.update(feature_extractor.calculate_shape_features(region))
+    features.update(feature_extractor.calculate_ellipse_features(region))
+    return features
+
+
+def _boundary_points(mask):
+    """Boundary pixel coordinates of a binary mask"""
+    contours, _ = cv2.findContours(mask, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_NONE)
+    if not contours:
+        return None
+    return np.vstack([c.reshape(-1, 2) for c in contours]).astype(np.float64)
+
+
+def compare_regions(region_a, region_b):
+    """
+    Compute overlap and boundary agreement of two regions
+
+    Both masks are rasterized only inside the union of their bounding boxes.
+
+    Args:
+        region_a (RegionContext): First region
+        region_b (RegionContext): Second region
+
+    Returns:
+        dict: 'Dice', 'IoU' and 'Hausdorff_Pixels'
+    """
+    window = union_bbox(region_a.bbox, region_b.bbox)
+    mask_a = region_a.mask_in(window)
+    mask_b = region_b.mask_in(window)
+
+    intersection = cv2.countNonZero(cv2.bitwise_and(mask_a, mask_b)) if mask_a.size else 0
+    union = region_a.area + region_b.area - intersection
+    total = region_a.area + region_b.area
+
+    hausdorff = np.nan
+    boundary_a = _boundary_points(mask_a) if region_a.area else None
+    boundary_b = _boundary_points(mask_b) if region_b.area else None
+    if boundary_a is not None and boundary_b is not None:
+        hausdorff = max(directed_hausdorff(boundary_a, boundary_b)[0],
+                        directed_hausdorff(boundary_b, boundary_a)[0])
+
+    return {
+        'Dice': 2.0 * intersection / total if total > 0 else np.nan,
+        'IoU': intersection / union if union > 0 else np.nan,
+        'Hausdorff_Pixels': hausdorff
+    }
+
+
+def compare_image(base_name, rater_files, image_file, feature_extractor, min_iou=0.1):
+    """
+    Compare all rater pairs on one image
+
+    Args:
+        base_name (str): Base filename (without extension)
+        rater_files (dict): Rater name -> annotation JSON path (only raters
+            that annotated this image)
+        image_file (str or None): Image path; without it only geometric
+            features are compared
+        feature_extractor (FeatureExtractor): Extractor used for features
+        min_iou (float): Minimum IoU for two polygons to be matched
+
+    Returns:
+        list: One row dict per matched pair and per unmatched polygon
+    """
+    gray_image = None
+    if image_file is not None:
+        gray_image, _ = load_grayscale(image_file)
+    image_shape = gray_image.shape if gray_image is not None else None
+
+    regions = {rater: _load_regions(path, image_shape) for rater, path in rater_files.items()}
+    features = {
+        rater: [_region_features(feature_extractor, gray_image, region) for _, _, region in items]
+        for rater, items in regions.items()
+    }
+
+    rows = []
+    for rater_a, rater_b in combinations(rater_files, 2):
+        items_a, items_b = regions[rater_a], regions[rater_b]
+
+        # IoU is only computed for pairs whose bounding boxes overlap
+        scores = {}
+        iou = np.zeros((len(items_a), len(items_b)))
+        for i, (_, _, region_a) in enumerate(items_a):
+            for j, (_, _, region_b) in enumerate(items_b):
+                if bboxes_overlap(region_a.bbox, region_b.bbox):
+                    scores[i, j] = compare_regions(region_a, region_b)
+                    iou[i, j] = np.nan_to_num(scores[i, j]['IoU'])
+
+        matches = []
+        if iou.size:
+            row_ind, col_ind = linear_sum_assignment(-iou)
+            matches = [(i, j) for i, j in zip(row_ind, col_ind) if iou[i, j] >= min_iou]
+        matched_a = {i for i, _ in matches}
+        matched_b = {j for _, j in matches}
+
+        def make_row(i, j):
+            row = {
+                'Image': base_name,
+                'Rater_A': rater_a,
+                'Rater_B': rater_b,
+                'Shape_A': items_a[i][0] + 1 if i is not None else np.nan,
+                'Shape_B': items_b[j][0] + 1 if j is not None else np.nan,
+                'Label_A': items_a[i][1] if i is not None else '',
+                'Label_B': items_b[j][1] if j is not None else '',
+                'Matched': i is not None and j is not None,
+            }
+            if row['Matched']:
+                score = scores[i, j]
+                row.update(score)
+                row['Hausdorff_mm'] = score['Hausdorff_Pixels'] * feature_extractor.px_to_mm
+                features_a, features_b = features[rater_a][i], features[rater_b][j]
+                for name, value in features_a.items():
+                    if name in features_b:
+                        row[f'Diff_{name}'] = float(features_b[name]) - float(value)
+            else:
+                row.update({'Dice': 0.0, 'IoU': 0.0, 'Hausdorff_Pixels': np.nan, 'Hausdorff_mm': np.nan})
+            return row
+
+        rows.extend(make_row(i, j) for i, j in matches)
+        rows.extend(make_row(i, None) for i in range(len(items_a)) if i not in matched_a)
+        rows.extend(make_row(None, j) for j in range(len(items_b)) if j not in matched_b)
+
+    return rows
+
+
+def _compare_image_star(args):
+    """Unpack arguments for executor.map"""
+    base_name, rater_files, image_file, feature_extractor, min_iou = args
+    try:
+        return compare_image(base_name, rater_files, image_file, feature_extractor, min_iou)
+    except Exception as e:
+        print(f"Error comparing annotations of {base_name}: {e}")
+        return []
+
+
+def summarize_agreement(per_image):
+    """
+    Aggregate per-image agreement rows per rater pair
+
+    Args:
+        per_image (pandas.DataFrame): Rows returned by compare_image
+
+    Returns:
+        pandas.DataFrame: One row per rater pair
+    """
+    summaries = []
+    for (rater_a, rater_b), group in per_image.groupby(['Rater_A', 'Rater_B'], sort=False):
+        matched = group[group['Matched']]
+        summary = {
+            'Rater_A': rater_a,
+            'Rater_B': rater_b,
+            'Images': group['Image'].nunique(),
+            'Matched': len(matched),
+            'Unmatched_A': int((~group['Matched'] & group['Shape_B'].isna()).sum()),
+            'Unmatched_B': int((~group['Matched'] & group['Shape_A'].isna()).sum()),
+            'Mean_Dice': matched['Dice'].mean(),
+            'Median_Dice': matched['Dice'].median(),
+            'Mean_IoU': matched['IoU'].mean(),
+            'Median_IoU': matched['IoU'].median(),
+            'Mean_Hausdorff_mm': matched['Hausdorff_mm'].mean(),
+            'Max_Hausdorff_mm': matched['Hausdorff_mm'].max(),
+        }
+        for column in per_image.columns:
+            if column.startswith('Diff_'):
+                name = column[len('Diff_'):]
+                summary[f'Mean_Diff_{name}'] = matched[column].mean()
+                summary[f'Mean_AbsDiff_{name}'] = matched[column].abs().mean()
+        summaries.append(summary)
+    return pd.DataFrame(summaries)
+
+
+def analyze_agreement(rater_dirs, image_dir, output_dir, feature_extractor, min_iou=0.1,
+                      max_workers=None, progress_callback=None):
+    """
+    Run the inter-rater agreement analysis over all images
+
+    Args:
+        rater_dirs (dict): Rater name -> directory of LabelMe JSON files
+        image_dir (str): Directory containing original images
+        output_dir (str): Directory for agreement_per_image.csv and agreement_summary.csv
+        feature_extractor (FeatureExtractor): Extractor used for feature differences
+        min_iou (float): Minimum IoU for two polygons to be matched (default: 0.1)
+        max_workers (int, optional): Number of worker processes (default: CPU count)
+        progress_callback (callable, optional): Callback function for progress updates
+
+    Returns:
+        tuple: (per-image DataFrame, per-rater-pair summary DataFrame)
+    """
+    annotations = {}
+    for rater, json_dir in rater_dirs.items():
+        for json_file in glob(os.path.join(json_dir, "*.json")):
+            base_name = os.path.basename(json_file).replace(".json", "")
+            annotations.setdefault(base_name, {})[rater] = json_file
+
+    tasks = [
+        (base_name, rater_files, find_image_file(image_dir, base_name), feature_extractor, min_iou)
+        for base_name, rater_files in sorted(annotations.items())
+        if len(rater_files) >= 2
+    ]
+
+    rows = []
+    parallel = max_workers != 1 and len(tasks) > 1
+    with (ProcessPoolExecutor(max_workers=max_workers) if parallel else nullcontext()) as executor:
+        results = executor.map(_compare_image_star, tasks) if parallel else map(_compare_image_star, tasks)
+        for idx, image_rows in enumerate(results):
+            rows.extend(image_rows)
+            if progress_callback:
+                progress_callback(idx, len(tasks), f"Compared annotations: {tasks[idx][0]}")
+
+    per_image = pd.DataFrame(rows)
+    summary = summarize_agreement(per_image) if rows else pd.DataFrame()
+
+    os.makedirs(output_dir, exist_ok=True)
+    per_image.to_csv(os.path.join(output_dir, "agreement_per_image.csv"), index=False)
+    summary.to_csv(os.path.join(output_dir, "agreement_summary.csv"), index=False)
+    print(f"Agreement results saved to: {output_dir}")
+    return per_image, summary
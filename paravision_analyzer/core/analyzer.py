@@ -3,20 +3,59 @@ Main analyzer module for parathyroid tumor analysis
 """
 
 import os
+import csv
 import cv2
 import json
 import numpy as np
 import pandas as pd
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import nullcontext
 from glob import glob
 
-from paravision_analyzer.core.features import FeatureExtractor
-from paravision_analyzer.core.utils import draw_visualization
+from paravision_analyzer.core.aggregation import FeatureAggregator
+from paravision_analyzer.core.agreement import analyze_agreement
+from paravision_analyzer.core.decode_cache import DecodeCache
+from paravision_analyzer.core.features import (
+    CONTOUR_COLUMNS, PARENT_FEATURE_COLUMNS, TEXTURE_BANK_COLUMNS, FeatureExtractor, peritumoral_columns
+)
+from paravision_analyzer.core.journal import RunJournal
+from paravision_analyzer.core.memprofile import MemoryProfiler
+from paravision_analyzer.core.masks import (
+    LabelMaskStore, annotation_fingerprint, build_label_mask
+)
+from paravision_analyzer.core.patches import PatchCollector, PatchShardWriter
+from paravision_analyzer.core.preflight import check_dataset, save_report
+from paravision_analyzer.core.readers import is_high_depth_file, load_grayscale, to_display_bgr
+from paravision_analyzer.core.region import region_from_shape
+from paravision_analyzer.core.shared_frames import SharedFrameRing, attach_frame
+from paravision_analyzer.core.schema import FeatureColumn, FeatureSchema, ResultBuffer
+from paravision_analyzer.core.spatial import RELATION_COLUMNS, compute_spatial_relations
+from paravision_analyzer.core.sweep import SWEEP_COLUMNS, build_sweep_extractors
+from paravision_analyzer.core.texture_maps import overlay_texture_map, save_texture_maps
+from paravision_analyzer.core.utils import (
+    TEXT_COLOR, VISUALIZATION_FORMATS, atomic_path, draw_contour, draw_visualization, find_image_file,
+    fit_visualization, index_image_files, read_image, write_image
+)
+from paravision_analyzer.core.video import (
+    VIDEO_COLUMNS, group_frame_annotations, index_video_files, iter_annotated_frames, summarize_clip,
+    video_properties
+)
 
 
 class ParathyroidTumorAnalyzer:
     """Main analyzer class for parathyroid tumor analysis"""
 
-    def __init__(self, image_dir, json_dir, output_dir, px_per_mm=19, progress_callback=None):
+    def __init__(self, image_dir, json_dir, output_dir, px_per_mm=19, progress_callback=None,
+                 save_visualizations=True, grayscale_decode=False, spatial_relations=False,
+                 parent_features=False, label_mask_format=None, reuse_label_masks=False,
+                 approx_max_pixels=None, max_workers=1, export_patches=False, patch_size=None,
+                 patch_margin=0.25, patch_shard_mb=512, contour_features=False,
+                 decode_cache_dir=None, decode_cache_mb=2048, sweep_configs=None,
+                 peritumoral_rings=None, texture_maps=False, texture_window=7, texture_overlay=None,
+                 texture_bank=False, qa_report=False, outlier_threshold=3.0, memory_profile=False,
+                 visualization_format='png', visualization_quality=None, visualization_max_size=None,
+                 journal=False, resume=False):
         """
         Initialize analyzer
 
@@ -26,6 +65,87 @@ class ParathyroidTumorAnalyzer:
             output_dir (str): Directory for output results
             px_per_mm (float): Pixel to millimeter conversion ratio (default: 1mm=19px)
             progress_callback (callable, optional): Callback function for progress updates
+            save_visualizations (bool): Draw and save annotated result images (default: True)
+            visualization_format (str): File format of the visualizations, 'png',
+                'jpeg' or 'webp' (default: 'png')
+            visualization_quality (int, optional): PNG compression level (0-9) or
+                JPEG/WebP quality (0/1-100) of the visualizations (default: None,
+                the OpenCV default of the format; lossless for WebP)
+            visualization_max_size (int, optional): Maximum width and height of the
+                visualizations in pixels; larger frames are downscaled before the
+                overlays are drawn, so lines and text keep their size (default:
+                None, full resolution)
+            grayscale_decode (bool): When no visualizations are saved, let the codec
+                decode straight to grayscale instead of decoding color and
+                converting. Faster, but codecs round the color conversion
+                differently, so gray levels can differ by one (default: False)
+            spatial_relations (bool): Detect overlapping and nested regions and add
+                Overlap_Fraction, Overlap_Count and Parent_ID columns (default: False)
+            parent_features (bool): With spatial_relations, add features of each
+                contained region relative to its parent region (default: False)
+            label_mask_format (str, optional): Write a per-image label mask
+                (shape index + 1 per pixel) to label_masks/ as 'npz' or 'png'
+                (default: None, no masks written)
+            reuse_label_masks (bool): Take region masks from NPZ label masks of an
+                earlier run instead of rasterizing, when the annotation and
+                image size are unchanged; not with label_mask_format='png'
+                (default: False)
+            approx_max_pixels (int, optional): Estimate intensity and GLCM features
+                of regions larger than this from a stratified pixel sample, and
+                add Approx_Sampling_Rate and Approx_Error_* columns (default:
+                None, all features exact)
+            max_workers (int): Number of worker processes analyzing images. Above 1,
+                images are decoded in this process and handed to the workers
+                through shared memory; results keep the sequential order
+                (default: 1, everything in this process)
+            export_patches (bool): Write an image patch, mask patch and feature row
+                per tumor to tar shards in patches/ (default: False)
+            patch_size (int, optional): Side length of fixed-size patches centered
+                on the tumor (default: None, bounding box plus patch_margin)
+            patch_margin (float): Fraction of the bounding box size added on each
+                side of margin-padded patches (default: 0.25)
+            patch_shard_mb (float): Size in megabytes after which a new patch
+                shard is started (default: 512)
+            contour_features (bool): Add contour signature features (elliptic
+                Fourier harmonics, curvature statistics, bending energy),
+                computed for all polygons of an image in one batch (default: False)
+            decode_cache_dir (str, optional): Directory caching decoded frames as
+                memory-mapped .npy files for later runs (default: None, no cache)
+            decode_cache_mb (float): Size cap of the decode cache in megabytes;
+                least recently used frames are evicted (default: 2048)
+            sweep_configs (list, optional): Feature extractor configurations from
+                sweep.expand_sweep_grid; every region is measured once per
+                configuration and the results get one row per configuration,
+                tagged with Config_* columns (default: None, single configuration)
+            peritumoral_rings (list, optional): Outer edges in millimeters of
+                concentric rings around each polygon; adds intensity, GLCM and
+                lesion-to-ring contrast features per ring (default: None)
+            texture_maps (bool): Save per-pixel contrast, homogeneity and entropy
+                maps of each tumor to texture_maps/<Tumor_ID>.npz (default: False)
+            texture_window (int): Odd window side length of the texture maps in
+                pixels (default: 7)
+            texture_overlay (str, optional): Blend this texture map ('contrast',
+                'homogeneity' or 'entropy') as a color overlay into the
+                visualization (default: None)
+            texture_bank (bool): Add GLRLM, GLSZM and LBP texture features, sharing
+                the quantized ROI of the GLCM features (default: False)
+            qa_report (bool): Aggregate every numeric feature while rows are
+                produced and write feature_summary.csv (dataset, per-image and
+                per-clip statistics) and outliers.csv at the end (default: False)
+            outlier_threshold (float): Absolute z-score against the dataset from
+                which a tumor is listed in outliers.csv (default: 3.0)
+            memory_profile (bool): Trace memory per image and stage (decode,
+                masks, features, export, visualization, csv) and write
+                memory_profile.csv and memory_allocators.csv; slows the
+                analysis down (default: False)
+            journal (bool): Record each completed image and its result rows in
+                run_journal.jsonl while analyze_all_images runs, so an
+                interrupted run can be resumed; removed when the run completes.
+                Costs one fsync per image (default: False)
+            resume (bool): Continue the run interrupted in output_dir: images in
+                its journal are restored instead of analyzed again, giving the
+                same outputs as an uninterrupted run; keeps journaling
+                (default: False)
         """
         self.image_dir = image_dir
         self.json_dir = json_dir
@@ -33,19 +153,102 @@ class ParathyroidTumorAnalyzer:
         self.px_per_mm = px_per_mm
         self.progress_callback = progress_callback
         self.px_to_mm = 1.0 / px_per_mm
+        self.save_visualizations = save_visualizations
+        self.visualization_format = visualization_format
+        self.visualization_quality = visualization_quality
+        self.visualization_max_size = visualization_max_size
+        self.grayscale_decode = grayscale_decode
+        self.spatial_relations = spatial_relations
+        self.parent_features = parent_features
+        self.label_mask_format = label_mask_format
+        self.reuse_label_masks = reuse_label_masks
+        self.max_workers = max_workers or 1
+        self.contour_features = contour_features
+        self.peritumoral_rings = peritumoral_rings
+        self.texture_maps = texture_maps
+        self.texture_window = texture_window
+        self.texture_overlay = texture_overlay
+        self.texture_bank = texture_bank
+        self.qa_report = qa_report
+        self.outlier_threshold = outlier_threshold
+        self.memory_profiler = MemoryProfiler() if memory_profile else None
+        self.journal_enabled = journal or resume
+        self.resume = resume
+        self.journal = None
+        self._journaled_patches = 0
+        self.label_mask_store = None
+        if reuse_label_masks and label_mask_format == 'png':
+            raise ValueError("reuse_label_masks needs NPZ label masks; PNG masks carry no reusable region masks")
+        if label_mask_format or reuse_label_masks:
+            self.label_mask_store = LabelMaskStore(
+                os.path.join(output_dir, "label_masks"), label_mask_format or 'npz'
+            )
+
+        self.decode_cache = DecodeCache(decode_cache_dir, decode_cache_mb) if decode_cache_dir else None
+
+        self.patch_writer = None
+        if export_patches:
+            self.patch_writer = PatchShardWriter(
+                os.path.join(output_dir, "patches"), patch_size, patch_margin, patch_shard_mb
+            )
 
         # Create output directories if they don't exist
         if not os.path.exists(output_dir):
             os.makedirs(output_dir)
         if not os.path.exists(os.path.join(output_dir, "visualizations")):
             os.makedirs(os.path.join(output_dir, "visualizations"))
+        if texture_maps:
+            os.makedirs(os.path.join(output_dir, "texture_maps"), exist_ok=True)
 
         # Initialize feature extractor
-        self.feature_extractor = FeatureExtractor(px_per_mm=px_per_mm)
+        self.feature_extractor = FeatureExtractor(px_per_mm=px_per_mm, approx_max_pixels=approx_max_pixels)
+        self.sweep_configs = sweep_configs
+        self.sweep_extractors = None
+        if sweep_configs:
+            self.sweep_extractors = build_sweep_extractors(sweep_configs, px_per_mm, approx_max_pixels)
 
-        # Storage for results
-        self.results = []
+        # Storage for results: typed columns of the declared result schema
+        self.results = ResultBuffer(self.result_schema())
         self.processed_images = []
+        self.clip_summaries = []
+
+        # Streaming summaries and outlier QA of the numeric feature columns
+        # (configuration tags excluded), fed as rows are produced
+        self.aggregator = None
+        self._aggregated_rows = 0
+        if qa_report:
+            tags = {column.name for column in SWEEP_COLUMNS}
+            features = [
+                column.name for column in self.results.schema
+                if column.dtype != 'object' and column.name not in tags
+            ]
+            self.aggregator = FeatureAggregator(features, outlier_threshold)
+
+    def result_schema(self):
+        """
+        Declare the result columns of the enabled options
+
+        Clip and Frame columns are added to the result buffer when the first
+        cine clip frame is analyzed.
+
+        Returns:
+            FeatureSchema: Result columns in output order
+        """
+        schema = FeatureSchema([FeatureColumn('Image', 'object', ''), FeatureColumn('Tumor_ID', 'object', '')])
+        if self.sweep_extractors:
+            schema.extend(SWEEP_COLUMNS)
+        schema.extend(self.feature_extractor.feature_columns())
+        if self.texture_bank:
+            schema.extend(TEXTURE_BANK_COLUMNS)
+        if self.peritumoral_rings:
+            schema.extend(peritumoral_columns(self.peritumoral_rings))
+        if self.contour_features:
+            schema.extend(CONTOUR_COLUMNS)
+        if self.spatial_relations:
+            schema.extend(RELATION_COLUMNS)
+            if self.parent_features:
+                schema.extend(PARENT_FEATURE_COLUMNS)
+        return schema
 
     def analyze_all_images(self):
         """Analyze all annotated images"""
@@ -65,32 +268,436 @@ class ParathyroidTumorAnalyzer:
                 if self.progress_callback:
                     self.progress_callback(0, total_files, f"Error loading JSON: {base_name}")
 
-        for idx, json_file in enumerate(json_files):
-            # Get corresponding image filename from JSON filename
-            base_name = os.path.basename(json_file).replace(".json", "")
+        # Locate supported image format files with one directory listing
+        image_index = index_image_files(self.image_dir)
 
-            # Open supported image format files
-            supported_extensions = ['.jpg', '.jpeg', '.png', '.bmp']
-            image_file = None
-            for ext in supported_extensions:
-                temp_image_file = os.path.join(self.image_dir, f"{base_name}{ext}")
-                if os.path.exists(temp_image_file):
-                    image_file = temp_image_file
-                    break
+        # Per-frame annotations of cine clips (only names without a matching image)
+        video_index = index_video_files(self.image_dir)
+        clip_frames = group_frame_annotations(
+            [name for name in json_cache if name not in image_index], video_index
+        )
+        frame_names = {name for frames in clip_frames.values() for _, name in frames}
 
-            if os.path.exists(image_file) and base_name in json_cache:
-                if self.progress_callback:
-                    self.progress_callback(idx, total_files, f"Processing image: {base_name}")
-                self.analyze_image(image_file, json_cache[base_name], base_name)
-                self.processed_images.append(
-                    os.path.join(self.output_dir, "visualizations", f"{base_name}_analysis.png")
-                )
-            else:
-                if self.progress_callback:
-                    self.progress_callback(idx, total_files, f"Image file not found: {base_name}")
+        # Journal completed images; when resuming, restore those of the interrupted run
+        completed_images, completed_clips = self.open_journal()
+
+        # Decode here and analyze in worker processes when requested
+        parallel = self.max_workers > 1
+        with (_SharedFramePool(self, self.max_workers) if parallel else nullcontext()) as frame_pool:
+            for idx, json_file in enumerate(json_files):
+                # Get corresponding image filename from JSON filename
+                base_name = os.path.basename(json_file).replace(".json", "")
+                image_file = image_index.get(base_name)
+
+                if base_name in frame_names:
+                    continue
+
+                if image_file is not None and base_name in json_cache:
+                    if self.progress_callback:
+                        self.progress_callback(idx, total_files, f"Processing image: {base_name}")
+                    if base_name in completed_images:
+                        # Keep the row order when earlier images are still in the workers
+                        if frame_pool is not None:
+                            frame_pool.wait()
+                        self.restore_rows(completed_images[base_name])
+                    elif frame_pool is not None:
+                        frame_pool.submit(image_file, json_cache[base_name], base_name)
+                    else:
+                        start = len(self.results)
+                        self.analyze_image(image_file, json_cache[base_name], base_name)
+                        self.journal_rows(base_name, start)
+                    self.aggregate_new_rows()
+                    if self.save_visualizations:
+                        self.processed_images.append(self.visualization_path(base_name))
+                else:
+                    if self.progress_callback:
+                        self.progress_callback(idx, total_files, f"Image file not found: {base_name}")
+
+        # Stream annotated frames of cine clips
+        done = total_files - len(frame_names)
+        for clip_name, frames in sorted(clip_frames.items()):
+            if clip_name in completed_clips:
+                self.restore_clip(completed_clips[clip_name])
+                done += len(frames)
+                continue
+            done = self.analyze_video(
+                video_index[clip_name], clip_name, frames, json_cache, done, total_files
+            )
+
+        if self.patch_writer is not None:
+            index_path = self.patch_writer.close()
+            if index_path:
+                print(f"Patch shards saved to: {os.path.dirname(index_path)}")
 
         # Save CSV results only here to avoid duplicates
         self.save_results_to_csv()
+        self.save_qa_report()
+        self.save_memory_report()
+
+        # All outputs are complete, the journal is no longer needed
+        self.close_journal()
+
+    def analyze_video(self, video_path, clip_name, frames, json_cache, progress_offset=0, progress_total=None):
+        """
+        Analyze the annotated frames of a cine clip
+
+        Frames are decoded in one sequential pass and analyzed in memory; rows
+        get Clip and Frame columns and a per-clip summary is collected in
+        clip_summaries.
+
+        Args:
+            video_path (str): Path to the video clip
+            clip_name (str): Clip name
+            frames (list): (frame index, annotation base name) pairs
+            json_cache (dict): Annotation base name -> parsed annotation data
+            progress_offset (int): Progress count before this clip
+            progress_total (int, optional): Total progress count
+
+        Returns:
+            int: Progress count after this clip
+        """
+        progress_total = progress_total or len(frames)
+        names = dict(frames)
+        first_row = len(self.results)
+        frames_read = 0
+
+        self._mark_memory()
+        for frame_index, frame in iter_annotated_frames(video_path, names):
+            base_name = names[frame_index]
+            if self.progress_callback:
+                self.progress_callback(progress_offset, progress_total, f"Processing frame: {base_name}")
+            progress_offset += 1
+
+            if frame is None:
+                print(f"Cannot read frame {frame_index} of video: {video_path}")
+                self._mark_memory()
+                continue
+
+            frames_read += 1
+            gray_image = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
+            self._record_memory(base_name, 'decode')
+            self.results.add_columns(VIDEO_COLUMNS)
+            start = len(self.results)
+            self.analyze_frame(
+                gray_image, json_cache[base_name], base_name,
+                frame if self.save_visualizations else None
+            )
+            self.results.fill('Clip', start, len(self.results), clip_name)
+            self.results.fill('Frame', start, len(self.results), frame_index)
+            self.journal_rows(base_name, start, clip=clip_name)
+            self.aggregate_new_rows()
+            if self.save_visualizations:
+                self.processed_images.append(self.visualization_path(base_name))
+            self._mark_memory()
+
+        if not frames_read:
+            print(f"Cannot read any annotated frame of video: {video_path}")
+        self.clip_summaries.append(summarize_clip(
+            clip_name, self.results.columns(first_row), len(frames), video_properties(video_path)
+        ))
+        if self.journal is not None:
+            self.journal.append({'clip': clip_name, 'summary': self.clip_summaries[-1]})
+        return progress_offset
+
+    def analysis_settings(self):
+        """
+        Get the options that determine the analysis outputs
+
+        Used to create the analyzers of worker processes and stored in the run
+        journal, which is only resumed with equal settings.
+
+        Returns:
+            dict: Keyword arguments of ParathyroidTumorAnalyzer
+        """
+        return {
+            'image_dir': self.image_dir,
+            'json_dir': self.json_dir,
+            'output_dir': self.output_dir,
+            'px_per_mm': self.px_per_mm,
+            'save_visualizations': self.save_visualizations,
+            'visualization_format': self.visualization_format,
+            'visualization_quality': self.visualization_quality,
+            'visualization_max_size': self.visualization_max_size,
+            'grayscale_decode': self.grayscale_decode,
+            'spatial_relations': self.spatial_relations,
+            'parent_features': self.parent_features,
+            'label_mask_format': self.label_mask_format,
+            'approx_max_pixels': self.feature_extractor.approx_max_pixels,
+            'contour_features': self.contour_features,
+            'sweep_configs': self.sweep_configs,
+            'peritumoral_rings': self.peritumoral_rings,
+            'texture_maps': self.texture_maps,
+            'texture_window': self.texture_window,
+            'texture_overlay': self.texture_overlay,
+            'texture_bank': self.texture_bank,
+        }
+
+    def open_journal(self):
+        """
+        Start the run journal (with journal); when resuming, load the entries
+        of the interrupted run and continue its patch shards
+
+        Frames are only returned for clips whose every frame was completed;
+        the partial clip of an interrupted run is analyzed again.
+
+        Returns:
+            tuple: (base name -> image entry, clip name -> frame entries followed
+                by the clip entry), both empty if there is nothing to resume
+        """
+        if not self.journal_enabled:
+            return {}, {}
+        header = {
+            'settings': self.analysis_settings(),
+            'patches': None if self.patch_writer is None else {
+                'patch_size': self.patch_writer.patch_size,
+                'margin': self.patch_writer.margin,
+                'shard_bytes': self.patch_writer.shard_bytes,
+            },
+            'columns': self.results.schema.names,
+        }
+        self.journal = RunJournal(self.output_dir, header)
+        entries = self.journal.open(self.resume)
+
+        images, clips, frames = {}, {}, {}
+        for entry in entries:
+            if 'image' not in entry:
+                clips[entry['clip']] = frames.pop(entry['clip'], []) + [entry]
+            elif 'clip' in entry:
+                frames.setdefault(entry['clip'], []).append(entry)
+            else:
+                images[entry['image']] = entry
+
+        # Shards are continued after the last sample of a restored entry
+        partial = {id(entry) for entries_of_clip in frames.values() for entry in entries_of_clip}
+        restored = [entry for entry in entries if id(entry) not in partial and 'patches' in entry]
+        if self.patch_writer is not None and restored:
+            index = [sample for entry in restored for sample in entry['patches']]
+            self.patch_writer.resume(index, restored[-1]['patch_state'])
+            self._journaled_patches = len(self.patch_writer.index)
+
+        if entries:
+            print(f"Resuming run: {len(images)} images and {len(clips)} clips restored from {self.journal.path}")
+        return images, clips
+
+    def journal_rows(self, base_name, start, clip=None):
+        """
+        Durably record a completed image or frame and its result rows (with journal)
+
+        Args:
+            base_name (str): Base filename (without extension)
+            start (int): First result row of the image
+            clip (str, optional): Clip name of a frame
+        """
+        if self.journal is None:
+            return
+        entry = {'image': base_name, 'rows': self.results.columns(start)}
+        if clip is not None:
+            entry['clip'] = clip
+        if self.patch_writer is not None:
+            entry['patch_state'] = self.patch_writer.checkpoint()
+            entry['patches'] = self.patch_writer.index[self._journaled_patches:]
+            self._journaled_patches = len(self.patch_writer.index)
+        self.journal.append(entry)
+
+    def restore_rows(self, entry):
+        """
+        Append the journaled result rows of a completed image or frame
+
+        Args:
+            entry (dict): Journal entry
+        """
+        if 'clip' in entry:
+            self.results.add_columns(VIDEO_COLUMNS)
+        self.results.extend(entry['rows'])
+
+    def restore_clip(self, entries):
+        """
+        Restore a clip completed by an interrupted run, frame by frame
+
+        Args:
+            entries (list): Frame entries followed by the clip entry
+        """
+        for entry in entries[:-1]:
+            self.restore_rows(entry)
+            self.aggregate_new_rows()
+            if self.save_visualizations:
+                self.processed_images.append(self.visualization_path(entry['image']))
+        self.clip_summaries.append(entries[-1]['summary'])
+
+    def close_journal(self):
+        """Remove the run journal once all outputs are written"""
+        if self.journal is not None:
+            self.journal.close(remove=True)
+            self.journal = None
+
+    def aggregate_new_rows(self):
+        """Fold the result rows added since the last call into the QA aggregation"""
+        if self.aggregator is None or len(self.results) == self._aggregated_rows:
+            return
+        self.aggregator.update(self.results.columns(self._aggregated_rows))
+        self._aggregated_rows = len(self.results)
+
+    def save_qa_report(self):
+        """
+        Save the streaming feature summary and outlier list (with qa_report)
+
+        Returns:
+            tuple: (summary path, outliers path), or None without qa_report or rows
+        """
+        if self.aggregator is None or not len(self.results):
+            return None
+        self.aggregate_new_rows()
+        summary_path, outliers_path = self.aggregator.save(self.output_dir)
+        print(f"Feature summary saved to: {summary_path}")
+        print(f"Outlier report saved to: {outliers_path}")
+        return summary_path, outliers_path
+
+    def save_memory_report(self):
+        """
+        Save the memory profile and stop tracing (with memory_profile)
+
+        Returns:
+            tuple: (profile path, allocators path), or None without memory_profile
+        """
+        if self.memory_profiler is None:
+            return None
+        profile_path, allocators_path = self.memory_profiler.save(self.output_dir)
+        self.memory_profiler.stop()
+        print(f"Memory profile saved to: {profile_path}")
+        print(f"Memory allocators saved to: {allocators_path}")
+        return profile_path, allocators_path
+
+    def _mark_memory(self):
+        """Start a profiled stage (with memory_profile)"""
+        if self.memory_profiler is not None:
+            self.memory_profiler.mark()
+
+    def _record_memory(self, image, stage):
+        """Attribute memory use since the last mark or record to a stage (with memory_profile)"""
+        if self.memory_profiler is not None:
+            self.memory_profiler.record(image, stage)
+
+    def check_annotations(self, max_workers=None):
+        """
+        Validate all annotation/image pairs without running the analysis
+
+        Reads only JSON files and image headers, in parallel, and writes
+        preflight_report.json and preflight_issues.csv to the output directory.
+
+        Args:
+            max_workers (int, optional): Number of worker processes (default: CPU count)
+
+        Returns:
+            dict: Preflight report (see preflight.check_dataset)
+        """
+        report = check_dataset(self.image_dir, self.json_dir, max_workers=max_workers)
+        report_path = save_report(report, self.output_dir)
+        print(f"Preflight report saved to: {report_path}")
+        return report
+
+    def analyze_agreement(self, rater_dirs, min_iou=0.1, max_workers=None):
+        """
+        Compare annotations of the same images made by several raters
+
+        Polygons are matched per image and rater pair, and scored with Dice,
+        IoU, Hausdorff distance and feature differences. Writes
+        agreement_per_image.csv and agreement_summary.csv to the output directory.
+
+        Args:
+            rater_dirs (dict): Rater name -> directory of LabelMe JSON files
+            min_iou (float): Minimum IoU for two polygons to be matched (default: 0.1)
+            max_workers (int, optional): Number of worker processes (default: CPU count)
+
+        Returns:
+            tuple: (per-image DataFrame, per-rater-pair summary DataFrame)
+        """
+        return analyze_agreement(
+            rater_dirs, self.image_dir, self.output_dir, self.feature_extractor,
+            min_iou=min_iou, max_workers=max_workers, progress_callback=self.progress_callback
+        )
+
+    def visualization_path(self, base_name):
+        """
+        Get the output path of an image's visualization
+
+        Args:
+            base_name (str): Base filename (without extension)
+
+        Returns:
+            str: Path of the visualization file
+        """
+        extension = VISUALIZATION_FORMATS[self.visualization_format][0]
+        return os.path.join(self.output_dir, "visualizations", f"{base_name}_analysis{extension}")
+
+    def load_image(self, image_path):
+        """
+        Load the frames of an image for analysis
+
+        With a decode cache, frames decoded by an earlier run are memory-mapped
+        from the cache instead of decoded again (the color frame copy-on-write,
+        so drawing never changes the cache); misses are decoded and stored.
+        TIFF and DICOM images bypass the cache since they are mapped directly.
+
+        Args:
+            image_path (str): Path to image file
+
+        Returns:
+            tuple: (BGR image or None, grayscale image, bit depth), images are
+                None if the image cannot be read
+        """
+        if self.decode_cache is None or is_high_depth_file(image_path):
+            return self.decode_image(image_path)
+
+        # Codec grayscale differs slightly from converted color, so cache it separately
+        gray_kind = 'gray_codec' if self.grayscale_decode and not self.save_visualizations else 'gray'
+        gray_image = self.decode_cache.load(image_path, gray_kind)
+        image = self.decode_cache.load(image_path, 'bgr', writable=True) if self.save_visualizations else None
+        if gray_image is not None and (image is not None or not self.save_visualizations):
+            return image, gray_image, 8
+
+        image, gray_image, bit_depth = self.decode_image(image_path)
+        if gray_image is not None:
+            self.decode_cache.store(image_path, gray_kind, gray_image)
+            if image is not None:
+                self.decode_cache.store(image_path, 'bgr', image)
+        return image, gray_image, bit_depth
+
+    def decode_image(self, image_path):
+        """
+        Decode an image for analysis
+
+        With visualizations enabled the image is decoded once in BGR, which is
+        drawn on directly, and converted to grayscale once. Without
+        visualizations and with grayscale_decode enabled, the codec decodes
+        straight to grayscale and no color frame is allocated.
+
+        TIFF and DICOM images keep their bit depth and are memory-mapped when
+        uncompressed; their visualization is drawn on an 8-bit rendering.
+
+        Args:
+            image_path (str): Path to image file
+
+        Returns:
+            tuple: (BGR image or None, grayscale image, bit depth), images are
+                None if the image cannot be read
+        """
+        if is_high_depth_file(image_path):
+            gray_image, bit_depth = load_grayscale(image_path)
+            if gray_image is None or not self.save_visualizations:
+                return None, gray_image, bit_depth
+            return to_display_bgr(gray_image, bit_depth), gray_image, bit_depth
+
+        if self.grayscale_decode and not self.save_visualizations:
+            gray_image = read_image(image_path, cv2.IMREAD_GRAYSCALE)
+            return None, gray_image, 8
+
+        image = read_image(image_path)
+        if image is None:
+            return None, None, 8
+
+        # Convert color image to grayscale
+        gray_image = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
+        return (image if self.save_visualizations else None), gray_image, 8
 
     def analyze_image(self, image_path, annotation_data, base_name):
         """
@@ -101,168 +708,446 @@ class ParathyroidTumorAnalyzer:
             annotation_data (dict): Parsed annotation data
             base_name (str): Base filename (without extension)
         """
-        # Read image file as numpy array to avoid Chinese path errors
-        image_data = np.fromfile(image_path, dtype=np.uint8)
-        image = cv2.imdecode(image_data, cv2.IMREAD_COLOR)
+        self._mark_memory()
+        image, gray_image, bit_depth = self.load_image(image_path)
+        self._record_memory(base_name, 'decode')
 
-        if image is None:
+        if gray_image is None:
             print(f"Cannot read image: {image_path}")
             return
 
-        # Convert BGR to RGB for display
-        image_rgb = cv2.cvtColor(image, cv2.COLOR_BGR2RGB)
+        self.analyze_frame(gray_image, annotation_data, base_name, image, bit_depth)
 
-        # Convert color image to grayscale
-        gray_image = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
+    def reanalyze_image(self, base_name):
+        """
+        Re-analyze one image and patch its rows in the results CSV
 
-        # Create visualization results
-        visualization = image_rgb.copy()
+        Meant for a single corrected annotation: the image is analyzed again,
+        its visualization regenerated, and its rows in
+        parathyroid_analysis_results.csv replaced in place (at the position of
+        the old rows, appended if it had none; the file is replaced
+        atomically). Patch shards and the QA report are not updated.
+
+        Args:
+            base_name (str): Base filename (without extension)
+
+        Returns:
+            pandas.DataFrame: New rows of the image, or None if the image or its
+                annotation cannot be read
+        """
+        image_file = find_image_file(self.image_dir, base_name)
+        if image_file is None:
+            print(f"Image file not found: {base_name}")
+            return None
+        json_file = os.path.join(self.json_dir, f"{base_name}.json")
+        try:
+            with open(json_file, 'r', encoding='utf-8') as f:
+                annotation_data = json.load(f)
+        except Exception as e:
+            print(f"Error loading JSON file {json_file}: {str(e)}")
+            return None
+
+        # Collect the image's rows on their own, without touching the run's
+        # results or appending to patch shards
+        results, patch_writer = self.results, self.patch_writer
+        self.results, self.patch_writer = ResultBuffer(self.result_schema()), None
+        try:
+            self.analyze_image(image_file, annotation_data, base_name)
+            rows = self.results.to_dataframe()
+        finally:
+            self.results, self.patch_writer = results, patch_writer
+
+        csv_path = os.path.join(self.output_dir, "parathyroid_analysis_results.csv")
+        _patch_csv_rows(csv_path, base_name, rows)
+        print(f"Results of {base_name} updated in: {csv_path}")
+        return rows
+
+    def analyze_frame(self, gray_image, annotation_data, base_name, visualization=None, bit_depth=None,
+                      region_masks=None):
+        """
+        Analyze an already decoded frame and its annotation
 
+        Args:
+            gray_image (numpy.ndarray): Grayscale frame
+            annotation_data (dict): Parsed annotation data
+            base_name (str): Base name used for tumor IDs and output files
+            visualization (numpy.ndarray, optional): BGR frame to draw the
+                results on in place and save; None skips the visualization
+            bit_depth (int, optional): Significant bits per pixel of gray_image
+                (default: from dtype)
+            region_masks (dict, optional): Reusable region masks already loaded
+                by the caller (see LabelMaskStore.load_reusable); with
+                reuse_label_masks and none given, they are loaded from the
+                label mask store
+        """
         # Reserve space for text information in top right corner
         info_texts = []
 
-        # Process each annotated region
-        for idx, shape in enumerate(annotation_data['shapes']):
-            if shape['shape_type'] == 'polygon':
-                # Get polygon points
-                points = np.array(shape['points'], dtype=np.int32)
+        # Collect annotated regions (polygons, rectangles, circles and masks)
+        regions = [
+            (idx, region_from_shape(shape, gray_image.shape))
+            for idx, shape in enumerate(annotation_data['shapes'])
+        ]
+        regions = [(idx, region) for idx, region in regions if region is not None]
+
+        # Take region masks from a stored label mask when possible
+        if region_masks is None and self.reuse_label_masks:
+            region_masks = self.label_mask_store.load_reusable(base_name, annotation_data, gray_image.shape)
+        if region_masks is not None:
+            for idx, region in regions:
+                bbox, mask = region_masks.get(idx, (None, None))
+                if bbox == region.bbox:
+                    region.use_mask(mask)
+        if self.memory_profiler is not None:
+            # Rasterize up front so mask memory is attributed to its own stage
+            for _, region in regions:
+                region.mask
+            self.memory_profiler.record(base_name, 'masks')
 
-                # Create mask
-                mask = np.zeros(gray_image.shape, dtype=np.uint8)
-                cv2.fillPoly(mask, [points], 255)
+        # Draw at the output resolution: large frames are downscaled first and
+        # the overlays drawn with scaled coordinates
+        scale = 1.0
+        if visualization is not None:
+            visualization, scale = fit_visualization(visualization, self.visualization_max_size)
+            self._record_memory(base_name, 'visualization')
 
-                # Calculate region area (pixel count)
-                area_pixels = cv2.countNonZero(mask)
+        # Contour signatures of all regions in one vectorized batch
+        signatures = None
+        if self.contour_features:
+            signatures = self.feature_extractor.calculate_contour_features([region for _, region in regions])
 
-                # Calculate grayscale region statistics
-                roi_gray = cv2.bitwise_and(gray_image, mask)
+        # Overlap and nesting between regions
+        relations = None
+        if self.spatial_relations:
+            relations = compute_spatial_relations([region for _, region in regions])
 
-                # Consider only pixels within mask
-                roi_pixels = roi_gray[mask > 0]
+        # One extractor, or one per sweep configuration sharing the region's intermediates
+        extractors = self.sweep_extractors or [(None, self.feature_extractor)]
 
-                if len(roi_pixels) > 0:
-                    # Binary processing (using Otsu's method for automatic threshold)
-                    _, binary = cv2.threshold(roi_gray, 0, 255, cv2.THRESH_BINARY + cv2.THRESH_OTSU)
+        # Process each annotated region
+        for position, (idx, region) in enumerate(regions):
+            tumor_id = f"{base_name}_tumor_{idx+1}"
+            first_row = first_features = None
+            for tags, extractor in extractors:
+                # Calculate features using FeatureExtractor
+                features = extractor.calculate_region_features(gray_image, region, bit_depth)
+                if features is None:
+                    break
 
-                    # Calculate statistics in binary region
-                    binary_roi = binary[mask > 0]
+                # Write each feature group straight into the result columns
+                row = self.results.new_row()
+                if first_row is None:
+                    first_row, first_features = row, features
+                self.results.write(row, {'Image': base_name, 'Tumor_ID': tumor_id})
+                if tags is not None:
+                    self.results.write(row, tags)
+                self.results.write(row, features)
+                if self.texture_bank:
+                    self.results.write(row, extractor.calculate_texture_bank_features(gray_image, region, bit_depth))
+                if self.peritumoral_rings:
+                    self.results.write(row, extractor.calculate_peritumoral_features(
+                        gray_image, region, self.peritumoral_rings, bit_depth
+                    ))
+                if signatures is not None:
+                    self.results.write(row, signatures[position])
 
-                    # Convert polygon points to format for contour analysis
-                    contour_points = points.reshape(-1, 1, 2)
+                if relations is not None:
+                    relation = relations[position]
+                    parent = relation['parent']
+                    self.results.write(row, {
+                        'Overlap_Fraction': relation['overlap_fraction'],
+                        'Overlap_Count': relation['overlap_count'],
+                        'Parent_ID': f"{base_name}_tumor_{regions[parent][0]+1}" if parent is not None else '',
+                    })
+                    if self.parent_features:
+                        self.results.write(row, extractor.calculate_parent_relative_features(
+                            gray_image, region, regions[parent][1] if parent is not None else None
+                        ))
+            self._record_memory(base_name, 'features')
 
-                    # Calculate features using FeatureExtractor
-                    intensity_features = self.feature_extractor.calculate_intensity_features(
-                        roi_pixels, binary_roi
-                    )
-                    shape_features = self.feature_extractor.calculate_shape_features(
-                        mask, contour_points
-                    )
-                    ellipse_features = self.feature_extractor.calculate_ellipse_features(
-                        contour_points
-                    )
-                    glcm_features = self.feature_extractor.calculate_glcm_features(
-                        gray_image, mask
-                    )
+            if first_row is not None:
+                # The first configuration's features are drawn and exported
+                features = first_features
 
-                    # Calculate polygon perimeter and area
-                    perimeter = cv2.arcLength(contour_points, True)
-                    area_pixels = cv2.countNonZero(mask)
-
-                    # Convert to millimeter units
-                    perimeter_mm = perimeter * self.px_to_mm
-                    area_mm = area_pixels * (self.px_to_mm ** 2)
-
-                    # Store results
-                    tumor_id = f"{base_name}_tumor_{idx+1}"
-                    result_dict = {
-                        'Image': base_name,
-                        'Tumor_ID': tumor_id,
-                        'Area_Pixels': area_pixels,
-                        'Area_mm2': area_mm,
-                        'Perimeter_Pixels': perimeter,
-                        'Perimeter_mm': perimeter_mm,
-                    }
-
-                    # Merge all features
-                    result_dict.update(intensity_features)
-                    result_dict.update(shape_features)
-                    result_dict.update(ellipse_features)
-                    result_dict.update(glcm_features)
-
-                    self.results.append(result_dict)
-
-                    # Draw region contour on visualization image
-                    cv2.polylines(visualization, [contour_points], True, (255, 0, 0), 2)
-
-                    # Display ID at tumor center
-                    centroid = np.mean(points, axis=0, dtype=np.int32)
-                    cv2.putText(
-                        visualization, f"{idx+1}",
-                        (centroid[0], centroid[1]),
-                        cv2.FONT_HERSHEY_SIMPLEX, 0.9, (255, 255, 255), 2
+                if self.patch_writer is not None:
+                    self.patch_writer.add(tumor_id, gray_image, region, self.results.row(first_row))
+
+                # Per-pixel texture maps, saved and/or overlaid
+                texture = None
+                if self.texture_maps or (self.texture_overlay and visualization is not None):
+                    texture = self.feature_extractor.calculate_texture_maps(
+                        gray_image, region, self.texture_window, bit_depth
                     )
+                if texture is not None and self.texture_maps:
+                    save_texture_maps(os.path.join(self.output_dir, "texture_maps", f"{tumor_id}.npz"), *texture)
+                self._record_memory(base_name, 'export')
+
+                if visualization is None:
+                    continue
+
+                if texture is not None and self.texture_overlay:
+                    maps, origin = texture
+                    overlay_texture_map(visualization, maps[self.texture_overlay], origin, scale=scale)
+
+                # Draw region contour on visualization image
+                draw_contour(visualization, region, scale)
+
+                # Display ID at tumor center
+                centroid = region.centroid
+                cv2.putText(
+                    visualization, f"{idx+1}",
+                    (int(centroid[0] * scale), int(centroid[1] * scale)),
+                    cv2.FONT_HERSHEY_SIMPLEX, 0.9 * scale, TEXT_COLOR, max(1, round(2 * scale))
+                )
+
+                # Collect this tumor's information for later display in top right corner
+                angle_info = "N/A"
+                major_axis_mm = "N/A"
+                if not np.isnan(features['Ellipse_MajorAxis']):
+                    major_angle = features['Ellipse_MajorAxis_Angle']
+                    angle_info = f"Angle: {major_angle:.1f} deg"
+                    major_axis_mm = f"MajorAxis: {features['Ellipse_MajorAxis_mm']:.2f} mm"
 
-                    # Collect this tumor's information for later display in top right corner
-                    angle_info = "N/A"
-                    major_axis_mm = "N/A"
-                    if not np.isnan(ellipse_features['Ellipse_MajorAxis']):
-                        major_angle = ellipse_features['Ellipse_MajorAxis_Angle']
-                        angle_info = f"Angle: {major_angle:.1f} deg"
-                        major_axis_mm = f"MajorAxis: {ellipse_features['Ellipse_MajorAxis_mm']:.2f} mm"
-
-                    # Collect complete information
-                    info_text = {
-                        'id': idx+1,
-                        'text': [
-                            f"ID: {idx+1}",
-                            f"Area: {area_mm:.2f} mm2",
-                            f"Perimeter: {perimeter_mm:.2f} mm",
-                            major_axis_mm,
-                            angle_info
-                        ]
-                    }
-                    info_texts.append(info_text)
-
-                    # Fit and draw ellipse
-                    if not np.isnan(ellipse_features['Ellipse_MajorAxis']):
-                        draw_visualization(visualization, contour_points, ellipse_features)
-
-        # Display all tumor information in top right corner
+                # Collect complete information
+                info_text = {
+                    'id': idx+1,
+                    'text': [
+                        f"ID: {idx+1}",
+                        f"Area: {features['Area_mm2']:.2f} mm2",
+                        f"Perimeter: {features['Perimeter_mm']:.2f} mm",
+                        major_axis_mm,
+                        angle_info
+                    ]
+                }
+                info_texts.append(info_text)
+
+                # Draw fitted ellipse
+                if not np.isnan(features['Ellipse_MajorAxis']):
+                    draw_visualization(visualization, region, scale)
+                self._record_memory(base_name, 'visualization')
+
+        # Export the rasterized regions as one label mask
+        if self.label_mask_format:
+            labels, overlapping = build_label_mask(regions, gray_image.shape)
+            self.label_mask_store.save(
+                base_name, labels, overlapping, annotation_fingerprint(annotation_data), regions
+            )
+            self._record_memory(base_name, 'export')
+
+        if visualization is None:
+            return
+
+        # Display all tumor information in top right corner, sized like the
+        # rest of the overlays for downscaled visualizations
         font = cv2.FONT_HERSHEY_SIMPLEX
-        y_offset = 30
-        padding = 10
+        line_height = round(30 * scale)
+        y_offset = line_height
+        padding = round(10 * scale)
+        thickness = max(1, round(2 * scale))
 
         for info in info_texts:
             # Calculate height of this information block
-            block_height = len(info['text']) * 30
+            block_height = len(info['text']) * line_height
 
             # Display each line of information in top right corner
             for i, line in enumerate(info['text']):
                 if line:  # Only display non-empty lines
                     cv2.putText(
                         visualization, line,
-                        (visualization.shape[1] - 300, y_offset + i * 30),
-                        font, 0.7, (255, 255, 255), 2
+                        (visualization.shape[1] - round(300 * scale), y_offset + i * line_height),
+                        font, 0.7 * scale, TEXT_COLOR, thickness
                     )
 
             # Update y starting position for next information block
             y_offset += block_height + padding
 
-        # Save visualization results
-        vis_path = os.path.join(self.output_dir, "visualizations", f"{base_name}_analysis.png")
-
-        # Convert RGB back to BGR for cv2.imwrite
-        visualization_bgr = cv2.cvtColor(visualization, cv2.COLOR_RGB2BGR)
-        cv2.imwrite(vis_path, visualization_bgr)
+        # Save visualization results (drawn in native BGR, no conversion needed)
+        write_image(
+            self.visualization_path(base_name), visualization,
+            self.visualization_format, self.visualization_quality
+        )
+        self._record_memory(base_name, 'visualization')
 
     def save_results_to_csv(self):
         """Save all analysis results to CSV file"""
-        if self.results:
+        if len(self.results):
             csv_path = os.path.join(self.output_dir, "parathyroid_analysis_results.csv")
-            df = pd.DataFrame(self.results)
-            df.to_csv(csv_path, index=False)
+            self._mark_memory()
+            df = self.results.to_dataframe()
+            with atomic_path(csv_path) as temp_path:
+                df.to_csv(temp_path, index=False)
+            self._record_memory('', 'csv')
             print(f"Analysis results saved to: {csv_path}")
+            if self.clip_summaries:
+                clip_path = os.path.join(self.output_dir, "clip_summary.csv")
+                with atomic_path(clip_path) as temp_path:
+                    pd.DataFrame(self.clip_summaries).to_csv(temp_path, index=False)
+                print(f"Clip summaries saved to: {clip_path}")
             return csv_path
         else:
             print("No analyzable images found")
             return None
+
+
+def _patch_csv_rows(csv_path, image_name, rows):
+    """
+    Replace the rows of one image in a results CSV
+
+    The file is copied line by line into a temporary file next to it, with the
+    image's lines (first column equal to image_name) replaced by the new rows,
+    which is then renamed over the original.
+
+    Args:
+        csv_path (str): Results CSV (created if missing)
+        image_name (str): Value of the Image column
+        rows (pandas.DataFrame): New rows of the image (may be empty)
+
+    Raises:
+        ValueError: If the rows have columns the CSV does not have
+    """
+    if not os.path.exists(csv_path):
+        if len(rows):
+            with atomic_path(csv_path) as temp_path:
+                rows.to_csv(temp_path, index=False)
+        return
+
+    with atomic_path(csv_path) as temp_path, \
+            open(csv_path, 'r', encoding='utf-8', newline='') as source, \
+            open(temp_path, 'w', encoding='utf-8', newline='') as target:
+        header = source.readline()
+        columns = next(csv.reader([header]))
+        unknown = [name for name in rows.columns if name not in columns]
+        if unknown:
+            raise ValueError(f"Columns not in {csv_path}: {', '.join(unknown)}; rerun the full analysis")
+        new_lines = rows.reindex(columns=columns).to_csv(index=False, header=False) if len(rows) else ''
+        # The Image column is first, encoded like the rest of the file
+        prefix = pd.DataFrame({'Image': [image_name]}).to_csv(index=False, header=False).rstrip('\r\n') + ','
+
+        target.write(header)
+        written = False
+        for line in source:
+            if line.startswith(prefix):
+                if not written:
+                    target.write(new_lines)
+                    written = True
+                continue
+            target.write(line)
+        if not written:
+            target.write(new_lines)
+
+
+# Analyzer of the current worker process (see _init_frame_worker)
+_frame_worker = None
+
+
+def _init_frame_worker(settings, patch_options=None):
+    """Create the worker process's analyzer with the parent's settings"""
+    global _frame_worker
+    _frame_worker = ParathyroidTumorAnalyzer(**settings)
+    if patch_options is not None:
+        # Patches go back to the parent, which owns the shards
+        _frame_worker.patch_writer = PatchCollector(**patch_options)
+
+
+def _analyze_shared_frame(handle, annotation_data, base_name, bit_depth, region_masks):
+    """Analyze a frame mapped from shared memory; returns result columns, patches and memory profile"""
+    arrays = attach_frame(handle)
+    _frame_worker.results.clear()
+    _frame_worker._mark_memory()
+    _frame_worker.analyze_frame(
+        arrays['gray'], annotation_data, base_name,
+        arrays.get('bgr'), bit_depth, region_masks
+    )
+    patches = _frame_worker.patch_writer.drain() if _frame_worker.patch_writer is not None else []
+    memory = _frame_worker.memory_profiler.drain() if _frame_worker.memory_profiler is not None else None
+    return _frame_worker.results.columns(), patches, memory
+
+
+class _SharedFramePool:
+    """Decode images in this process and analyze them in worker processes"""
+
+    def __init__(self, analyzer, max_workers):
+        """
+        Initialize frame pool
+
+        Args:
+            analyzer (ParathyroidTumorAnalyzer): Analyzer collecting the results
+            max_workers (int): Number of worker processes
+        """
+        self.analyzer = analyzer
+        settings = analyzer.analysis_settings()
+        settings['memory_profile'] = analyzer.memory_profiler is not None
+        # Two slots per worker let decoding run one frame ahead of each worker
+        self.ring = SharedFrameRing(2 * max_workers)
+        patch_options = None
+        if analyzer.patch_writer is not None:
+            patch_options = {'patch_size': analyzer.patch_writer.patch_size, 'margin': analyzer.patch_writer.margin}
+        self.executor = ProcessPoolExecutor(
+            max_workers=max_workers, initializer=_init_frame_worker, initargs=(settings, patch_options)
+        )
+        self.pending = deque()
+
+    def submit(self, image_path, annotation_data, base_name):
+        """
+        Decode an image into a free slot and queue its analysis
+
+        Args:
+            image_path (str): Path to image file
+            annotation_data (dict): Parsed annotation data
+            base_name (str): Base filename (without extension)
+        """
+        if not self.ring.free_slots:
+            self._collect()
+
+        self.analyzer._mark_memory()
+        image, gray_image, bit_depth = self.analyzer.load_image(image_path)
+        self.analyzer._record_memory(base_name, 'decode')
+        if gray_image is None:
+            print(f"Cannot read image: {image_path}")
+            return
+
+        arrays = {'gray': gray_image}
+        if image is not None:
+            arrays['bgr'] = image
+        region_masks = None
+        if self.analyzer.reuse_label_masks:
+            region_masks = self.analyzer.label_mask_store.load_reusable(base_name, annotation_data, gray_image.shape)
+
+        handle = self.ring.put(arrays)
+        future = self.executor.submit(
+            _analyze_shared_frame, handle, annotation_data, base_name, bit_depth, region_masks
+        )
+        self.pending.append((future, handle, base_name))
+
+    def _collect(self):
+        """Wait for the oldest queued frame, keep and journal its rows and recycle its slot"""
+        future, handle, base_name = self.pending.popleft()
+        try:
+            columns, patches, memory = future.result()
+            start = len(self.analyzer.results)
+            self.analyzer.results.extend(columns)
+            for patch in patches:
+                self.analyzer.patch_writer.write(*patch)
+            self.analyzer.journal_rows(base_name, start)
+            if memory is not None:
+                self.analyzer.memory_profiler.merge(memory)
+        finally:
+            self.ring.release(handle)
+
+    def wait(self):
+        """Collect every queued frame"""
+        while self.pending:
+            self._collect()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        try:
+            if exc_type is None:
+                self.wait()
+        finally:
+            for future, _, _ in self.pending:
+                future.cancel()
+            self.executor.shutdown(wait=True)
+            self.ring.close()
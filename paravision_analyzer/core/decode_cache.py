@@ -0,0 +1,160 @@
+"""
+On-disk cache of decoded frames
+
+Decoded grayscale (and color) frames are stored as .npy files and mapped
+back with numpy.load(mmap_mode=...), so later runs over the same archive
+skip the JPEG/PNG decode and color conversion. Entries are keyed by the
+image's absolute path, modification time and size, so an edited image is
+decoded again. The cache directory is kept under a size cap by evicting the
+least recently used entries; every hit refreshes the entry's modification
+time, which serves as its last-use time.
+"""
+
+import os
+import hashlib
+import tempfile
+
+import numpy as np
+
+
+def _file_mode():
+    """Permissions of a new regular file under the current umask"""
+    umask = os.umask(0)
+    os.umask(umask)
+    return 0o666 & ~umask
+
+
+class DecodeCache:
+    """Size-capped directory of decoded frames stored as .npy files"""
+
+    def __init__(self, cache_dir, max_mb=2048):
+        """
+        Initialize decode cache
+
+        Args:
+            cache_dir (str): Cache directory (created if missing)
+            max_mb (float): Size cap of the directory in megabytes (default: 2048)
+        """
+        self.cache_dir = cache_dir
+        self.max_bytes = int(max_mb * 1024 * 1024)
+        self._total_bytes = None
+        # mkstemp creates entries readable by the owner only; a cache shared
+        # between accounts needs the permissions of a normally created file
+        self._file_mode = _file_mode()
+        os.makedirs(cache_dir, exist_ok=True)
+
+    def path(self, image_path, kind):
+        """
+        Get the cache file of an image
+
+        Args:
+            image_path (str): Path to the original image
+            kind (str): Which decoded frame, e.g. 'gray' or 'bgr'
+
+        Returns:
+            str or None: Cache file path, None if the image does not exist
+        """
+        try:
+            stat = os.stat(image_path)
+        except OSError:
+            return None
+        key = f"{os.path.abspath(image_path)}|{stat.st_mtime_ns}|{stat.st_size}|{kind}"
+        return os.path.join(self.cache_dir, hashlib.sha1(key.encode('utf-8')).hexdigest() + '.npy')
+
+    def load(self, image_path, kind, writable=False):
+        """
+        Map a cached frame
+
+        Args:
+            image_path (str): Path to the original image
+            kind (str): Which decoded frame
+            writable (bool): Map copy-on-write so the frame can be drawn on
+                without changing the cache file (default: False, read-only)
+
+        Returns:
+            numpy.ndarray or None: Memory-mapped frame, None on a cache miss
+        """
+        path = self.path(image_path, kind)
+        if path is None or not os.path.exists(path):
+            return None
+        try:
+            frame = np.load(path, mmap_mode='c' if writable else 'r')
+        except (ValueError, OSError) as e:
+            print(f"Discarding unreadable cache entry {path}: {e}")
+            self._remove(path)
+            return None
+        # Mark as recently used for LRU eviction; entries of a shared cache
+        # written by another account cannot be touched, and an approximate
+        # LRU order is good enough
+        try:
+            os.utime(path, None)
+        except OSError:
+            pass
+        return frame
+
+    def store(self, image_path, kind, frame):
+        """
+        Add a decoded frame and evict old entries beyond the size cap
+
+        Args:
+            image_path (str): Path to the original image
+            kind (str): Which decoded frame
+            frame (numpy.ndarray): Decoded frame
+        """
+        path = self.path(image_path, kind)
+        if path is None:
+            return
+        if self._total_bytes is None:
+            self._total_bytes = sum(size for _, _, size in self._entries())
+
+        # Write to a temporary file first so readers never see a partial entry
+        fd, temp_path = tempfile.mkstemp(suffix='.tmp', dir=self.cache_dir)
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                np.save(f, np.ascontiguousarray(frame))
+            os.chmod(temp_path, self._file_mode)
+            replaced = os.path.getsize(path) if os.path.exists(path) else 0
+            os.replace(temp_path, path)
+        except OSError as e:
+            print(f"Cannot write cache entry for {image_path}: {e}")
+            self._remove(temp_path)
+            return
+        self._total_bytes += os.path.getsize(path) - replaced
+
+        if self._total_bytes > self.max_bytes:
+            self.evict(keep=path)
+
+    def evict(self, keep=None):
+        """
+        Remove least recently used entries until the cache fits its cap
+
+        Args:
+            keep (str, optional): Entry that must not be removed (the one just written)
+        """
+        entries = sorted(self._entries(), key=lambda entry: entry[1])
+        total = sum(size for _, _, size in entries)
+        for path, _, size in entries:
+            if total <= self.max_bytes:
+                break
+            if path != keep and self._remove(path):
+                total -= size
+        self._total_bytes = total
+
+    def _entries(self):
+        """(path, last use, size) of every cache file"""
+        entries = []
+        with os.scandir(self.cache_dir) as scan:
+            for entry in scan:
+                if entry.name.endswith('.npy') and entry.is_file():
+                    stat = entry.stat()
+                    entries.append((entry.path, stat.st_mtime_ns, stat.st_size))
+        return entries
+
+    @staticmethod
+    def _remove(path):
+        """Delete a file, returning whether it was removed"""
+        try:
+            os.remove(path)
+            return True
+        except OSError:
+            return False
@@ -0,0 +1,235 @@
+"""
+Numerical equivalence checks against golden feature outputs
+
+A fixed corpus of synthetic regions (regular lesions plus edge cases such as
+tiny ROIs, collinear or duplicate vertices, fewer than 5 vertices, saturated
+and black pixels, clipped and self-intersecting polygons) is measured with a
+FeatureExtractor and compared column by column with stored reference outputs
+of the established feature code. Any optimized implementation of the feature
+functions must reproduce the reference within the per-column tolerances
+before it is used for studies.
+
+Images are generated from integer arithmetic only, so the corpus is identical
+on every platform and library version.
+"""
+
+import os
+
+import numpy as np
+import pandas as pd
+
+from paravision_analyzer.core.features import FeatureExtractor
+from paravision_analyzer.core.region import RegionContext
+
+# Default reference file shipped with the repository
+DEFAULT_REFERENCE_PATH = os.path.abspath(
+    os.path.join(os.path.dirname(__file__), '..', '..', 'scripts', 'golden_reference.csv')
+)
+
+# (absolute, relative) tolerance used for columns without their own entry
+DEFAULT_TOLERANCE = (1e-9, 1e-9)
+
+# Per-column tolerances; ellipse fitting runs in single precision and the
+# higher moments amplify summation order differences
+FEATURE_TOLERANCES = {
+    'Skewness': (1e-9, 1e-6),
+    'Kurtosis': (1e-9, 1e-6),
+    'Ellipse_Area': (1e-3, 1e-5),
+    'Ellipse_Perimeter': (1e-3, 1e-5),
+    'Ellipse_MajorAxis': (1e-3, 1e-5),
+    'Ellipse_MajorAxis_mm': (1e-4, 1e-5),
+    'Ellipse_MinorAxis': (1e-3, 1e-5),
+    'Ellipse_MajorAxis_Angle': (1e-3, 1e-5),
+    'Ellipse_MinorAxis_Angle': (1e-3, 1e-5),
+}
+
+# Case -> column prefixes excluded from comparison: cv2.fitEllipse jitters
+# degenerate (collinear) point sets with a random generator, so these values
+# differ from run to run even in the established code
+UNSTABLE_COLUMNS = {
+    'collinear': ('Ellipse_',),
+}
+
+
+def _textured_image(height, width, seed=0):
+    """Deterministic 8-bit test image: gradient plus integer hash noise"""
+    y, x = np.mgrid[0:height, 0:width].astype(np.int64)
+    noise = ((x * 73856093) ^ (y * 19349663) ^ (seed * 83492791)) % 61
+    gradient = (x * 96) // width + (y * 64) // height
+    blobs = 40 * (((x // 9) + (y // 7)) % 3)
+    return np.clip(20 + gradient + blobs + noise, 0, 255).astype(np.uint8)
+
+
+def _polygon(center, radii, vertices, wobble=0.0, lobes=0):
+    """Vertices of a (possibly wobbly) ellipse"""
+    t = np.linspace(0, 2 * np.pi, vertices, endpoint=False)
+    scale = 1 + wobble * np.sin(lobes * t)
+    return np.round(np.stack([
+        center[0] + radii[0] * scale * np.cos(t),
+        center[1] + radii[1] * scale * np.sin(t)
+    ], axis=1), 2).tolist()
+
+
+def build_golden_corpus():
+    """
+    Build the fixed equivalence corpus
+
+    Returns:
+        list: Cases as dicts with 'name', 'image' (uint8 grayscale) and
+            'points' (polygon vertices)
+    """
+    image = _textured_image(128, 128)
+    large = _textured_image(256, 256, seed=1)
+
+    saturated = image.copy()
+    saturated[30:90, 30:90] = 255
+    black = image.copy()
+    black[30:90, 30:90] = 0
+    bimodal = image.copy()
+    bimodal[30:90, 30:90] = np.where((np.arange(60) // 6) % 2, 255, 0)[None, :]
+
+    star = []
+    for k in range(10):
+        radius = 40 if k % 2 == 0 else 16
+        angle = np.pi * k / 5
+        star.append([round(64 + radius * np.cos(angle), 2), round(64 + radius * np.sin(angle), 2)])
+
+    return [
+        {'name': 'ellipse_textured', 'image': image, 'points': _polygon((64, 60), (40, 26), 32)},
+        {'name': 'concave_star', 'image': image, 'points': star},
+        {'name': 'large_irregular', 'image': large, 'points': _polygon((128, 128), (100, 80), 60, 0.15, 5)},
+        {'name': 'float_vertices', 'image': image, 'points': _polygon((63.5, 64.25), (20.7, 30.3), 17)},
+        {'name': 'tiny_triangle', 'image': image, 'points': [[10, 10], [15, 10], [12, 14]]},
+        {'name': 'quad_four_vertices', 'image': image, 'points': [[20, 20], [60, 25], [55, 70], [18, 60]]},
+        {'name': 'collinear', 'image': image, 'points': [[10, 10], [20, 20], [30, 30], [40, 40], [50, 50]]},
+        {'name': 'two_points', 'image': image, 'points': [[10, 100], [60, 100]]},
+        {'name': 'single_pixel', 'image': image, 'points': [[70, 70], [70, 70], [70, 70]]},
+        {'name': 'thin_sliver', 'image': image, 'points': [[10, 50], [110, 50], [110, 51], [10, 51], [10, 50.5]]},
+        {'name': 'saturated', 'image': saturated, 'points': _polygon((60, 60), (25, 20), 24)},
+        {'name': 'black', 'image': black, 'points': _polygon((60, 60), (25, 20), 24)},
+        {'name': 'bimodal', 'image': bimodal, 'points': _polygon((60, 60), (28, 28), 24)},
+        {'name': 'border_clipped', 'image': image, 'points': [[-10, 40], [50, -5], [140, 30], [120, 140], [20, 110]]},
+        {'name': 'self_intersecting', 'image': image, 'points': [[20, 20], [100, 100], [100, 20], [20, 100], [60, 10]]},
+    ]
+
+
+def compute_golden_features(feature_extractor=None, corpus=None):
+    """
+    Measure every corpus case
+
+    Args:
+        feature_extractor (FeatureExtractor, optional): Extractor under test
+            (default: FeatureExtractor with default settings)
+        corpus (list, optional): Cases from build_golden_corpus (default: built here)
+
+    Returns:
+        pandas.DataFrame: One row per case ('Case' column plus features);
+            features are NaN for regions without pixels
+    """
+    feature_extractor = feature_extractor or FeatureExtractor()
+    corpus = corpus if corpus is not None else build_golden_corpus()
+
+    rows = []
+    for case in corpus:
+        region = RegionContext(case['points'], case['image'].shape)
+        features = feature_extractor.calculate_region_features(case['image'], region)
+        row = {'Case': case['name']}
+        row.update(features or {})
+        rows.append(row)
+    return pd.DataFrame(rows)
+
+
+def compare_features(current, reference, tolerances=None):
+    """
+    Compare feature outputs column by column
+
+    Two values agree when both are NaN, or when
+    |current - reference| <= atol + rtol * |reference|. Entries listed in
+    UNSTABLE_COLUMNS are not compared.
+
+    Args:
+        current (pandas.DataFrame): Output of compute_golden_features
+        reference (pandas.DataFrame): Stored reference output
+        tolerances (dict, optional): Column -> (atol, rtol) overriding
+            FEATURE_TOLERANCES
+
+    Returns:
+        pandas.DataFrame: One row per reference feature with the largest
+            absolute and relative differences, the number of drifting cases,
+            their names and a Passed flag
+    """
+    limits = dict(FEATURE_TOLERANCES)
+    limits.update(tolerances or {})
+
+    reference = reference.set_index('Case')
+    current = current.set_index('Case').reindex(reference.index)
+    missing_cases = current.index[current.isna().all(axis=1) & ~reference.isna().all(axis=1)]
+
+    report = []
+    for column in reference.columns:
+        expected = reference[column].to_numpy(dtype=np.float64)
+        if column in current.columns:
+            actual = current[column].to_numpy(dtype=np.float64)
+        else:
+            actual = np.full(len(expected), np.nan)
+
+        atol, rtol = limits.get(column, DEFAULT_TOLERANCE)
+        both_nan = np.isnan(expected) & np.isnan(actual)
+        with np.errstate(invalid='ignore'):
+            diff = np.abs(actual - expected)
+            within = diff <= atol + rtol * np.abs(expected)
+            relative = np.where(expected != 0, diff / np.abs(expected), diff)
+        unstable = np.array([column.startswith(UNSTABLE_COLUMNS.get(case, ())) for case in reference.index])
+        drift = ~(both_nan | within | unstable)
+        if column not in current.columns:
+            drift[:] = True
+
+        report.append({
+            'Feature': column,
+            'Cases': len(expected),
+            'Max_Abs_Diff': np.nanmax(np.where(both_nan | unstable, 0.0, diff)) if len(diff) else 0.0,
+            'Max_Rel_Diff': np.nanmax(np.where(both_nan | unstable, 0.0, relative)) if len(relative) else 0.0,
+            'Drifting_Cases': int(drift.sum()),
+            'Drifting_Case_Names': ';'.join(reference.index[drift]),
+            'Passed': not drift.any() and column in current.columns,
+        })
+
+    report = pd.DataFrame(report)
+    if len(missing_cases):
+        print("Cases missing from current output: " + ", ".join(missing_cases))
+    return report
+
+
+def check_equivalence(feature_extractor=None, reference_path=DEFAULT_REFERENCE_PATH, tolerances=None):
+    """
+    Measure the corpus and compare it with a stored reference
+
+    Args:
+        feature_extractor (FeatureExtractor, optional): Extractor under test
+        reference_path (str): Reference CSV written by save_reference
+        tolerances (dict, optional): Column -> (atol, rtol) overrides
+
+    Returns:
+        pandas.DataFrame: Per-feature report from compare_features
+    """
+    reference = pd.read_csv(reference_path)
+    current = compute_golden_features(feature_extractor)
+    return compare_features(current, reference, tolerances)
+
+
+def save_reference(reference_path=DEFAULT_REFERENCE_PATH, feature_extractor=None):
+    """
+    Store the corpus features of an extractor as the new reference
+
+    Args:
+        reference_path (str): Output CSV path
+        feature_extractor (FeatureExtractor, optional): Extractor whose
+            outputs become the reference (default: FeatureExtractor())
+
+    Returns:
+        pandas.DataFrame: The stored reference
+    """
+    reference = compute_golden_features(feature_extractor)
+    os.makedirs(os.path.dirname(os.path.abspath(reference_path)), exist_ok=True)
+    reference.to_csv(reference_path, index=False, float_format='%.17g')
+    return reference
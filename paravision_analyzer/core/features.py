@@ -14,54 +14,962 @@ from scipy import stats
 from skimage.feature import graycomatrix, graycoprops
 from math import pi, sqrt
 
+from paravision_analyzer.core.radiomics import (
+    GLRLM_FEATURES, GLSZM_FEATURES, LBP_FEATURES, lbp_features, run_length_features, size_zone_features
+)
+from paravision_analyzer.core.schema import FeatureColumn, float_columns
+from paravision_analyzer.core.texture_maps import texture_maps
+
+# Smallest class probability considered by the Otsu search (matches OpenCV)
+_OTSU_EPSILON = float(np.finfo(np.float32).eps)
+
+# Gray levels the ROI is quantized to before building the GLCM, and the pixel
+# distances co-occurrences are counted at (features are averaged over them)
+GLCM_LEVELS = 8
+GLCM_DISTANCES = (1,)
+
+# GLCM feature columns, in output order
+GLCM_FEATURES = [
+    'GLCM_Contrast', 'GLCM_Homogeneity', 'GLCM_Energy', 'GLCM_Correlation',
+    'GLCM_Dissimilarity', 'GLCM_ASM', 'GLCM_Entropy'
+]
+
+# Features estimated from a pixel sample in approximate mode
+APPROXIMATED_FEATURES = [
+    'Mean_Intensity', 'Median_Intensity', 'Min_Intensity', 'Max_Intensity',
+    'Std_Intensity', 'Binary_Mean_Intensity', 'Skewness', 'Kurtosis'
+] + GLCM_FEATURES
+
+# GLCM angles: 0, 45, 90 and 135 degrees
+_GLCM_ANGLES = [0, np.pi/4, np.pi/2, 3*np.pi/4]
+
+# Contour signatures: arc-length samples per contour, elliptic Fourier
+# harmonics and Gaussian smoothing (in samples) applied before curvature
+CONTOUR_SAMPLES = 128
+EFD_HARMONICS = 10
+_CURVATURE_SIGMA = 2.0
+
+# Contour signature columns, in output order
+CONTOUR_FEATURES = [f'EFD_Harmonic_{n}' for n in range(2, EFD_HARMONICS + 1)] + [
+    'Curvature_Mean_Abs', 'Curvature_Std', 'Curvature_Max', 'Concavity_Fraction', 'Bending_Energy'
+]
+
+# Per-ring columns of the peritumoral features (prefixed Peri_<outer edge>mm_)
+PERITUMORAL_FEATURES = [
+    'Area_Pixels', 'Mean_Intensity', 'Median_Intensity', 'Std_Intensity',
+    'Relative_Mean_Intensity', 'Contrast'
+] + GLCM_FEATURES
+
+# Result columns of calculate_region_features, in output order
+REGION_FEATURE_COLUMNS = [
+    FeatureColumn('Area_Pixels', 'int64', 'px2'),
+    FeatureColumn('Area_mm2', 'float64', 'mm2'),
+    FeatureColumn('Perimeter_Pixels', 'float64', 'px'),
+    FeatureColumn('Perimeter_mm', 'float64', 'mm'),
+    FeatureColumn('Mean_Intensity', 'float64', 'gray'),
+    FeatureColumn('Median_Intensity', 'float64', 'gray'),
+    FeatureColumn('Min_Intensity', 'int64', 'gray'),
+    FeatureColumn('Max_Intensity', 'int64', 'gray'),
+    FeatureColumn('Std_Intensity', 'float64', 'gray'),
+    FeatureColumn('Binary_Mean_Intensity', 'float64', 'gray'),
+] + float_columns([
+    'Skewness', 'Kurtosis', 'Circularity', 'Aspect_Ratio', 'Irregularity_Index', 'Convexity', 'Solidity'
+]) + [
+    FeatureColumn('Ferets_Diameter', 'float64', 'px'),
+    FeatureColumn('Area_Fraction', 'float64', ''),
+    FeatureColumn('Ellipse_Area', 'float64', 'px2'),
+    FeatureColumn('Ellipse_Perimeter', 'float64', 'px'),
+    FeatureColumn('Ellipse_MajorAxis', 'float64', 'px'),
+    FeatureColumn('Ellipse_MajorAxis_mm', 'float64', 'mm'),
+    FeatureColumn('Ellipse_MinorAxis', 'float64', 'px'),
+    FeatureColumn('Ellipse_MajorAxis_Angle', 'float64', 'deg'),
+    FeatureColumn('Ellipse_MinorAxis_Angle', 'float64', 'deg'),
+] + float_columns(GLCM_FEATURES)
+
+# Columns added by approximate mode: sampling rate and the standard error of
+# every estimated feature (in the feature's unit)
+APPROXIMATE_COLUMNS = [FeatureColumn('Approx_Sampling_Rate', 'float64', '')] + [
+    FeatureColumn(f'Approx_Error_{column.name}', 'float64', column.unit)
+    for column in REGION_FEATURE_COLUMNS if column.name in APPROXIMATED_FEATURES
+]
+
+CONTOUR_COLUMNS = float_columns(CONTOUR_FEATURES)
+
+PARENT_FEATURE_COLUMNS = [
+    FeatureColumn('Parent_Relative_Area', 'float64', ''),
+    FeatureColumn('Parent_Background_Mean_Intensity', 'float64', 'gray'),
+    FeatureColumn('Parent_Relative_Mean_Intensity', 'float64', ''),
+    FeatureColumn('Parent_Contrast', 'float64', ''),
+    FeatureColumn('Parent_Centroid_Offset_mm', 'float64', 'mm'),
+]
+
+TEXTURE_BANK_COLUMNS = float_columns(GLRLM_FEATURES + GLSZM_FEATURES + LBP_FEATURES)
+
+
+def peritumoral_columns(rings_mm):
+    """
+    Declare the peritumoral feature columns of a set of rings
+
+    Args:
+        rings_mm (list): Outer ring edges in millimeters
+
+    Returns:
+        list: FeatureColumn entries in the order of calculate_peritumoral_features
+    """
+    units = {'Area_Pixels': 'px2', 'Mean_Intensity': 'gray', 'Median_Intensity': 'gray', 'Std_Intensity': 'gray'}
+    return [
+        FeatureColumn(f'Peri_{mm:g}mm_{name}', 'int64' if name == 'Area_Pixels' else 'float64', units.get(name, ''))
+        for mm in sorted(rings_mm) for name in PERITUMORAL_FEATURES
+    ]
+
+# Approximate mode: side length of the sampled GLCM tiles and number of
+# interleaved sample groups used for the jackknife error estimate
+_APPROX_TILE = 16
+_APPROX_GROUPS = 8
+
+
+def otsu_threshold(hist):
+    """
+    Compute Otsu's threshold from a gray-level histogram
+
+    For 8-bit histograms this follows OpenCV's THRESH_OTSU search step by
+    step, so the threshold equals cv2.threshold(..., THRESH_OTSU) on an image
+    with the same histogram. This lets the threshold be computed from region
+    pixels plus a background count without materializing a full-frame image.
+    Larger (high bit depth) histograms use an equivalent vectorized search.
+
+    Args:
+        hist (numpy.ndarray): Pixel count per gray level
+
+    Returns:
+        int: Threshold gray level (pixels above it are foreground)
+    """
+    if len(hist) > 256:
+        return _otsu_threshold_vectorized(hist)
+
+    hist = [float(count) for count in hist]
+    scale = 1.0 / sum(hist)
+
+    mu = 0.0
+    for i, count in enumerate(hist):
+        mu += i * count
+    mu *= scale
+
+    mu1 = q1 = 0.0
+    max_sigma = 0.0
+    max_val = 0
+    for i, count in enumerate(hist):
+        p_i = count * scale
+        mu1 *= q1
+        q1 += p_i
+        q2 = 1.0 - q1
+        if min(q1, q2) < _OTSU_EPSILON or max(q1, q2) > 1.0 - _OTSU_EPSILON:
+            continue
+        mu1 = (mu1 + i * p_i) / q1
+        mu2 = (mu - q1 * mu1) / q2
+        sigma = q1 * q2 * (mu1 - mu2) * (mu1 - mu2)
+        if sigma > max_sigma:
+            max_sigma = sigma
+            max_val = i
+    return max_val
+
+
+def _otsu_threshold_vectorized(hist):
+    """Otsu's threshold over an arbitrary number of gray levels"""
+    p = np.asarray(hist, dtype=np.float64) / np.sum(hist)
+    levels = np.arange(len(p), dtype=np.float64)
+    q1 = np.cumsum(p)
+    q2 = 1.0 - q1
+    mu1_sum = np.cumsum(levels * p)
+    mu = mu1_sum[-1]
+    valid = (np.minimum(q1, q2) >= _OTSU_EPSILON) & (np.maximum(q1, q2) <= 1.0 - _OTSU_EPSILON)
+    if not np.any(valid):
+        return 0
+    with np.errstate(divide='ignore', invalid='ignore'):
+        mu1 = mu1_sum / q1
+        mu2 = (mu - mu1_sum) / q2
+        sigma = np.where(valid, q1 * q2 * (mu1 - mu2) ** 2, 0.0)
+    best = int(np.argmax(sigma))
+    return best if sigma[best] > 0 else 0
+
+
+def _quantize(values, bit_depth, levels):
+    """Scale gray values of the given bit depth down to [0, levels)"""
+    return np.minimum(values // ((1 << bit_depth) // levels), levels - 1).astype(np.uint8)
+
+
+def _glcm_properties(glcm):
+    """
+    GLCM features averaged over distances and angles, from a normalized
+    (L, L, distances, angles) GLCM; the entropy is summed over angles and
+    averaged over distances
+    """
+    glcm_flat = glcm.flatten()
+    glcm_flat = glcm_flat[glcm_flat > 0]
+    return {
+        'GLCM_Contrast': np.mean(graycoprops(glcm, 'contrast')),
+        'GLCM_Homogeneity': np.mean(graycoprops(glcm, 'homogeneity')),
+        'GLCM_Energy': np.mean(graycoprops(glcm, 'energy')),
+        'GLCM_Correlation': np.mean(graycoprops(glcm, 'correlation')),
+        'GLCM_Dissimilarity': np.mean(graycoprops(glcm, 'dissimilarity')),
+        'GLCM_ASM': np.mean(graycoprops(glcm, 'ASM')),
+        'GLCM_Entropy': -np.sum(glcm_flat * np.log2(glcm_flat)) / glcm.shape[2] if len(glcm_flat) > 0 else np.nan
+    }
+
+
+def _glcm_offsets(distances):
+    """
+    (row, column) offsets of every distance and angle, distance-major, rounded
+    as skimage.feature.graycomatrix does (the diagonal at distance 2 is (1, 1))
+    """
+    return [
+        (int(round(np.sin(angle) * d)), int(round(np.cos(angle) * d)))
+        for d in distances for angle in _GLCM_ANGLES
+    ]
+
+
+def _tile_cooccurrences(tiles, levels, distances=GLCM_DISTANCES):
+    """
+    Count gray-level co-occurrences inside each tile
+
+    Args:
+        tiles (numpy.ndarray): (n, T, T) quantized tiles; the value `levels`
+            marks padding and is left out of the counts
+        levels (int): Number of gray levels
+        distances (tuple): Pixel distances (default: GLCM_DISTANCES)
+
+    Returns:
+        numpy.ndarray: (n, distances * angles, levels, levels) symmetric pair
+            counts, distance-major
+    """
+    n, size, _ = tiles.shape
+    bins = levels + 1
+    tile_offset = (np.arange(n) * bins * bins)[:, None, None]
+    counts = []
+    for dr, dc in _glcm_offsets(distances):
+        if dr >= size or abs(dc) >= size:
+            counts.append(np.zeros((n, levels, levels), dtype=np.intp))
+            continue
+        c0, c1 = max(0, -dc), size - max(0, dc)
+        first = tiles[:, :size - dr, c0:c1].astype(np.intp)
+        second = tiles[:, dr:, c0 + dc:c1 + dc].astype(np.intp)
+        codes = tile_offset + first * bins + second
+        pairs = np.bincount(codes.ravel(), minlength=n * bins * bins).reshape(n, bins, bins)
+        pairs = pairs[:, :levels, :levels]
+        counts.append(pairs + pairs.transpose(0, 2, 1))
+    return np.stack(counts, axis=1)
+
+
+def _glcm_from_counts(counts, distances=1):
+    """Normalized (L, L, distances, angles) GLCM from distance-major (distances * angles, L, L) pair counts"""
+    totals = counts.sum(axis=(1, 2), keepdims=True).astype(np.float64)
+    normed = np.divide(counts, totals, out=np.zeros(counts.shape), where=totals > 0)
+    levels = counts.shape[-1]
+    return normed.transpose(1, 2, 0).reshape(levels, levels, distances, -1)
+
+
+def _tumor_only_roi(gray_image, region):
+    """Tight crop of the region with pixels outside the mask set to zero"""
+    left, top, width, height = region.mask_bbox
+    x, y, _, _ = region.bbox
+    roi_small = gray_image[top:top+height, left:left+width]
+    mask_small = region.mask[top-y:top-y+height, left-x:left-x+width]
+    roi_tumor_only = np.zeros_like(roi_small)
+    roi_tumor_only[mask_small > 0] = roi_small[mask_small > 0]
+    return roi_tumor_only
+
+
+def _quantized_roi(gray_image, region, bit_depth, levels):
+    """
+    Tumor-only ROI quantized to the given gray levels, memoized on the region
+    so all texture features of the region share one quantization
+    """
+    roi_tumor_only = region.memo('glcm_roi', lambda r: _tumor_only_roi(gray_image, r))
+    return region.memo(
+        ('glcm_quantized', bit_depth, levels), lambda r: _quantize(roi_tumor_only, bit_depth, levels)
+    )
+
+
+def _texture_labels(gray_image, region, bit_depth, levels):
+    """Quantized ROI with -1 outside the region mask, memoized on the region"""
+    def build(r):
+        left, top, width, height = r.mask_bbox
+        x, y, _, _ = r.bbox
+        mask = r.mask[top-y:top-y+height, left-x:left-x+width]
+        quantized = _quantized_roi(gray_image, r, bit_depth, levels)
+        return np.where(mask > 0, quantized.astype(np.int16), np.int16(-1))
+
+    return region.memo(('texture_labels', bit_depth, levels), build)
+
+
+def _masked_glcm_features(roi_only, bit_depth, levels, distances):
+    """GLCM features of a crop that is zero outside its mask; NaN if fewer than 4 pixels remain"""
+    rescaled = _quantize(roi_only, bit_depth, levels)
+    if np.count_nonzero(rescaled) < 4:
+        return {name: np.nan for name in GLCM_FEATURES}
+    glcm = graycomatrix(rescaled, list(distances), _GLCM_ANGLES, levels=levels, symmetric=True, normed=True)
+    return _glcm_properties(glcm)
+
+
+def _ring_distance(region, pad):
+    """
+    Padded crop window of a region and the Euclidean distance of each of its
+    pixels to the nearest region pixel (0 inside the region)
+    """
+    x, y, w, h = region.bbox
+    height, width = region.image_shape
+    x0, y0 = max(x - pad, 0), max(y - pad, 0)
+    x1, y1 = min(x + w + pad, width), min(y + h + pad, height)
+    window = (x0, y0, x1 - x0, y1 - y0)
+    outside = np.where(region.mask_in(window) > 0, 0, 255).astype(np.uint8)
+    return window, cv2.distanceTransform(outside, cv2.DIST_L2, cv2.DIST_MASK_PRECISE)
+
+
+def _jackknife_errors(full, partials):
+    """
+    Grouped jackknife standard error of each feature
+
+    Args:
+        full (dict): Features computed on the whole sample
+        partials (list): Features computed with one sample group left out each
+
+    Returns:
+        dict: Standard error per feature (NaN where it cannot be estimated)
+    """
+    groups = len(partials)
+    errors = {}
+    for name in full:
+        values = np.array([partial[name] for partial in partials], dtype=np.float64)
+        if groups < 2 or np.any(np.isnan(values)):
+            errors[name] = np.nan
+            continue
+        errors[name] = float(np.sqrt((groups - 1) / groups * np.sum((values - values.mean()) ** 2)))
+    return errors
+
+
+def resample_contours(point_sets, samples=CONTOUR_SAMPLES):
+    """
+    Resample closed polygons to equally spaced points along their arc length
+
+    All polygons are processed together: vertices are padded to a common
+    count with zero-length segments and the sample positions of every
+    polygon are located with a single searchsorted call.
+
+    Args:
+        point_sets (list): Polygon vertex arrays (N_i x 2)
+        samples (int): Number of points per resampled contour
+
+    Returns:
+        tuple: (P x samples x 2 resampled points, perimeter of each polygon)
+    """
+    count = len(point_sets)
+    max_vertices = max(len(points) for points in point_sets)
+
+    # Closed, padded vertex arrays (P x V+1 x 2)
+    vertices = np.empty((count, max_vertices + 1, 2), dtype=np.float64)
+    for k, points in enumerate(point_sets):
+        points = np.asarray(points, dtype=np.float64).reshape(-1, 2)
+        vertices[k, :len(points)] = points
+        vertices[k, len(points):] = points[0]
+
+    segments = np.diff(vertices, axis=1)
+    lengths = np.hypot(segments[..., 0], segments[..., 1])
+    cumulative = np.concatenate([np.zeros((count, 1)), np.cumsum(lengths, axis=1)], axis=1)
+    perimeter = cumulative[:, -1]
+
+    # Search normalized arc length in one flat array; rows are 2 apart
+    with np.errstate(divide='ignore', invalid='ignore'):
+        normalized = np.nan_to_num(cumulative / perimeter[:, None])
+    rows = np.arange(count)[:, None]
+    positions = np.arange(samples) / samples
+    flat_index = np.searchsorted((normalized + 2 * rows).ravel(), (positions + 2 * rows).ravel(), side='right') - 1
+    segment = np.clip(flat_index.reshape(count, samples) - rows * (max_vertices + 1), 0, max_vertices - 1)
+
+    start = np.take_along_axis(cumulative, segment, axis=1)
+    length = np.take_along_axis(lengths, segment, axis=1)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        fraction = np.where(length > 0, (positions * perimeter[:, None] - start) / length, 0.0)
+    origin = np.take_along_axis(vertices[:, :-1], segment[..., None], axis=1)
+    step = np.take_along_axis(segments, segment[..., None], axis=1)
+    return origin + fraction[..., None] * step, perimeter
+
+
+def elliptic_fourier_descriptors(contours, harmonics=EFD_HARMONICS):
+    """
+    Elliptic Fourier coefficients of closed contours (Kuhl & Giardina, 1982)
+
+    Args:
+        contours (numpy.ndarray): P x N x 2 closed contours
+        harmonics (int): Number of harmonics
+
+    Returns:
+        numpy.ndarray: P x harmonics x 4 coefficients (a, b, c, d)
+    """
+    deltas = np.roll(contours, -1, axis=1) - contours
+    dt = np.hypot(deltas[..., 0], deltas[..., 1])
+    t = np.cumsum(dt, axis=1)
+    period = t[:, -1]
+
+    n = np.arange(1, harmonics + 1)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        scale = (2 * pi * n[None, :, None]) / period[:, None, None]
+        phi = scale * t[:, None, :]
+        phi_prev = scale * (t - dt)[:, None, :]
+        ratio = np.where(dt[..., None] > 0, deltas / dt[..., None], 0.0)
+        const = period[:, None] / (2 * pi ** 2 * n[None, :] ** 2)
+
+    d_cos = np.cos(phi) - np.cos(phi_prev)
+    d_sin = np.sin(phi) - np.sin(phi_prev)
+    return np.stack([
+        const * np.einsum('pn,phn->ph', ratio[..., 0], d_cos),
+        const * np.einsum('pn,phn->ph', ratio[..., 0], d_sin),
+        const * np.einsum('pn,phn->ph', ratio[..., 1], d_cos),
+        const * np.einsum('pn,phn->ph', ratio[..., 1], d_sin),
+    ], axis=-1)
+
+
+def contour_curvature(contours, sigma=_CURVATURE_SIGMA):
+    """
+    Curvature along closed, uniformly sampled contours
+
+    Derivatives are taken in the Fourier domain after Gaussian smoothing, so
+    annotation vertices do not produce curvature spikes.
+
+    Args:
+        contours (numpy.ndarray): P x N x 2 contours sampled at equal arc length
+        sigma (float): Gaussian smoothing in samples
+
+    Returns:
+        numpy.ndarray: P x N signed curvature (1/px), positive where the
+            contour is convex
+    """
+    samples = contours.shape[1]
+    z = contours[..., 0] + 1j * contours[..., 1]
+    omega = 2 * pi * np.fft.fftfreq(samples)
+    spectrum = np.fft.fft(z, axis=1) * np.exp(-0.5 * (omega * sigma) ** 2)
+    first = np.fft.ifft(1j * omega * spectrum, axis=1)
+    second = np.fft.ifft(-(omega ** 2) * spectrum, axis=1)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        curvature = np.imag(np.conj(first) * second) / np.abs(first) ** 3
+
+    # Orient so that convex parts are positive regardless of vertex order
+    x, y = contours[..., 0], contours[..., 1]
+    signed_area = np.sum(x * np.roll(y, -1, axis=1) - np.roll(x, -1, axis=1) * y, axis=1)
+    return curvature * np.where(signed_area < 0, -1.0, 1.0)[:, None]
+
+
+def contour_signatures(point_sets, samples=CONTOUR_SAMPLES, harmonics=EFD_HARMONICS):
+    """
+    Contour signature features of all polygons of an image in one batch
+
+    EFD_Harmonic_n is the amplitude of harmonic n relative to the first
+    harmonic, invariant to translation, rotation, scale and start point.
+    Curvature values are normalized by the curvature of a circle with the
+    same perimeter (a circle scores 1), and Bending_Energy is the mean
+    squared normalized curvature (1 for a circle, larger for irregular
+    boundaries).
+
+    Args:
+        point_sets (list): Polygon vertex arrays (N_i x 2)
+        samples (int): Arc-length samples per contour
+        harmonics (int): Number of elliptic Fourier harmonics
+
+    Returns:
+        list: One dict of CONTOUR_FEATURES per polygon (NaN for polygons with
+            fewer than 3 vertices or without area)
+    """
+    if not point_sets:
+        return []
+    valid = np.array([len(points) >= 3 for points in point_sets])
+    contours, perimeter = resample_contours(
+        [points if len(points) else np.zeros((1, 2)) for points in point_sets], samples
+    )
+    # Zero-area (e.g. collinear) contours have no meaningful curvature
+    x, y = contours[..., 0], contours[..., 1]
+    area = 0.5 * np.abs(np.sum(x * np.roll(y, -1, axis=1) - np.roll(x, -1, axis=1) * y, axis=1))
+    valid &= (perimeter > 0) & (area > 1e-6 * perimeter ** 2)
+
+    coefficients = elliptic_fourier_descriptors(contours, harmonics)
+    amplitude = np.sqrt(np.sum(coefficients ** 2, axis=-1))
+    with np.errstate(divide='ignore', invalid='ignore'):
+        relative = amplitude / amplitude[:, :1]
+        curvature = contour_curvature(contours) * (perimeter / (2 * pi))[:, None]
+
+    features = []
+    for k in range(len(point_sets)):
+        if not valid[k]:
+            features.append({name: np.nan for name in CONTOUR_FEATURES})
+            continue
+        row = {f'EFD_Harmonic_{n}': relative[k, n - 1] for n in range(2, harmonics + 1)}
+        row.update({
+            'Curvature_Mean_Abs': np.mean(np.abs(curvature[k])),
+            'Curvature_Std': np.std(curvature[k]),
+            'Curvature_Max': np.max(np.abs(curvature[k])),
+            'Concavity_Fraction': np.mean(curvature[k] < 0),
+            'Bending_Energy': np.mean(curvature[k] ** 2),
+        })
+        features.append(row)
+    return features
+
 
 class FeatureExtractor:
     """Feature extraction class for tumor analysis"""
 
-    def __init__(self, px_per_mm=19):
+    def __init__(self, px_per_mm=19, approx_max_pixels=None, glcm_levels=GLCM_LEVELS,
+                 glcm_distances=GLCM_DISTANCES, threshold=None):
         """
         Initialize feature extractor
 
         Args:
             px_per_mm (float): Pixel to millimeter conversion ratio (default: 19)
+            approx_max_pixels (int, optional): Approximate mode. Regions larger
+                than this many pixels get their intensity and GLCM features
+                estimated from a stratified sample of about this size, and
+                Approx_Sampling_Rate / Approx_Error_* columns are added to every
+                region (default: None, all features exact)
+            glcm_levels (int): Gray levels of the GLCM, at most 256 (default: 8)
+            glcm_distances (tuple): Pixel distances the GLCM features are
+                averaged over (default: (1,))
+            threshold (int, optional): Fixed gray-level threshold of the binary
+                ROI (default: None, Otsu's threshold)
         """
         self.px_per_mm = px_per_mm
         self.px_to_mm = 1.0 / px_per_mm
+        self.approx_max_pixels = approx_max_pixels
+        self.glcm_levels = glcm_levels
+        self.glcm_distances = tuple(glcm_distances)
+        self.threshold = threshold
+
+    def feature_columns(self):
+        """
+        Declare the columns of calculate_region_features
+
+        Returns:
+            list: FeatureColumn entries in output order (approximate mode adds
+                APPROXIMATE_COLUMNS)
+        """
+        if self.approx_max_pixels:
+            return REGION_FEATURE_COLUMNS + APPROXIMATE_COLUMNS
+        return list(REGION_FEATURE_COLUMNS)
+
+    def binary_threshold(self, gray_image, region, bit_depth):
+        """
+        Get the threshold of the binary ROI
+
+        Otsu's threshold is computed over the region with the rest of the frame
+        counted as background, and memoized on the region.
+
+        Args:
+            gray_image (numpy.ndarray): Full-frame grayscale image
+            region (RegionContext): Region to measure
+            bit_depth (int): Significant bits per pixel
+
+        Returns:
+            int: Fixed threshold if configured, otherwise Otsu's threshold
+        """
+        if self.threshold is not None:
+            return self.threshold
+
+        def otsu(r):
+            roi_pixels = r.memo('roi_pixels', lambda r: r.pixels(gray_image))
+            hist = np.bincount(roi_pixels, minlength=1 << bit_depth)
+            hist[0] += gray_image.size - len(roi_pixels)
+            return otsu_threshold(hist)
+
+        return region.memo(('otsu_threshold', bit_depth), otsu)
 
-    def calculate_glcm_features(self, roi_gray, mask):
+    def calculate_region_features(self, gray_image, region, bit_depth=None):
+        """
+        Calculate all features of one region
+
+        Args:
+            gray_image (numpy.ndarray): Full-frame grayscale image (8 or 16 bit,
+                may be memory-mapped; only the region's bounding box is read)
+            region (RegionContext): Region to measure
+            bit_depth (int, optional): Significant bits per pixel (default: from dtype)
+
+        Returns:
+            dict: Basic measurements followed by intensity, shape, ellipse and
+                GLCM features, or None if the region contains no pixels
+        """
+        bit_depth = bit_depth or gray_image.dtype.itemsize * 8
+        if self.approx_max_pixels and region.area > self.approx_max_pixels:
+            return self.calculate_approximate_region_features(gray_image, region, bit_depth)
+
+        # Pixel values and threshold are memoized, so several extractors
+        # measuring the same region share them
+        roi_pixels = region.memo('roi_pixels', lambda r: r.pixels(gray_image))
+        if len(roi_pixels) == 0:
+            return None
+
+        # Binary processing
+        threshold = self.binary_threshold(gray_image, region, bit_depth)
+        binary_roi = np.where(roi_pixels > threshold, 255, 0).astype(np.uint8)
+
+        features = {
+            'Area_Pixels': region.area,
+            'Area_mm2': region.area * (self.px_to_mm ** 2),
+            'Perimeter_Pixels': region.perimeter,
+            'Perimeter_mm': region.perimeter * self.px_to_mm,
+        }
+        features.update(self.calculate_intensity_features(roi_pixels, binary_roi))
+        features.update(self.calculate_shape_features(region))
+        features.update(self.calculate_ellipse_features(region))
+        features.update(self.calculate_glcm_features(gray_image, region, bit_depth))
+        if self.approx_max_pixels:
+            # Exact region: full sampling rate, no estimation error
+            features['Approx_Sampling_Rate'] = 1.0
+            features.update({f'Approx_Error_{name}': 0.0 for name in APPROXIMATED_FEATURES})
+        return features
+
+    def calculate_approximate_region_features(self, gray_image, region, bit_depth=None):
+        """
+        Calculate all features of one region from a stratified pixel sample
+
+        Geometric features stay exact. Intensity features are computed from one
+        randomly placed pixel per grid cell of the region's bounding box, and
+        GLCM features from one randomly chosen tile per run of tiles, so the
+        sample covers the whole region evenly. The sample is split into
+        interleaved groups and the error of every estimated feature is the
+        grouped jackknife standard error.
+
+        Args:
+            gray_image (numpy.ndarray): Full-frame grayscale image
+            region (RegionContext): Region to measure
+            bit_depth (int, optional): Significant bits per pixel (default: from dtype)
+
+        Returns:
+            dict: Same columns as calculate_region_features, plus
+                Approx_Sampling_Rate and one Approx_Error_<feature> column per
+                estimated feature; None if the region contains no pixels
+        """
+        if not region.area:
+            return None
+        bit_depth = bit_depth or gray_image.dtype.itemsize * 8
+        max_pixels = self.approx_max_pixels or region.area
+        rng = np.random.default_rng(0)
+
+        # One pixel per stride x stride cell, at a random position in the cell
+        stride = max(1, int(np.ceil(np.sqrt(region.area / max_pixels))))
+        height, width = region.mask.shape
+        cells_y, cells_x = -(-height // stride), -(-width // stride)
+        ys = np.arange(cells_y)[:, None] * stride + rng.integers(0, stride, (cells_y, cells_x))
+        xs = np.arange(cells_x)[None, :] * stride + rng.integers(0, stride, (cells_y, cells_x))
+        cell_ids = np.arange(cells_y * cells_x).reshape(cells_y, cells_x)
+        inside = (ys < height) & (xs < width)
+        ys, xs, cell_ids = ys[inside], xs[inside], cell_ids[inside]
+        in_region = region.mask[ys, xs] > 0
+        ys, xs, cell_ids = ys[in_region], xs[in_region], cell_ids[in_region]
+        sample = region.crop(gray_image)[ys, xs]
+        if len(sample) == 0:
+            return None
+        groups = cell_ids % _APPROX_GROUPS
+
+        # Otsu's threshold on the sample histogram scaled up to the region size
+        if self.threshold is not None:
+            threshold = self.threshold
+        else:
+            hist = np.bincount(sample, minlength=1 << bit_depth) * (region.area / len(sample))
+            hist[0] += gray_image.size - region.area
+            threshold = otsu_threshold(hist)
+        binary_sample = np.where(sample > threshold, 255, 0).astype(np.uint8)
+
+        intensity = self.calculate_intensity_features(sample, binary_sample)
+        intensity_partials = [
+            self.calculate_intensity_features(sample[groups != g], binary_sample[groups != g])
+            for g in range(_APPROX_GROUPS) if np.any(groups == g)
+        ]
+        glcm, glcm_partials = self._approximate_glcm_features(gray_image, region, bit_depth, rng)
+
+        features = {
+            'Area_Pixels': region.area,
+            'Area_mm2': region.area * (self.px_to_mm ** 2),
+            'Perimeter_Pixels': region.perimeter,
+            'Perimeter_mm': region.perimeter * self.px_to_mm,
+        }
+        features.update(intensity)
+        features.update(self.calculate_shape_features(region))
+        features.update(self.calculate_ellipse_features(region))
+        features.update(glcm)
+
+        errors = _jackknife_errors(intensity, intensity_partials)
+        errors.update(_jackknife_errors(glcm, glcm_partials))
+        # Sample extremes only bound the true range; no error estimate
+        errors['Min_Intensity'] = errors['Max_Intensity'] = np.nan
+        features['Approx_Sampling_Rate'] = len(sample) / region.area
+        features.update({f'Approx_Error_{name}': errors[name] for name in APPROXIMATED_FEATURES})
+        return features
+
+    def _approximate_glcm_features(self, gray_image, region, bit_depth, rng):
+        """
+        Estimate GLCM features from a stratified sample of tiles
+
+        The tumor-only ROI (as in calculate_glcm_features) is divided into
+        square tiles; runs of consecutive tiles form strata and one tile is
+        drawn per stratum. Co-occurrences are counted inside the drawn tiles
+        only, so unsampled tiles are never quantized.
+
+        Returns:
+            tuple: (GLCM features, list of GLCM features with one tile group
+                left out each)
+        """
+        left, top, width, height = region.mask_bbox
+        x, y, _, _ = region.bbox
+        roi = gray_image[top:top+height, left:left+width]
+        mask = region.mask[top-y:top-y+height, left-x:left-x+width]
+
+        tiles_y, tiles_x = -(-height // _APPROX_TILE), -(-width // _APPROX_TILE)
+        n_tiles = tiles_y * tiles_x
+        per_stratum = max(1, int(np.ceil(region.area / self.approx_max_pixels))) if self.approx_max_pixels else 1
+        starts = np.arange(0, n_tiles, per_stratum)
+        chosen = np.minimum(starts + rng.integers(0, per_stratum, len(starts)), n_tiles - 1)
+
+        # Quantized tiles, padded with the out-of-range level glcm_levels
+        levels = self.glcm_levels
+        tiles = np.full((len(chosen), _APPROX_TILE, _APPROX_TILE), levels, dtype=np.uint16)
+        for k, tile in enumerate(chosen):
+            ty, tx = divmod(int(tile), tiles_x)
+            r0, c0 = ty * _APPROX_TILE, tx * _APPROX_TILE
+            values = roi[r0:r0+_APPROX_TILE, c0:c0+_APPROX_TILE]
+            inside = mask[r0:r0+_APPROX_TILE, c0:c0+_APPROX_TILE] > 0
+            tiles[k, :values.shape[0], :values.shape[1]] = np.where(
+                inside, _quantize(values, bit_depth, levels), 0
+            )
+
+        distances = len(self.glcm_distances)
+        counts = _tile_cooccurrences(tiles, levels, self.glcm_distances)
+        groups = np.arange(len(chosen)) % _APPROX_GROUPS
+        full = _glcm_properties(_glcm_from_counts(counts.sum(axis=0), distances))
+        partials = [
+            _glcm_properties(_glcm_from_counts(counts[groups != g].sum(axis=0), distances))
+            for g in range(_APPROX_GROUPS) if np.any(groups == g) and np.any(groups != g)
+        ]
+        return full, partials
+
+    def calculate_contour_features(self, regions):
+        """
+        Calculate contour signature features of all regions of an image
+
+        Elliptic Fourier descriptors, curvature statistics and bending energy
+        are computed for all polygons in one vectorized batch.
+
+        Args:
+            regions (list): RegionContext objects of one image
+
+        Returns:
+            list: One dict of CONTOUR_FEATURES per region
+        """
+        return contour_signatures([region.points for region in regions])
+
+    def calculate_parent_relative_features(self, gray_image, region, parent):
+        """
+        Calculate features of a region relative to the region containing it
+
+        Describes, for example, a lesion drawn inside a gland outline in terms
+        of the surrounding gland tissue (the parent without the lesion).
+
+        Args:
+            gray_image (numpy.ndarray): Full-frame grayscale image
+            region (RegionContext): Contained region
+            parent (RegionContext or None): Containing region, None if the
+                region has no parent
+
+        Returns:
+            dict: Dictionary containing parent-relative features
+        """
+        if parent is None:
+            return {
+                'Parent_Relative_Area': np.nan,
+                'Parent_Background_Mean_Intensity': np.nan,
+                'Parent_Relative_Mean_Intensity': np.nan,
+                'Parent_Contrast': np.nan,
+                'Parent_Centroid_Offset_mm': np.nan
+            }
+
+        lesion_pixels = region.pixels(gray_image)
+        surrounding = (parent.mask > 0) & (region.mask_in(parent.bbox) == 0)
+        background_pixels = parent.crop(gray_image)[surrounding]
+
+        relative_area = region.area / parent.area if parent.area > 0 else np.nan
+        if len(lesion_pixels) > 0 and len(background_pixels) > 0:
+            lesion_mean = np.mean(lesion_pixels)
+            background_mean = np.mean(background_pixels)
+            background_std = np.std(background_pixels)
+            relative_mean = lesion_mean / background_mean if background_mean > 0 else np.nan
+            contrast = (lesion_mean - background_mean) / background_std if background_std > 0 else np.nan
+        else:
+            background_mean = relative_mean = contrast = np.nan
+
+        moments, parent_moments = region.moments, parent.moments
+        if moments['m00'] > 0 and parent_moments['m00'] > 0:
+            offset = np.hypot(moments['m10'] / moments['m00'] - parent_moments['m10'] / parent_moments['m00'],
+                              moments['m01'] / moments['m00'] - parent_moments['m01'] / parent_moments['m00'])
+            offset_mm = offset * self.px_to_mm
+        else:
+            offset_mm = np.nan
+
+        return {
+            'Parent_Relative_Area': relative_area,
+            'Parent_Background_Mean_Intensity': background_mean,
+            'Parent_Relative_Mean_Intensity': relative_mean,
+            'Parent_Contrast': contrast,
+            'Parent_Centroid_Offset_mm': offset_mm
+        }
+
+    def calculate_peritumoral_features(self, gray_image, region, rings_mm, bit_depth=None):
+        """
+        Calculate intensity and texture features of rings around a region
+
+        Rings are concentric bands outside the polygon: a ring covers the pixels
+        farther from the region than the previous ring's outer edge, up to its
+        own outer edge (the first ring starts at the boundary). Everything is
+        computed on the region's bounding box padded by the outermost ring and
+        clipped to the image, never on the full frame.
+
+        Args:
+            gray_image (numpy.ndarray): Full-frame grayscale image
+            region (RegionContext): Region to measure
+            rings_mm (list): Outer ring edges in millimeters
+            bit_depth (int, optional): Significant bits per pixel (default: from dtype)
+
+        Returns:
+            dict: PERITUMORAL_FEATURES of every ring, prefixed
+                Peri_<outer edge>mm_; Relative_Mean_Intensity is the lesion mean
+                over the ring mean and Contrast the difference of the means in
+                ring standard deviations
+        """
+        rings_mm = sorted(rings_mm)
+        features = {
+            f'Peri_{mm:g}mm_{name}': np.nan for mm in rings_mm for name in PERITUMORAL_FEATURES
+        }
+        if not region.area:
+            return features
+        bit_depth = bit_depth or gray_image.dtype.itemsize * 8
+
+        # Distance of every pixel of the padded crop to the region, shared by
+        # extractors with the same padding
+        pad = int(np.ceil(rings_mm[-1] * self.px_per_mm))
+        window, distance = region.memo(('peritumoral_distance', pad), lambda r: _ring_distance(r, pad))
+        x, y, w, h = window
+        crop = gray_image[y:y+h, x:x+w]
+
+        lesion_pixels = region.memo('roi_pixels', lambda r: r.pixels(gray_image))
+        lesion_mean = np.mean(lesion_pixels)
+
+        inner = 0.0
+        for mm in rings_mm:
+            outer = mm * self.px_per_mm
+            ring = (distance > inner) & (distance <= outer)
+            inner = outer
+            ring_pixels = crop[ring]
+            prefix = f'Peri_{mm:g}mm_'
+            features[prefix + 'Area_Pixels'] = len(ring_pixels)
+            if len(ring_pixels) == 0:
+                continue
+
+            ring_mean = np.mean(ring_pixels)
+            ring_std = np.std(ring_pixels)
+            features[prefix + 'Mean_Intensity'] = ring_mean
+            features[prefix + 'Median_Intensity'] = np.median(ring_pixels)
+            features[prefix + 'Std_Intensity'] = ring_std
+            features[prefix + 'Relative_Mean_Intensity'] = lesion_mean / ring_mean if ring_mean > 0 else np.nan
+            features[prefix + 'Contrast'] = (lesion_mean - ring_mean) / ring_std if ring_std > 0 else np.nan
+
+            ring_only = np.where(ring, crop, 0).astype(crop.dtype)
+            glcm = _masked_glcm_features(ring_only, bit_depth, self.glcm_levels, self.glcm_distances)
+            features.update({prefix + name: value for name, value in glcm.items()})
+        return features
+
+    def calculate_texture_maps(self, gray_image, region, window=7, bit_depth=None):
+        """
+        Calculate per-pixel texture maps over a region
+
+        Uses the quantization, gray levels and distances of the GLCM features,
+        counting only pixel pairs inside the region.
+
+        Args:
+            gray_image (numpy.ndarray): Full-frame grayscale image
+            region (RegionContext): Region to map
+            window (int): Odd window side length in pixels (default: 7)
+            bit_depth (int, optional): Significant bits per pixel (default: from dtype)
+
+        Returns:
+            tuple or None: (dict of TEXTURE_MAP_NAMES maps over the region's
+                tight bounding box, (x, y) image coordinates of the maps'
+                top-left pixel), None if the region is smaller than 2x2
+        """
+        left, top, width, height = region.mask_bbox
+        if width < 2 or height < 2:
+            return None
+        x, y, _, _ = region.bbox
+        levels = self.glcm_levels
+        bit_depth = bit_depth or gray_image.dtype.itemsize * 8
+        roi_rescaled = _quantized_roi(gray_image, region, bit_depth, levels)
+        mask = region.mask[top-y:top-y+height, left-x:left-x+width]
+        maps = texture_maps(roi_rescaled, mask, levels, _glcm_offsets(self.glcm_distances), window)
+        return maps, (left, top)
+
+    def calculate_texture_bank_features(self, gray_image, region, bit_depth=None):
+        """
+        Calculate GLRLM, GLSZM and LBP texture features
+
+        Run lengths and size zones are measured on the quantized ROI shared
+        with the GLCM features (same gray levels, quantized once per region);
+        the LBP uses the unquantized pixels.
+
+        Args:
+            gray_image (numpy.ndarray): Full-frame grayscale image
+            region (RegionContext): Region to measure
+            bit_depth (int, optional): Significant bits per pixel (default: from dtype)
+
+        Returns:
+            dict: GLRLM, GLSZM and LBP features (NaN if the region has no pixels)
+        """
+        if not region.area:
+            return {name: np.nan for name in GLRLM_FEATURES + GLSZM_FEATURES + LBP_FEATURES}
+        bit_depth = bit_depth or gray_image.dtype.itemsize * 8
+
+        labels = _texture_labels(gray_image, region, bit_depth, self.glcm_levels)
+        features = run_length_features(labels)
+        features.update(size_zone_features(labels))
+
+        # LBP neighbours of border pixels come from the image around the region
+        left, top, width, height = region.mask_bbox
+        image_height, image_width = gray_image.shape[:2]
+        x0, y0 = max(left - 1, 0), max(top - 1, 0)
+        x1, y1 = min(left + width + 1, image_width), min(top + height + 1, image_height)
+        window = (x0, y0, x1 - x0, y1 - y0)
+        features.update(lbp_features(gray_image[y0:y1, x0:x1], region.mask_in(window)))
+        return features
+
+    def calculate_glcm_features(self, gray_image, region, bit_depth=None):
         """
         Calculate Gray Level Co-occurrence Matrix (GLCM) texture features
 
         Args:
-            roi_gray (numpy.ndarray): Grayscale region of interest
-            mask (numpy.ndarray): Binary mask for the tumor region
+            gray_image (numpy.ndarray): Full-frame grayscale image
+            region (RegionContext): Region to measure
+            bit_depth (int, optional): Significant bits per pixel (default: from dtype)
 
         Returns:
             dict: Dictionary containing GLCM features
         """
         try:
             # Ensure ROI is large enough for GLCM calculation
-            if np.count_nonzero(mask) > 25:  # At least 5x5 region needed
-                # Extract minimum rectangle containing the tumor
-                y_indices, x_indices = np.where(mask > 0)
-                top, bottom = np.min(y_indices), np.max(y_indices)
-                left, right = np.min(x_indices), np.max(x_indices)
+            if region.area > 25:  # At least 5x5 region needed
+                # Minimum rectangle containing the tumor pixels
+                _, _, width, height = region.mask_bbox
 
                 # Ensure extracted region is at least 2x2
-                if right - left < 1 or bottom - top < 1:
+                if width < 2 or height < 2:
                     raise ValueError("ROI too small for GLCM calculation")
 
-                # Extract ROI
-                roi_small = roi_gray[top:bottom+1, left:right+1]
-                mask_small = mask[top:bottom+1, left:right+1]
-
-                # Create image containing only tumor region
-                roi_tumor_only = np.zeros_like(roi_small)
-                roi_tumor_only[mask_small > 0] = roi_small[mask_small > 0]
-
-                # Scale grayscale range to fewer levels to avoid sparse GLCM
-                levels = 8
-                roi_rescaled = (roi_tumor_only // (256 // levels)).astype(np.uint8)
+                # Image containing only the tumor region, scaled to fewer gray
+                # levels to avoid a sparse GLCM (both shared by extractors
+                # measuring the same region)
+                levels = self.glcm_levels
+                bit_depth = bit_depth or gray_image.dtype.itemsize * 8
+                roi_rescaled = _quantized_roi(gray_image, region, bit_depth, levels)
 
                 # Remove all zero pixels (not part of tumor region)
                 non_zero_mask = roi_rescaled > 0
@@ -70,54 +978,33 @@ class FeatureExtractor:
                 if np.count_nonzero(non_zero_mask) < 4:
                     raise ValueError("Effective ROI too small for GLCM calculation")
 
-                # Calculate GLCM (distance=1, angles=[0, 45, 90, 135] degrees)
+                # Calculate GLCM (angles=[0, 45, 90, 135] degrees)
                 glcm = graycomatrix(
-                    roi_rescaled, [1],
-                    [0, np.pi/4, np.pi/2, 3*np.pi/4],
+                    roi_rescaled, list(self.glcm_distances), _GLCM_ANGLES,
                     levels=levels,
                     symmetric=True,
                     normed=True
                 )
 
-                # Calculate GLCM properties
-                contrast = np.mean(graycoprops(glcm, 'contrast')[0])
-                homogeneity = np.mean(graycoprops(glcm, 'homogeneity')[0])
-                energy = np.mean(graycoprops(glcm, 'energy')[0])
-                correlation = np.mean(graycoprops(glcm, 'correlation')[0])
-                dissimilarity = np.mean(graycoprops(glcm, 'dissimilarity')[0])
-                ASM = np.mean(graycoprops(glcm, 'ASM')[0])
-
-                # Calculate entropy
-                glcm_flat = glcm.flatten()
-                glcm_flat = glcm_flat[glcm_flat > 0]
-                entropy = -np.sum(glcm_flat * np.log2(glcm_flat)) if len(glcm_flat) > 0 else np.nan
+                return _glcm_properties(glcm)
             else:
                 raise ValueError("ROI too small for GLCM calculation")
         except Exception as e:
             print(f"Error in GLCM calculation: {e}")
-            contrast = homogeneity = energy = correlation = dissimilarity = ASM = entropy = np.nan
-
-        return {
-            'GLCM_Contrast': contrast,
-            'GLCM_Homogeneity': homogeneity,
-            'GLCM_Energy': energy,
-            'GLCM_Correlation': correlation,
-            'GLCM_Dissimilarity': dissimilarity,
-            'GLCM_ASM': ASM,
-            'GLCM_Entropy': entropy
-        }
+            return {name: np.nan for name in GLCM_FEATURES}
 
-    def calculate_ellipse_features(self, points):
+    def calculate_ellipse_features(self, region):
         """
         Calculate ellipse fitting features
 
         Args:
-            points (numpy.ndarray): Contour points
+            region (RegionContext): Region to measure
 
         Returns:
             dict: Dictionary containing ellipse features
         """
-        if len(points) < 5:  # At least 5 points needed to fit ellipse
+        ellipse = region.ellipse
+        if ellipse is None:  # At least 5 points needed to fit ellipse
             return {
                 'Ellipse_Area': np.nan,
                 'Ellipse_Perimeter': np.nan,
@@ -129,8 +1016,6 @@ class FeatureExtractor:
             }
 
         try:
-            # Use OpenCV's ellipse fitting function
-            ellipse = cv2.fitEllipse(points)
             center, axes, angle = ellipse
 
             # Get major and minor axes
@@ -180,28 +1065,26 @@ class FeatureExtractor:
                 'Ellipse_MinorAxis_Angle': np.nan
             }
 
-    def calculate_shape_features(self, mask, points):
+    def calculate_shape_features(self, region):
         """
         Calculate shape features
 
         Args:
-            mask (numpy.ndarray): Binary mask
-            points (numpy.ndarray): Contour points
+            region (RegionContext): Region to measure
 
         Returns:
             dict: Dictionary containing shape features
         """
-        area = cv2.countNonZero(mask)
-        perimeter = cv2.arcLength(points, True)
+        area = region.area
+        perimeter = region.perimeter
 
         # Calculate circularity (4π * Area / Perimeter²)
         circularity = 4 * pi * area / (perimeter ** 2) if perimeter > 0 else np.nan
         circularity = 1.0 if circularity > 1 else circularity
 
-        # Calculate convex hull
-        hull = cv2.convexHull(points)
-        hull_area = cv2.contourArea(hull)
-        hull_perimeter = cv2.arcLength(hull, True)
+        # Convex hull measurements
+        hull_area = region.hull_area
+        hull_perimeter = region.hull_perimeter
 
         # Calculate convexity = convex hull perimeter / actual perimeter
         convexity = hull_perimeter / perimeter if perimeter > 0 else np.nan
@@ -215,7 +1098,7 @@ class FeatureExtractor:
         irregularity = perimeter / hull_perimeter if hull_perimeter > 0 else np.nan
 
         # Calculate aspect ratio (using bounding rectangle)
-        x, y, w, h = cv2.boundingRect(points)
+        x, y, w, h = region.bounding_rect
         if w >= h:
             aspect_ratio = w / h
         elif w < h:
@@ -224,13 +1107,10 @@ class FeatureExtractor:
             aspect_ratio = np.nan
 
         # Calculate Feret's Diameter - maximum distance between any two points
-        max_distance = 0
-        for i in range(len(points)):
-            for j in range(i + 1, len(points)):
-                dist = np.sqrt((points[i][0][0] - points[j][0][0])**2 +
-                             (points[i][0][1] - points[j][0][1])**2)
-                if dist > max_distance:
-                    max_distance = dist
+        # (the farthest pair always lies on the convex hull)
+        hull_points = region.hull.reshape(-1, 2).astype(np.int64)
+        diffs = hull_points[:, None, :] - hull_points[None, :, :]
+        max_distance = np.sqrt(np.max(np.sum(diffs ** 2, axis=-1))) if len(hull_points) > 1 else 0
 
         # Calculate area fraction = region area / bounding rectangle area
         area_fraction = area / (w * h) if (w * h) > 0 else np.nan
@@ -0,0 +1,149 @@
+"""
+Crash-safe run journal
+
+While analyze_all_images runs, every completed image (and every analyzed
+frame of a cine clip, followed by an entry for the finished clip) is appended
+to run_journal.jsonl in the output directory as one JSON line holding its
+result rows, flushed and fsync'd before the next image starts. The first line
+records the analysis settings and result columns.
+
+A resumed run reads the journal back, restores the rows of completed images
+in place instead of analyzing them again (frames only once their whole clip
+is complete) and keeps appending, so the final outputs equal those of an
+uninterrupted run. A line cut off by a crash is ignored. The journal is
+removed once the final outputs are written.
+
+Floats are written with their shortest exact representation (NaN and
+infinities as the JSON extensions NaN and Infinity), so restored rows are
+bit-identical to the journaled ones.
+"""
+
+import json
+import os
+
+import numpy as np
+
+# File name of the journal in the output directory
+JOURNAL_NAME = "run_journal.jsonl"
+
+# Format version written into the header
+_JOURNAL_VERSION = 1
+
+
+def _json_value(value):
+    """Convert NumPy scalars and arrays for JSON"""
+    if isinstance(value, np.generic):
+        return value.item()
+    if isinstance(value, np.ndarray):
+        return value.tolist()
+    raise TypeError(f"Cannot write {type(value).__name__} to the journal")
+
+
+def _encode(entry):
+    """One JSON line of an entry"""
+    return json.dumps(entry, default=_json_value, separators=(',', ':')) + '\n'
+
+
+def read_journal(path):
+    """
+    Read a journal
+
+    Args:
+        path (str): Journal file
+
+    Returns:
+        tuple: (header dict, list of entry dicts); a last line cut off by a
+            crash is dropped
+
+    Raises:
+        ValueError: If the file has no valid header or a damaged line before its end
+    """
+    with open(path, 'r', encoding='utf-8') as f:
+        lines = f.readlines()
+    records = []
+    for number, line in enumerate(lines):
+        try:
+            records.append(json.loads(line))
+        except json.JSONDecodeError:
+            if number == len(lines) - 1:
+                break
+            raise ValueError(f"Damaged line {number + 1} in journal: {path}")
+    if not records or records[0].get('version') != _JOURNAL_VERSION:
+        raise ValueError(f"Not a run journal: {path}")
+    return records[0], records[1:]
+
+
+class RunJournal:
+    """Append-only, fsync'd log of completed images and their result rows"""
+
+    def __init__(self, output_dir, header):
+        """
+        Initialize journal
+
+        Args:
+            output_dir (str): Output directory holding the journal
+            header (dict): JSON-serializable analysis settings; a journal is
+                only resumed if it was written with equal settings
+        """
+        self.path = os.path.join(output_dir, JOURNAL_NAME)
+        self.header = json.loads(_encode(dict(header, version=_JOURNAL_VERSION)))
+        self._file = None
+
+    def open(self, resume=False):
+        """
+        Start journaling, continuing an existing journal when resuming
+
+        Args:
+            resume (bool): Read back and continue the journal left by an
+                interrupted run (default: False, start a new journal)
+
+        Returns:
+            list: Entries of the interrupted run (empty if not resuming or
+                no journal exists)
+
+        Raises:
+            ValueError: If the existing journal was written with other settings
+        """
+        entries = []
+        if resume and os.path.exists(self.path):
+            header, entries = read_journal(self.path)
+            if header != self.header:
+                raise ValueError(
+                    f"Journal {self.path} was written with other settings; "
+                    f"rerun with the same options or without resuming"
+                )
+            # Rewrite without a cut-off last line, then keep appending
+            with open(self.path, 'w', encoding='utf-8') as f:
+                f.writelines(_encode(record) for record in [header] + entries)
+                f.flush()
+                os.fsync(f.fileno())
+            self._file = open(self.path, 'a', encoding='utf-8')
+        else:
+            os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+            self._file = open(self.path, 'w', encoding='utf-8')
+            self.append(self.header)
+        return entries
+
+    def append(self, entry):
+        """
+        Durably append an entry
+
+        Args:
+            entry (dict): JSON-serializable entry (NumPy values are converted)
+        """
+        self._file.write(_encode(entry))
+        self._file.flush()
+        os.fsync(self._file.fileno())
+
+    def close(self, remove=False):
+        """
+        Stop journaling
+
+        Args:
+            remove (bool): Delete the journal, once the run's outputs are complete
+        """
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+        if remove and os.path.exists(self.path):
+            os.remove(self.path)
@@ -0,0 +1,213 @@
+"""
+Label mask export and loading
+
+A label mask stores every annotated region of an image in one uint16 array,
+with the shape index + 1 (the number used in Tumor_ID) as pixel value and 0 as
+background. Masks are built from the bbox-local region masks the analysis has
+already rasterized, and can be written as compressed NPZ or 16-bit PNG.
+
+NPZ masks also carry a fingerprint of the annotation and every region's
+bbox-local mask, bit-packed, which lets later analyzer runs take region masks
+straight from the file instead of rasterizing the shapes again. Only these
+small arrays are decompressed on reuse, never the full-frame label mask.
+"""
+
+import os
+import json
+import hashlib
+
+import cv2
+import numpy as np
+
+from paravision_analyzer.core.utils import atomic_path, read_image
+
+# Supported label mask formats and their file extensions
+LABEL_MASK_FORMATS = {'npz': '.npz', 'png': '.png'}
+
+
+def annotation_fingerprint(annotation_data):
+    """
+    Fingerprint the shapes of an annotation
+
+    Points are hashed as float64 arrays rather than serialized as text, so
+    densely traced shapes are cheap to fingerprint on every reuse.
+
+    Args:
+        annotation_data (dict): Parsed annotation data
+
+    Returns:
+        str: Hex digest that changes whenever a shape type, point or mask changes
+    """
+    digest = hashlib.sha1()
+    for shape in annotation_data['shapes']:
+        points = np.asarray(shape.get('points') or [], dtype=np.float64).reshape(-1, 2)
+        digest.update(json.dumps([shape.get('shape_type'), len(points), shape.get('mask')]).encode('utf-8'))
+        digest.update(points.tobytes())
+    return digest.hexdigest()
+
+
+def build_label_mask(regions, image_shape):
+    """
+    Combine bbox-local region masks into one label mask
+
+    Args:
+        regions (list): (shape index, RegionContext) pairs
+        image_shape (tuple): Shape of the image (height, width[, channels])
+
+    Returns:
+        tuple: (uint16 label mask, True if any two regions share a pixel;
+            later regions overwrite earlier ones there)
+    """
+    labels = np.zeros(image_shape[:2], dtype=np.uint16)
+    painted = 0
+    for idx, region in regions:
+        x, y, w, h = region.bbox
+        if not region.area:
+            continue
+        window = labels[y:y+h, x:x+w]
+        window[region.mask > 0] = idx + 1
+        painted += region.area
+    overlapping = painted != np.count_nonzero(labels)
+    return labels, overlapping
+
+
+class LabelMaskStore:
+    """Directory of per-image label masks"""
+
+    def __init__(self, mask_dir, mask_format='npz'):
+        """
+        Initialize label mask store
+
+        Args:
+            mask_dir (str): Directory holding the label masks
+            mask_format (str): 'npz' (compressed, reusable by the analyzer) or
+                'png' (16-bit PNG) (default: 'npz')
+        """
+        if mask_format not in LABEL_MASK_FORMATS:
+            raise ValueError(f"Unsupported label mask format: {mask_format}")
+        self.mask_dir = mask_dir
+        self.mask_format = mask_format
+
+    def path(self, base_name):
+        """
+        Get the label mask path of an image
+
+        Args:
+            base_name (str): Base filename (without extension)
+
+        Returns:
+            str: Path of the label mask file
+        """
+        return os.path.join(self.mask_dir, f"{base_name}_labels{LABEL_MASK_FORMATS[self.mask_format]}")
+
+    def save(self, base_name, labels, overlapping=False, fingerprint='', regions=()):
+        """
+        Write a label mask
+
+        Args:
+            base_name (str): Base filename (without extension)
+            labels (numpy.ndarray): uint16 label mask
+            overlapping (bool): Whether regions overlap in the mask
+            fingerprint (str): Annotation fingerprint stored with NPZ masks
+            regions (list): (shape index, RegionContext) pairs whose bbox-local
+                masks are stored with NPZ masks for reuse
+
+        Returns:
+            str: Path of the written file
+        """
+        os.makedirs(self.mask_dir, exist_ok=True)
+        path = self.path(base_name)
+        with atomic_path(path) as temp_path:
+            if self.mask_format == 'npz':
+                with open(temp_path, 'wb') as f:
+                    np.savez_compressed(
+                        f, labels=labels, overlapping=overlapping, fingerprint=fingerprint,
+                        image_shape=np.asarray(labels.shape, dtype=np.int64), **_pack_regions(regions)
+                    )
+            else:
+                # Encode in memory and write bytes to support non-ASCII paths
+                _, encoded = cv2.imencode('.png', labels)
+                encoded.tofile(temp_path)
+        return path
+
+    def load(self, base_name):
+        """
+        Load a label mask
+
+        Args:
+            base_name (str): Base filename (without extension)
+
+        Returns:
+            numpy.ndarray or None: uint16 label mask, None if it does not exist
+        """
+        path = self.path(base_name)
+        if not os.path.exists(path):
+            return None
+        return load_label_mask(path)
+
+    def load_reusable(self, base_name, annotation_data, image_shape):
+        """
+        Load the stored region masks that can replace rasterization
+
+        Masks are only reusable if they were written as NPZ from the same
+        annotation and for an image of the same size. Only the bit-packed
+        region masks are decompressed, not the full-frame label mask.
+
+        Args:
+            base_name (str): Base filename (without extension)
+            annotation_data (dict): Parsed annotation data
+            image_shape (tuple): Shape of the image being analyzed
+
+        Returns:
+            dict or None: Shape index -> (bbox, binary 0/255 uint8 mask local
+                to bbox), None if not reusable
+        """
+        path = self.path(base_name)
+        if self.mask_format != 'npz' or not os.path.exists(path):
+            return None
+        with np.load(path) as data:
+            # Masks of earlier versions carry no region masks
+            if 'region_bits' not in data.files:
+                return None
+            if str(data['fingerprint']) != annotation_fingerprint(annotation_data):
+                return None
+            if tuple(data['image_shape']) != tuple(image_shape[:2]):
+                return None
+            indices, bboxes, bits = data['region_index'], data['region_bbox'], data['region_bits']
+
+        pixels = np.unpackbits(bits, count=int(np.sum(bboxes[:, 2] * bboxes[:, 3])))
+        masks, offset = {}, 0
+        for idx, (x, y, w, h) in zip(indices.tolist(), bboxes.tolist()):
+            masks[idx] = ((x, y, w, h), pixels[offset:offset + w * h].reshape(h, w) * np.uint8(255))
+            offset += w * h
+        return masks
+
+
+def load_label_mask(path):
+    """
+    Load a label mask written by LabelMaskStore
+
+    NPZ files are opened lazily and only the label array is decompressed;
+    PNG files are decoded with their 16-bit depth preserved.
+
+    Args:
+        path (str): Path to a .npz or .png label mask
+
+    Returns:
+        numpy.ndarray: uint16 label mask (0 = background, k = shape index k - 1)
+    """
+    if path.endswith('.npz'):
+        with np.load(path) as data:
+            return data['labels']
+    return read_image(path, cv2.IMREAD_UNCHANGED)
+
+
+def _pack_regions(regions):
+    """Bbox-local region masks as NPZ arrays: shape indices, bboxes and concatenated packed bits"""
+    regions = list(regions)
+    bits = [region.mask.ravel() > 0 for _, region in regions]
+    return {
+        'region_index': np.asarray([idx for idx, _ in regions], dtype=np.int64),
+        'region_bbox': np.asarray([region.bbox for _, region in regions], dtype=np.int64).reshape(-1, 4),
+        'region_bits': np.packbits(np.concatenate(bits) if bits else np.zeros(0, dtype=bool)),
+    }
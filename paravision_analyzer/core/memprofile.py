@@ -0,0 +1,318 @@
+"""
+Memory profiling of the analysis stages
+
+A MemoryProfiler attributes memory use to stages (decode, masks, features,
+export, visualization, csv) of each image. The analyzer marks where a stage
+starts and records it where it ends; for every recorded stage the profiler
+keeps:
+
+- the net traced allocation (memory still held at the end of the stage) and
+  the traced peak above the stage start, from tracemalloc, which also catches
+  temporaries freed before the stage ends (Python 3.9+),
+- the resident set size after the stage and how much the stage raised the
+  process's RSS high-water mark, so the images that drove the process peak
+  can be named,
+- the allocation sites (innermost frame in this package, or the innermost
+  frame if the allocation does not come from this package) whose held memory
+  grew during the stage, from tracemalloc snapshots.
+
+Tracing slows Python code down noticeably, so this is a diagnostic mode.
+Worker processes profile themselves; their records are merged into the
+parent's and tagged with their process ID.
+"""
+
+import os
+import sys
+import tracemalloc
+from functools import lru_cache
+
+import numpy as np
+import pandas as pd
+
+from paravision_analyzer.core.utils import atomic_path
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+# Frames stored per traced allocation (enough to get from NumPy or OpenCV
+# wrappers back to the calling line of this package)
+_TRACE_FRAMES = 4
+
+# Allocation sites and images listed in the printed summary
+_SUMMARY_ENTRIES = 5
+
+# Directory of this package, used to find the package frame of an allocation
+_PACKAGE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+_MB = 1024.0 * 1024.0
+
+
+def _windows_memory():
+    """(current, peak) working set of this process in bytes via psapi"""
+    import ctypes
+    from ctypes import wintypes
+
+    class ProcessMemoryCounters(ctypes.Structure):
+        _fields_ = [
+            ('cb', wintypes.DWORD), ('PageFaultCount', wintypes.DWORD),
+            ('PeakWorkingSetSize', ctypes.c_size_t), ('WorkingSetSize', ctypes.c_size_t),
+            ('QuotaPeakPagedPoolUsage', ctypes.c_size_t), ('QuotaPagedPoolUsage', ctypes.c_size_t),
+            ('QuotaPeakNonPagedPoolUsage', ctypes.c_size_t), ('QuotaNonPagedPoolUsage', ctypes.c_size_t),
+            ('PagefileUsage', ctypes.c_size_t), ('PeakPagefileUsage', ctypes.c_size_t),
+        ]
+
+    counters = ProcessMemoryCounters()
+    counters.cb = ctypes.sizeof(counters)
+    process = ctypes.windll.kernel32.GetCurrentProcess()
+    if not ctypes.windll.psapi.GetProcessMemoryInfo(process, ctypes.byref(counters), counters.cb):
+        return np.nan, np.nan
+    return float(counters.WorkingSetSize), float(counters.PeakWorkingSetSize)
+
+
+def process_memory():
+    """
+    Get the resident set size of this process
+
+    Returns:
+        tuple: (current RSS, peak RSS since process start) in bytes; NaN where
+            the platform does not report a value (current RSS on macOS)
+    """
+    if resource is None:
+        try:
+            return _windows_memory()
+        except (AttributeError, OSError):
+            return np.nan, np.nan
+
+    peak = float(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss)
+    # ru_maxrss is in bytes on macOS and in kilobytes elsewhere
+    peak = peak if sys.platform == 'darwin' else peak * 1024
+    try:
+        with open('/proc/self/statm', 'r') as f:
+            current = float(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except (OSError, ValueError, IndexError):
+        current = np.nan
+    return current, peak
+
+
+@lru_cache(maxsize=None)
+def _short_path(filename):
+    """Shorten a source path to its import path where possible"""
+    for entry in sorted((p for p in sys.path if p), key=len, reverse=True):
+        if filename.startswith(entry + os.sep):
+            return filename[len(entry) + 1:]
+    return filename
+
+
+@lru_cache(maxsize=65536)
+def _site(traceback):
+    """
+    Allocation site of a traceback: innermost package frame, else innermost
+    frame; None for allocations of the profiler and tracemalloc themselves
+    """
+    if traceback[-1].filename in (tracemalloc.__file__, __file__):
+        return None
+    # Frames are ordered from the oldest to the most recent call
+    for frame in reversed(traceback):
+        if frame.filename.startswith(_PACKAGE_DIR):
+            break
+    else:
+        frame = traceback[-1]
+    return f"{_short_path(frame.filename)}:{frame.lineno}"
+
+
+class MemoryProfiler:
+    """Per image and stage traced allocations, RSS and allocation sites"""
+
+    def __init__(self):
+        """Initialize profiler; tracing starts with the first mark"""
+        self.pid = os.getpid()
+        self.stages = {}
+        self.allocators = {}
+        self._started_tracing = False
+        self._sites = None
+        self._traced = 0
+        self._rss_peak = 0.0
+
+    def _site_sizes(self):
+        """Memory held per allocation site right now, excluding the tracing itself"""
+        sizes = {}
+        for statistic in tracemalloc.take_snapshot().statistics('traceback'):
+            site = _site(statistic.traceback)
+            if site is not None:
+                sizes[site] = sizes.get(site, 0) + statistic.size
+        return sizes
+
+    def _reset(self):
+        """Start measuring the next stage from the current state"""
+        self._traced = tracemalloc.get_traced_memory()[0]
+        if hasattr(tracemalloc, 'reset_peak'):
+            tracemalloc.reset_peak()
+        self._rss_peak = process_memory()[1]
+
+    def mark(self):
+        """Start a stage here (memory use since the last record is not attributed)"""
+        if not tracemalloc.is_tracing():
+            tracemalloc.start(_TRACE_FRAMES)
+            self._started_tracing = True
+        self._sites = self._site_sizes()
+        self._reset()
+
+    def record(self, image, stage):
+        """
+        Attribute the memory use since the last mark or record to a stage
+
+        Recording the same stage of an image again (e.g. once per region)
+        accumulates into one entry.
+
+        Args:
+            image (str): Image name ('' for run-wide stages)
+            stage (str): Stage name
+        """
+        if self._sites is None:
+            self.mark()
+        traced, traced_peak = tracemalloc.get_traced_memory()
+        rss, rss_peak = process_memory()
+        self._merge_stage((image, stage, self.pid), {
+            'calls': 1,
+            'allocated': traced - self._traced,
+            'traced_peak': traced_peak - self._traced if hasattr(tracemalloc, 'reset_peak') else np.nan,
+            'rss': rss,
+            'rss_peak': rss_peak,
+            'rss_increase': max(rss_peak - self._rss_peak, 0.0),
+        })
+
+        sites = self._site_sizes()
+        for site, size in sites.items():
+            grown = size - self._sites.get(site, 0)
+            if grown > 0:
+                self._merge_allocator((stage, site), {'total': grown, 'count': 1, 'largest': grown, 'image': image})
+        self._sites = sites
+        self._reset()
+
+    def _merge_stage(self, key, entry):
+        """Accumulate a stage entry (sums, peak maxima, latest RSS)"""
+        current = self.stages.get(key)
+        if current is None:
+            self.stages[key] = dict(entry)
+            return
+        current['calls'] += entry['calls']
+        current['allocated'] += entry['allocated']
+        current['traced_peak'] = np.fmax(current['traced_peak'], entry['traced_peak'])
+        current['rss'] = entry['rss']
+        current['rss_peak'] = entry['rss_peak']
+        current['rss_increase'] += entry['rss_increase']
+
+    def _merge_allocator(self, key, entry):
+        """Accumulate an allocation site entry (total growth, largest growth and its image)"""
+        current = self.allocators.get(key)
+        if current is None:
+            self.allocators[key] = dict(entry)
+            return
+        current['total'] += entry['total']
+        current['count'] += entry['count']
+        if entry['largest'] > current['largest']:
+            current['largest'], current['image'] = entry['largest'], entry['image']
+
+    def drain(self):
+        """
+        Take the collected entries (e.g. to send them from a worker process)
+
+        Returns:
+            tuple: (stages, allocators) dicts for merge
+        """
+        entries = (self.stages, self.allocators)
+        self.stages, self.allocators = {}, {}
+        return entries
+
+    def merge(self, entries):
+        """
+        Add entries drained from another profiler
+
+        Args:
+            entries (tuple): (stages, allocators) from drain
+        """
+        stages, allocators = entries
+        for key, entry in stages.items():
+            self._merge_stage(key, entry)
+        for key, entry in allocators.items():
+            self._merge_allocator(key, entry)
+
+    def stop(self):
+        """Stop tracing if this profiler started it"""
+        if self._started_tracing and tracemalloc.is_tracing():
+            tracemalloc.stop()
+        self._started_tracing = False
+        self._sites = None
+
+    def stage_table(self):
+        """
+        Recorded stages in recording order
+
+        Returns:
+            pandas.DataFrame: Image, Stage, Process, Calls, Allocated_MB,
+                Traced_Peak_MB, RSS_MB, RSS_Peak_MB and RSS_Peak_Increase_MB
+        """
+        rows = [{
+            'Image': image, 'Stage': stage, 'Process': pid, 'Calls': entry['calls'],
+            'Allocated_MB': entry['allocated'] / _MB,
+            'Traced_Peak_MB': entry['traced_peak'] / _MB,
+            'RSS_MB': entry['rss'] / _MB,
+            'RSS_Peak_MB': entry['rss_peak'] / _MB,
+            'RSS_Peak_Increase_MB': entry['rss_increase'] / _MB,
+        } for (image, stage, pid), entry in self.stages.items()]
+        return pd.DataFrame(rows, columns=[
+            'Image', 'Stage', 'Process', 'Calls', 'Allocated_MB', 'Traced_Peak_MB',
+            'RSS_MB', 'RSS_Peak_MB', 'RSS_Peak_Increase_MB'
+        ])
+
+    def allocator_table(self):
+        """
+        Allocation sites, largest total growth first
+
+        Returns:
+            pandas.DataFrame: Stage, Site, Total_MB (growth summed over all
+                recorded stages), Count, Largest_MB (largest growth in one
+                stage) and Largest_Image
+        """
+        rows = [{
+            'Stage': stage, 'Site': site, 'Total_MB': entry['total'] / _MB, 'Count': entry['count'],
+            'Largest_MB': entry['largest'] / _MB, 'Largest_Image': entry['image'],
+        } for (stage, site), entry in self.allocators.items()]
+        table = pd.DataFrame(rows, columns=['Stage', 'Site', 'Total_MB', 'Count', 'Largest_MB', 'Largest_Image'])
+        return table.sort_values('Total_MB', ascending=False, kind='stable').reset_index(drop=True)
+
+    def save(self, output_dir):
+        """
+        Write memory_profile.csv and memory_allocators.csv and print a summary
+        naming the stages with the largest peaks and the largest allocators
+
+        Args:
+            output_dir (str): Output directory
+
+        Returns:
+            tuple: (profile path, allocators path)
+        """
+        stages = self.stage_table()
+        allocators = self.allocator_table()
+        profile_path = os.path.join(output_dir, "memory_profile.csv")
+        allocators_path = os.path.join(output_dir, "memory_allocators.csv")
+        with atomic_path(profile_path) as temp_path:
+            stages.to_csv(temp_path, index=False)
+        with atomic_path(allocators_path) as temp_path:
+            allocators.to_csv(temp_path, index=False)
+
+        print("Largest traced peaks:")
+        for _, row in stages.nlargest(_SUMMARY_ENTRIES, 'Traced_Peak_MB').iterrows():
+            print(f"  {row['Image'] or '(run)'} / {row['Stage']}: {row['Traced_Peak_MB']:.1f} MB")
+        raised = stages[stages['RSS_Peak_Increase_MB'] > 0]
+        if len(raised):
+            print("Largest increases of the peak RSS:")
+            for _, row in raised.nlargest(_SUMMARY_ENTRIES, 'RSS_Peak_Increase_MB').iterrows():
+                print(f"  {row['Image'] or '(run)'} / {row['Stage']}: +{row['RSS_Peak_Increase_MB']:.1f} MB "
+                      f"(peak {row['RSS_Peak_MB']:.1f} MB)")
+        print("Largest allocators:")
+        for _, row in allocators.head(_SUMMARY_ENTRIES).iterrows():
+            print(f"  {row['Site']} ({row['Stage']}): {row['Total_MB']:.1f} MB")
+        return profile_path, allocators_path
@@ -0,0 +1,308 @@
+"""
+Tumor-centered patch dataset export
+
+Every analyzed tumor is exported as an image patch, a binary mask patch and
+its feature row, written while the frame is still in memory so training never
+has to reopen and re-crop the original images. Patches are either a fixed
+size centered on the tumor's bounding box, or the bounding box enlarged by a
+margin; parts outside the image are zero padded.
+
+Samples are appended to uncompressed tar shards (patches-000000.tar, ...)
+of a bounded size, so a training loader reads each shard sequentially. The
+members of one tumor are adjacent: <Tumor_ID>.image.npy, <Tumor_ID>.mask.npy
+and <Tumor_ID>.features.json. patch_index.csv lists the shard and byte
+offsets of every sample for random access.
+"""
+
+import io
+import os
+import json
+import tarfile
+
+import numpy as np
+import pandas as pd
+
+from paravision_analyzer.core.utils import atomic_path
+
+# Member name suffixes of one sample
+PATCH_MEMBERS = ('image.npy', 'mask.npy', 'features.json')
+
+
+def patch_window(region, patch_size=None, margin=0.25):
+    """
+    Compute the patch rectangle of a region
+
+    Args:
+        region (RegionContext): Region to export
+        patch_size (int, optional): Side length of a fixed-size square patch
+            centered on the region's bounding box (default: None, margin-padded)
+        margin (float): Margin-padded mode: fraction of the bounding box width
+            and height added on each side (default: 0.25)
+
+    Returns:
+        tuple: (x, y, w, h) in image coordinates; may extend beyond the image
+    """
+    x, y, w, h = region.bounding_rect
+    if patch_size:
+        cx, cy = x + w // 2, y + h // 2
+        return (cx - patch_size // 2, cy - patch_size // 2, patch_size, patch_size)
+    pad_x, pad_y = int(round(w * margin)), int(round(h * margin))
+    return (x - pad_x, y - pad_y, w + 2 * pad_x, h + 2 * pad_y)
+
+
+def extract_patch(gray_image, region, patch_size=None, margin=0.25):
+    """
+    Crop the image and region mask patches of a region
+
+    Args:
+        gray_image (numpy.ndarray): Full-frame grayscale image
+        region (RegionContext): Region to export
+        patch_size (int, optional): Fixed patch side length (see patch_window)
+        margin (float): Margin fraction for margin-padded patches
+
+    Returns:
+        tuple: (image patch with the dtype of gray_image, uint8 0/255 mask
+            patch, patch window (x, y, w, h))
+    """
+    window = patch_window(region, patch_size, margin)
+    wx, wy, ww, wh = window
+    height, width = gray_image.shape[:2]
+
+    image_patch = np.zeros((wh, ww), dtype=gray_image.dtype)
+    x0, y0 = max(wx, 0), max(wy, 0)
+    x1, y1 = min(wx + ww, width), min(wy + wh, height)
+    if x1 > x0 and y1 > y0:
+        image_patch[y0-wy:y1-wy, x0-wx:x1-wx] = gray_image[y0:y1, x0:x1]
+
+    # The bbox-local mask only covers the image, so paste its overlap
+    mask_patch = np.zeros((wh, ww), dtype=np.uint8)
+    bx, by, bw, bh = region.bbox
+    x0, y0 = max(wx, bx), max(wy, by)
+    x1, y1 = min(wx + ww, bx + bw), min(wy + wh, by + bh)
+    if x1 > x0 and y1 > y0:
+        mask_patch[y0-wy:y1-wy, x0-wx:x1-wx] = region.mask[y0-by:y1-by, x0-bx:x1-bx]
+
+    return image_patch, mask_patch, window
+
+
+def _json_value(value):
+    """Convert NumPy scalars of a feature row for JSON"""
+    return value.item() if isinstance(value, np.generic) else value
+
+
+class PatchShardWriter:
+    """Writer of tumor patches into size-bounded tar shards"""
+
+    def __init__(self, patch_dir, patch_size=None, margin=0.25, shard_mb=512):
+        """
+        Initialize patch shard writer
+
+        Args:
+            patch_dir (str): Directory for shards and patch_index.csv
+            patch_size (int, optional): Fixed patch side length in pixels
+                (default: None, margin-padded patches)
+            margin (float): Margin fraction for margin-padded patches (default: 0.25)
+            shard_mb (float): A new shard is started once a shard exceeds this
+                size in megabytes (default: 512)
+        """
+        self.patch_dir = patch_dir
+        self.patch_size = patch_size
+        self.margin = margin
+        self.shard_bytes = int(shard_mb * 1024 * 1024)
+        self.index = []
+        self._shard = None
+        self._shard_name = None
+        self._shard_count = 0
+
+    def add(self, tumor_id, gray_image, region, row):
+        """
+        Crop and write the patches of one tumor
+
+        Args:
+            tumor_id (str): Tumor ID of the sample
+            gray_image (numpy.ndarray): Full-frame grayscale image
+            region (RegionContext): Region of the tumor
+            row (dict): Feature row of the tumor
+        """
+        image_patch, mask_patch, window = extract_patch(gray_image, region, self.patch_size, self.margin)
+        self.write(tumor_id, image_patch, mask_patch, window, row)
+
+    def write(self, tumor_id, image_patch, mask_patch, window, row):
+        """
+        Append an already cropped sample to the current shard
+
+        Args:
+            tumor_id (str): Tumor ID of the sample
+            image_patch (numpy.ndarray): Image patch
+            mask_patch (numpy.ndarray): Mask patch
+            window (tuple): Patch rectangle (x, y, w, h) in image coordinates
+            row (dict): Feature row of the tumor
+        """
+        if self._shard is None or self._shard.offset >= self.shard_bytes:
+            self._open_next_shard()
+
+        entry = {
+            'Tumor_ID': tumor_id,
+            'Image': row.get('Image', ''),
+            'Shard': self._shard_name,
+            'Patch_X': window[0],
+            'Patch_Y': window[1],
+            'Patch_Width': window[2],
+            'Patch_Height': window[3],
+        }
+        features = json.dumps({key: _json_value(value) for key, value in row.items()}).encode('utf-8')
+        for suffix, data in zip(PATCH_MEMBERS, (_npy_bytes(image_patch), _npy_bytes(mask_patch), features)):
+            offset = self._add_member(f"{tumor_id}.{suffix}", data)
+            name = suffix.split('.')[0].capitalize()
+            entry[f'{name}_Offset'] = offset
+            entry[f'{name}_Bytes'] = len(data)
+        self.index.append(entry)
+
+    def _open_next_shard(self):
+        """Close the current shard and start the next one"""
+        if self._shard is not None:
+            self._shard.close()
+        os.makedirs(self.patch_dir, exist_ok=True)
+        self._shard_name = f"patches-{self._shard_count:06d}.tar"
+        self._shard_count += 1
+        self._shard = tarfile.open(os.path.join(self.patch_dir, self._shard_name), 'w', format=tarfile.GNU_FORMAT)
+
+    def _add_member(self, name, data):
+        """Append one member and return the byte offset of its data"""
+        info = tarfile.TarInfo(name)
+        info.size = len(data)
+        self._shard.addfile(info, io.BytesIO(data))
+        # Data ends at the current offset, padded to whole tar blocks
+        return self._shard.offset - -(-len(data) // tarfile.BLOCKSIZE) * tarfile.BLOCKSIZE
+
+    def checkpoint(self):
+        """
+        Flush the current shard to disk and describe the writer's state
+
+        Returns:
+            dict: State for resume: number of index entries, shards started and
+                the byte offset reached in the current shard
+        """
+        if self._shard is not None:
+            self._shard.fileobj.flush()
+            os.fsync(self._shard.fileobj.fileno())
+        return {
+            'entries': len(self.index),
+            'shard_count': self._shard_count,
+            'offset': self._shard.offset if self._shard is not None else 0,
+        }
+
+    def resume(self, index, state):
+        """
+        Continue the shards of an interrupted run from a checkpoint
+
+        The current shard is cut back to the checkpoint's offset (dropping
+        samples written after it) and reopened for appending; later shards are
+        deleted, so the shards end up as if the run had not been interrupted.
+
+        Args:
+            index (list): Index entries written up to the checkpoint
+            state (dict): State returned by checkpoint
+        """
+        self.index = list(index[:state['entries']])
+        self._shard_count = state['shard_count']
+        stale = self._shard_count
+        while os.path.exists(os.path.join(self.patch_dir, f"patches-{stale:06d}.tar")):
+            os.remove(os.path.join(self.patch_dir, f"patches-{stale:06d}.tar"))
+            stale += 1
+        if not self._shard_count:
+            return
+
+        self._shard_name = f"patches-{self._shard_count - 1:06d}.tar"
+        path = os.path.join(self.patch_dir, self._shard_name)
+        with open(path, 'r+b') as f:
+            f.truncate(state['offset'])
+            f.seek(state['offset'])
+            # End-of-archive blocks let tarfile find where to append
+            f.write(bytes(2 * tarfile.BLOCKSIZE))
+        self._shard = tarfile.open(path, 'a', format=tarfile.GNU_FORMAT)
+
+    def close(self):
+        """
+        Finish the last shard and write patch_index.csv
+
+        Returns:
+            str or None: Path of the index, None if no patches were written
+        """
+        if self._shard is not None:
+            self._shard.close()
+            self._shard = None
+        if not self.index:
+            return None
+        index_path = os.path.join(self.patch_dir, "patch_index.csv")
+        with atomic_path(index_path) as temp_path:
+            pd.DataFrame(self.index).to_csv(temp_path, index=False)
+        return index_path
+
+
+class PatchCollector:
+    """Crops patches like PatchShardWriter but keeps them for another process to write"""
+
+    def __init__(self, patch_size=None, margin=0.25):
+        """
+        Initialize patch collector
+
+        Args:
+            patch_size (int, optional): Fixed patch side length in pixels
+            margin (float): Margin fraction for margin-padded patches
+        """
+        self.patch_size = patch_size
+        self.margin = margin
+        self.samples = []
+
+    def add(self, tumor_id, gray_image, region, row):
+        """Crop the patches of one tumor and keep them (see PatchShardWriter.add)"""
+        image_patch, mask_patch, window = extract_patch(gray_image, region, self.patch_size, self.margin)
+        self.samples.append((tumor_id, image_patch, mask_patch, window, row))
+
+    def drain(self):
+        """
+        Take the collected samples
+
+        Returns:
+            list: (tumor_id, image patch, mask patch, window, row) tuples, the
+                arguments of PatchShardWriter.write
+        """
+        samples, self.samples = self.samples, []
+        return samples
+
+
+def _npy_bytes(array):
+    """Serialize an array in .npy format"""
+    buffer = io.BytesIO()
+    np.save(buffer, array)
+    return buffer.getvalue()
+
+
+def iter_patch_shard(shard_path):
+    """
+    Stream the samples of a shard sequentially
+
+    Args:
+        shard_path (str): Path to a patches-*.tar shard
+
+    Yields:
+        tuple: (tumor ID, image patch, mask patch, feature dict)
+    """
+    sample = {}
+    with tarfile.open(shard_path, 'r|') as shard:
+        for member in shard:
+            data = shard.extractfile(member).read()
+            for suffix in PATCH_MEMBERS:
+                if member.name.endswith('.' + suffix):
+                    tumor_id = member.name[:-len(suffix) - 1]
+                    break
+            else:
+                continue
+            if suffix == 'features.json':
+                sample[suffix] = json.loads(data.decode('utf-8'))
+            else:
+                sample[suffix] = np.load(io.BytesIO(data))
+            if len(sample) == len(PATCH_MEMBERS):
+                yield tumor_id, sample['image.npy'], sample['mask.npy'], sample['features.json']
+                sample = {}
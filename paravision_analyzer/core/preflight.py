@@ -0,0 +1,153 @@
+"""
+Preflight checking of annotation datasets
+
+Validates every annotation/image pair before a long analysis run. Only the
+JSON files and the image headers are read (no pixel decoding), and pairs are
+checked in parallel worker processes.
+"""
+
+import os
+import json
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+from glob import glob
+
+import pandas as pd
+from PIL import Image
+
+from paravision_analyzer.core.readers import image_size, is_high_depth_file
+from paravision_analyzer.core.utils import find_annotation_issues, index_image_files
+
+
+def check_annotation_pair(json_file, image_file):
+    """
+    Check one annotation file and its image
+
+    Args:
+        json_file (str): Path to LabelMe annotation JSON
+        image_file (str or None): Path to the matching image, None if missing
+
+    Returns:
+        dict: File record with 'base_name', 'json_file', 'image_file',
+            'image_size' and 'issues'
+    """
+    base_name = os.path.basename(json_file).replace(".json", "")
+    record = {
+        'base_name': base_name,
+        'json_file': json_file,
+        'image_file': image_file,
+        'image_size': None,
+        'issues': []
+    }
+
+    def add(severity, code, message):
+        record['issues'].append({
+            'shape_index': None,
+            'severity': severity,
+            'code': code,
+            'message': message
+        })
+
+    try:
+        with open(json_file, 'r', encoding='utf-8') as f:
+            annotation_data = json.load(f)
+    except Exception as e:
+        add('error', 'invalid_json', f"Cannot load JSON: {e}")
+        return record
+
+    if image_file is None:
+        add('error', 'missing_image', "No image with a supported extension found")
+    else:
+        try:
+            if is_high_depth_file(image_file):
+                record['image_size'] = image_size(image_file)
+            else:
+                # Image.open only parses the header; pixels are decoded lazily
+                with Image.open(image_file) as image:
+                    record['image_size'] = image.size
+        except Exception as e:
+            add('error', 'unreadable_image', f"Cannot read image header: {e}")
+
+    record['issues'].extend(find_annotation_issues(annotation_data, record['image_size']))
+    return record
+
+
+def _check_pair_star(args):
+    """Unpack arguments for executor.map"""
+    return check_annotation_pair(*args)
+
+
+def check_dataset(image_dir, json_dir, max_workers=None):
+    """
+    Check all annotation/image pairs of a dataset in parallel
+
+    Args:
+        image_dir (str): Directory containing original images
+        json_dir (str): Directory containing labelme annotation JSON files
+        max_workers (int, optional): Number of worker processes (default: CPU count)
+
+    Returns:
+        dict: Report with a 'summary' dict and a 'files' list holding the
+            records of every file that has at least one issue
+    """
+    json_files = sorted(glob(os.path.join(json_dir, "*.json")))
+    image_index = index_image_files(image_dir) if os.path.isdir(image_dir) else {}
+    tasks = [
+        (json_file, image_index.get(os.path.basename(json_file).replace(".json", "")))
+        for json_file in json_files
+    ]
+
+    if max_workers == 1 or len(tasks) < 2:
+        records = [_check_pair_star(task) for task in tasks]
+    else:
+        chunksize = max(1, min(256, len(tasks) // ((max_workers or os.cpu_count() or 1) * 4)))
+        with ProcessPoolExecutor(max_workers=max_workers) as executor:
+            records = list(executor.map(_check_pair_star, tasks, chunksize=chunksize))
+
+    issue_counts = Counter()
+    files_with_errors = files_with_warnings = 0
+    for record in records:
+        severities = {issue['severity'] for issue in record['issues']}
+        files_with_errors += 'error' in severities
+        files_with_warnings += 'warning' in severities
+        issue_counts.update(issue['code'] for issue in record['issues'])
+
+    return {
+        'summary': {
+            'image_dir': image_dir,
+            'json_dir': json_dir,
+            'files_checked': len(records),
+            'files_with_errors': files_with_errors,
+            'files_with_warnings': files_with_warnings,
+            'issue_counts': dict(sorted(issue_counts.items()))
+        },
+        'files': [record for record in records if record['issues']]
+    }
+
+
+def save_report(report, output_dir):
+    """
+    Write a preflight report as JSON plus a flat per-issue CSV
+
+    Args:
+        report (dict): Report returned by check_dataset
+        output_dir (str): Directory for the report files
+
+    Returns:
+        str: Path of the JSON report
+    """
+    os.makedirs(output_dir, exist_ok=True)
+    json_path = os.path.join(output_dir, "preflight_report.json")
+    with open(json_path, 'w', encoding='utf-8') as f:
+        json.dump(report, f, indent=2, ensure_ascii=False)
+
+    rows = [
+        dict(base_name=record['base_name'], json_file=record['json_file'], **issue)
+        for record in report['files']
+        for issue in record['issues']
+    ]
+    columns = ['base_name', 'json_file', 'shape_index', 'severity', 'code', 'message']
+    pd.DataFrame(rows, columns=columns).to_csv(
+        os.path.join(output_dir, "preflight_issues.csv"), index=False
+    )
+    return json_path
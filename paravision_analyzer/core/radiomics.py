@@ -0,0 +1,225 @@
+"""
+Extended radiomics texture features
+
+Gray-level run-length (GLRLM), size-zone (GLSZM) and local binary pattern
+(LBP) features of a region. GLRLM and GLSZM work on the same quantized,
+cropped ROI as the GLCM features, passed in as a label image (quantized gray
+level inside the region, -1 outside), so the image is quantized once per
+region for the whole texture bank.
+
+All statistics are computed from vectors of runs and zones without building
+the run-length or size-zone matrices: runs along a direction are found by
+laying the image lines out end to end (separated by -1) and splitting the
+sequence where the value changes; zones are the 8-connected components of
+each gray level.
+"""
+
+import cv2
+import numpy as np
+
+GLRLM_FEATURES = [
+    'GLRLM_Short_Run_Emphasis', 'GLRLM_Long_Run_Emphasis', 'GLRLM_Gray_Level_Nonuniformity',
+    'GLRLM_Run_Length_Nonuniformity', 'GLRLM_Run_Percentage',
+    'GLRLM_Low_Gray_Level_Run_Emphasis', 'GLRLM_High_Gray_Level_Run_Emphasis'
+]
+
+GLSZM_FEATURES = [
+    'GLSZM_Small_Zone_Emphasis', 'GLSZM_Large_Zone_Emphasis', 'GLSZM_Gray_Level_Nonuniformity',
+    'GLSZM_Zone_Size_Nonuniformity', 'GLSZM_Zone_Percentage',
+    'GLSZM_Low_Gray_Level_Zone_Emphasis', 'GLSZM_High_Gray_Level_Zone_Emphasis'
+]
+
+# Rotation-invariant uniform patterns of 8 neighbours (number of set bits)
+# plus one bin for all non-uniform patterns
+LBP_FEATURES = [f'LBP_Uniform_{ones}' for ones in range(9)] + ['LBP_Nonuniform', 'LBP_Entropy']
+
+# Run directions: 0, 45, 90 and 135 degrees
+_RUN_DIRECTIONS = ('horizontal', 'diagonal', 'vertical', 'anti_diagonal')
+
+# Neighbours of the LBP in circular order, as (row, column) offsets
+_LBP_NEIGHBOURS = [(-1, -1), (-1, 0), (-1, 1), (0, 1), (1, 1), (1, 0), (1, -1), (0, -1)]
+
+
+def _lines(labels, direction):
+    """
+    Rows of a 2D array holding the image lines along a direction, each
+    followed by at least one -1 so runs never continue into the next line
+    """
+    height, width = labels.shape
+    if direction == 'vertical':
+        labels = labels.T
+        height, width = width, height
+    if direction in ('horizontal', 'vertical'):
+        lines = np.full((height, width + 1), -1, dtype=labels.dtype)
+        lines[:, :width] = labels
+        return lines
+    if direction == 'diagonal':
+        # Diagonals of the image are anti-diagonals of its upside-down copy
+        labels = labels[::-1]
+    # Shear by reading a row-padded copy with a one element shorter row
+    # stride: row r moves r columns right, so column k holds the pixels with
+    # r + c = k; an extra -1 row ends every column
+    padded = np.full((height + 1, width + height), -1, dtype=labels.dtype)
+    padded[:height, :width] = labels
+    sheared = padded.ravel()[:(height + 1) * (width + height - 1)].reshape(height + 1, width + height - 1)
+    return sheared.T
+
+
+def run_lengths(labels, direction):
+    """
+    Find the runs of equal gray level along one direction
+
+    Args:
+        labels (numpy.ndarray): Quantized gray levels, -1 outside the region
+        direction (str): One of 'horizontal', 'diagonal', 'vertical', 'anti_diagonal'
+
+    Returns:
+        tuple: (gray level of each run, length of each run)
+    """
+    sequence = np.ascontiguousarray(_lines(labels, direction)).ravel()
+    starts = np.concatenate(([0], np.flatnonzero(sequence[1:] != sequence[:-1]) + 1))
+    lengths = np.diff(np.append(starts, len(sequence)))
+    levels = sequence[starts]
+    inside = levels >= 0
+    return levels[inside], lengths[inside]
+
+
+def _emphasis_features(names, levels, sizes, pixels):
+    """
+    Statistics shared by runs and zones, in the order of GLRLM_FEATURES and
+    GLSZM_FEATURES: small/large size emphasis, gray level and size
+    nonuniformity, percentage, low/high gray level emphasis (gray levels
+    counted from 1)
+    """
+    if not len(levels):
+        return {name: np.nan for name in names}
+    # Gray level x size count matrix (the GLRLM or GLSZM itself); a column per
+    # size up to the largest one, or only per occurring size when sizes are
+    # few and large (big zones)
+    sizes = sizes.astype(np.int64)
+    if sizes.max() < len(sizes):
+        size = np.arange(sizes.max() + 1)
+        size_index = sizes
+    else:
+        size, size_index = np.unique(sizes, return_inverse=True)
+    levels = levels.astype(np.int64)
+    columns = len(size)
+    matrix = np.bincount(levels * columns + size_index.ravel(), minlength=(int(levels.max()) + 1) * columns)
+    matrix = matrix.reshape(-1, columns).astype(np.float64)
+
+    count = matrix.sum()
+    per_level = matrix.sum(axis=1)
+    per_size = matrix.sum(axis=0)
+    size = size.astype(np.float64)
+    gray = np.arange(1, len(per_level) + 1, dtype=np.float64)
+    occurring = per_size > 0
+    values = [
+        np.sum(per_size[occurring] / size[occurring] ** 2) / count,
+        np.sum(per_size * size ** 2) / count,
+        np.sum(per_level ** 2) / count,
+        np.sum(per_size ** 2) / count,
+        count / pixels,
+        np.sum(per_level / gray ** 2) / count,
+        np.sum(per_level * gray ** 2) / count,
+    ]
+    return dict(zip(names, values))
+
+
+def run_length_features(labels):
+    """
+    Calculate GLRLM features averaged over the four directions
+
+    Args:
+        labels (numpy.ndarray): Quantized gray levels, -1 outside the region
+
+    Returns:
+        dict: GLRLM_FEATURES (NaN if the region has no pixels)
+    """
+    pixels = np.count_nonzero(labels >= 0)
+    if not pixels:
+        return {name: np.nan for name in GLRLM_FEATURES}
+    per_direction = [
+        _emphasis_features(GLRLM_FEATURES, *run_lengths(labels, direction), pixels)
+        for direction in _RUN_DIRECTIONS
+    ]
+    return {name: np.mean([features[name] for features in per_direction]) for name in GLRLM_FEATURES}
+
+
+def size_zones(labels):
+    """
+    Find the zones (8-connected components) of equal gray level
+
+    Args:
+        labels (numpy.ndarray): Quantized gray levels, -1 outside the region
+
+    Returns:
+        tuple: (gray level of each zone, size of each zone in pixels)
+    """
+    zone_levels, zone_sizes = [], []
+    for level in np.unique(labels[labels >= 0]):
+        count, _, stats, _ = cv2.connectedComponentsWithStats(
+            (labels == level).astype(np.uint8), connectivity=8
+        )
+        sizes = stats[1:count, cv2.CC_STAT_AREA]
+        zone_levels.append(np.full(len(sizes), level, dtype=np.int64))
+        zone_sizes.append(sizes)
+    if not zone_levels:
+        return np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.int64)
+    return np.concatenate(zone_levels), np.concatenate(zone_sizes)
+
+
+def size_zone_features(labels):
+    """
+    Calculate GLSZM features
+
+    Args:
+        labels (numpy.ndarray): Quantized gray levels, -1 outside the region
+
+    Returns:
+        dict: GLSZM_FEATURES (NaN if the region has no pixels)
+    """
+    pixels = np.count_nonzero(labels >= 0)
+    if not pixels:
+        return {name: np.nan for name in GLSZM_FEATURES}
+    levels, sizes = size_zones(labels)
+    return _emphasis_features(GLSZM_FEATURES, levels, sizes, pixels)
+
+
+def lbp_features(gray_crop, mask):
+    """
+    Calculate the rotation-invariant uniform LBP histogram of a region
+
+    Each pixel gets a bit per neighbour at radius 1 that is at least as bright
+    as the pixel; patterns with at most two 0/1 transitions around the circle
+    are binned by their number of set bits, all others in LBP_Nonuniform.
+
+    Args:
+        gray_crop (numpy.ndarray): Unquantized crop with a one-pixel border
+            around the mask where the image has one (missing neighbours at
+            the image border repeat the edge pixel)
+        mask (numpy.ndarray): Region mask of the crop (non-zero inside)
+
+    Returns:
+        dict: LBP_FEATURES, bin fractions and the histogram entropy in bits
+            (NaN if the region has no pixels)
+    """
+    inside = mask > 0
+    if not np.any(inside):
+        return {name: np.nan for name in LBP_FEATURES}
+
+    padded = np.pad(gray_crop, 1, mode='edge')
+    height, width = gray_crop.shape
+    center = gray_crop[inside]
+    bits = np.stack([
+        padded[1+dr:1+dr+height, 1+dc:1+dc+width][inside] >= center
+        for dr, dc in _LBP_NEIGHBOURS
+    ])
+    ones = bits.sum(axis=0)
+    transitions = np.sum(bits != np.roll(bits, 1, axis=0), axis=0)
+    codes = np.where(transitions <= 2, ones, 9)
+
+    fractions = np.bincount(codes, minlength=10) / len(codes)
+    nonzero = fractions[fractions > 0]
+    features = dict(zip(LBP_FEATURES[:-1], fractions))
+    features['LBP_Entropy'] = -np.sum(nonzero * np.log2(nonzero))
+    return features
@@ -0,0 +1,379 @@
+"""
+Readers for high bit depth TIFF and DICOM images
+
+Uncompressed grayscale TIFF (contiguous strips) and uncompressed DICOM pixel
+data are memory-mapped, so only the pages touched by a region crop are read
+from disk and large exports never have to be fully resident. Signed DICOM
+data stays mapped read-only; its values are shifted into the unsigned range
+slice by slice as they are read (see OffsetFrame). Other TIFF
+layouts fall back to a full OpenCV decode with bit depth preserved.
+Compressed DICOM transfer syntaxes are not supported.
+"""
+
+import os
+import struct
+
+import cv2
+import numpy as np
+
+from paravision_analyzer.core.utils import read_image
+
+# Extensions handled by this module instead of the 8-bit decode path
+HIGH_DEPTH_EXTENSIONS = ['.tif', '.tiff', '.dcm']
+
+# TIFF field types -> struct format character
+_TIFF_TYPES = {1: 'B', 2: 's', 3: 'H', 4: 'I', 5: 'II', 6: 'b', 8: 'h', 9: 'i', 16: 'Q'}
+
+# DICOM transfer syntaxes with uncompressed pixel data: UID -> (explicit VR, byte order)
+_DICOM_TRANSFER_SYNTAXES = {
+    '1.2.840.10008.1.2': (False, '<'),
+    '1.2.840.10008.1.2.1': (True, '<'),
+    '1.2.840.10008.1.2.2': (True, '>'),
+}
+
+# Explicit VRs whose value length is stored in 4 bytes after 2 reserved bytes
+_DICOM_LONG_VRS = {b'OB', b'OD', b'OF', b'OL', b'OV', b'OW', b'SQ', b'SV', b'UC', b'UN', b'UR', b'UT', b'UV'}
+
+_DICOM_UNDEFINED_LENGTH = 0xFFFFFFFF
+
+
+class OffsetFrame:
+    """
+    Read-only signed frame presented as unsigned
+
+    Wraps a memory-mapped signed array and adds an offset to every slice
+    taken from it, so region crops are shifted into the unsigned range the
+    features use without touching the rest of the frame. Converting the
+    whole frame (np.asarray) shifts a full copy.
+    """
+
+    def __init__(self, raw, offset):
+        """
+        Initialize offset frame
+
+        Args:
+            raw (numpy.ndarray): Signed (memory-mapped) array
+            offset (int): Offset added to every value, 2**(bits stored - 1)
+        """
+        self._raw = raw
+        # Adding the offset modulo 2**bits to the two's complement bits gives
+        # value + offset; the unsigned type of the same width holds the result
+        self._unsigned = np.dtype(raw.dtype.str.replace('i', 'u'))
+        self.dtype = np.dtype(self._unsigned.name)
+        self._offset = self._unsigned.type(offset)
+
+    @property
+    def shape(self):
+        """tuple: Shape of the frame"""
+        return self._raw.shape
+
+    @property
+    def ndim(self):
+        """int: Number of dimensions"""
+        return self._raw.ndim
+
+    @property
+    def size(self):
+        """int: Number of pixels"""
+        return self._raw.size
+
+    @property
+    def nbytes(self):
+        """int: Size of the shifted frame in bytes"""
+        return self._raw.nbytes
+
+    def __len__(self):
+        return len(self._raw)
+
+    def __getitem__(self, key):
+        part = np.asarray(self._raw[key]).view(self._unsigned)
+        return (part + self._offset).astype(self.dtype, copy=False)
+
+    def __array__(self, dtype=None, copy=None):
+        shifted = self[...]
+        return shifted if dtype is None else shifted.astype(dtype, copy=False)
+
+
+def is_high_depth_file(path):
+    """
+    Check whether a file is read through this module
+
+    Args:
+        path (str): Image path
+
+    Returns:
+        bool: True for TIFF and DICOM files
+    """
+    return os.path.splitext(path)[1].lower() in HIGH_DEPTH_EXTENSIONS
+
+
+def read_grayscale(path):
+    """
+    Open a TIFF or DICOM image as a grayscale array
+
+    Args:
+        path (str): Image path
+
+    Returns:
+        tuple: (2-D uint8/uint16 array, memory-mapped when possible, an
+            OffsetFrame for signed DICOM; bit depth)
+
+    Raises:
+        ValueError: If the file cannot be read
+    """
+    if os.path.splitext(path)[1].lower() == '.dcm':
+        return _read_dicom(path)
+    return _read_tiff(path)
+
+
+def load_grayscale(path):
+    """
+    Load any supported image as grayscale
+
+    Args:
+        path (str): Image path
+
+    Returns:
+        tuple: (grayscale image or None if unreadable, bit depth)
+    """
+    if is_high_depth_file(path):
+        try:
+            return read_grayscale(path)
+        except (ValueError, struct.error) as e:
+            print(f"Cannot read image {path}: {e}")
+            return None, 8
+    image = read_image(path)
+    if image is None:
+        return None, 8
+    return cv2.cvtColor(image, cv2.COLOR_BGR2GRAY), 8
+
+
+def image_size(path):
+    """
+    Read the (width, height) of a TIFF or DICOM image from its header
+
+    Args:
+        path (str): Image path
+
+    Returns:
+        tuple: (width, height)
+    """
+    if os.path.splitext(path)[1].lower() == '.dcm':
+        info = _parse_dicom(path)
+        return info['columns'], info['rows']
+    info = _parse_tiff(path)
+    return info['width'], info['height']
+
+
+def to_display_bgr(gray_image, bit_depth):
+    """
+    Convert a grayscale image of any bit depth to 8-bit BGR for drawing
+
+    Args:
+        gray_image (numpy.ndarray): Grayscale image
+        bit_depth (int): Significant bits per pixel
+
+    Returns:
+        numpy.ndarray: 8-bit BGR image
+    """
+    if bit_depth > 8:
+        gray_image = (np.asarray(gray_image) >> (bit_depth - 8)).astype(np.uint8)
+    return cv2.cvtColor(np.ascontiguousarray(gray_image), cv2.COLOR_GRAY2BGR)
+
+
+def _parse_tiff(path):
+    """Parse the first IFD of a classic (non-Big) TIFF file"""
+    with open(path, 'rb') as f:
+        header = f.read(8)
+        if header[:2] == b'II':
+            order = '<'
+        elif header[:2] == b'MM':
+            order = '>'
+        else:
+            raise ValueError("Not a TIFF file")
+        magic, ifd_offset = struct.unpack(order + 'HI', header[2:8])
+        if magic != 42:
+            raise ValueError("Unsupported TIFF variant")
+
+        f.seek(ifd_offset)
+        (count,) = struct.unpack(order + 'H', f.read(2))
+        entries = f.read(12 * count)
+        tags = {}
+        for i in range(count):
+            tag, field_type, n, value = struct.unpack(order + 'HHI4s', entries[12*i:12*i+12])
+            if field_type not in _TIFF_TYPES or field_type == 2:
+                continue
+            fmt = _TIFF_TYPES[field_type] * n
+            size = struct.calcsize(order + fmt)
+            if size <= 4:
+                data = value[:size]
+            else:
+                (offset,) = struct.unpack(order + 'I', value)
+                position = f.tell()
+                f.seek(offset)
+                data = f.read(size)
+                f.seek(position)
+            tags[tag] = struct.unpack(order + fmt, data)
+
+    def first(tag, default=None):
+        return tags[tag][0] if tag in tags else default
+
+    return {
+        'order': order,
+        'width': first(256),
+        'height': first(257),
+        'bits': first(258, 1),
+        'compression': first(259, 1),
+        'strip_offsets': tags.get(273, ()),
+        'samples': first(277, 1),
+        'strip_byte_counts': tags.get(279, ()),
+        'sample_format': first(339, 1),
+        'tiled': 322 in tags,
+    }
+
+
+def _read_tiff(path):
+    """Memory-map an uncompressed grayscale TIFF, or decode it with OpenCV"""
+    try:
+        info = _parse_tiff(path)
+    except (ValueError, struct.error) as e:
+        info = None
+        print(f"Cannot parse TIFF header of {path}: {e}")
+
+    if (info is not None and info['compression'] == 1 and info['samples'] == 1 and
+            info['bits'] in (8, 16) and info['sample_format'] == 1 and
+            not info['tiled'] and info['strip_offsets']):
+        offsets, counts = info['strip_offsets'], info['strip_byte_counts']
+        contiguous = all(offsets[i] + counts[i] == offsets[i+1] for i in range(len(offsets) - 1))
+        dtype = np.dtype(f"{info['order']}u{info['bits'] // 8}")
+        if contiguous and sum(counts) >= info['width'] * info['height'] * dtype.itemsize:
+            gray_image = np.memmap(path, dtype=dtype, mode='r', offset=offsets[0],
+                                   shape=(info['height'], info['width']))
+            return gray_image, info['bits']
+
+    # Compressed, tiled or color TIFF: full decode with bit depth preserved
+    image = read_image(path, cv2.IMREAD_UNCHANGED)
+    if image is None:
+        raise ValueError(f"Cannot read TIFF image: {path}")
+    if image.ndim == 3:
+        image = cv2.cvtColor(image, cv2.COLOR_BGRA2GRAY if image.shape[2] == 4 else cv2.COLOR_BGR2GRAY)
+    return image, image.dtype.itemsize * 8
+
+
+def _parse_dicom(path):
+    """Parse the DICOM header up to the pixel data element"""
+    tags = {}
+    with open(path, 'rb') as f:
+        preamble = f.read(132)
+        if preamble[128:132] != b'DICM':
+            raise ValueError("Not a DICOM file (missing DICM prefix)")
+
+        explicit, order = True, '<'
+        while True:
+            # File meta information (group 0002) is always explicit VR little endian
+            position = f.tell()
+            raw = f.read(4)
+            if len(raw) < 4:
+                raise ValueError("No pixel data found")
+            group, element = struct.unpack('<HH', raw)
+            if group != 0x0002:
+                f.seek(position)
+                break
+            _, value = _read_dicom_element(f, '<', True, group, element)
+            if element == 0x0010:
+                uid = value.rstrip(b'\x00 ').decode('ascii')
+                if uid not in _DICOM_TRANSFER_SYNTAXES:
+                    raise ValueError(f"Compressed DICOM transfer syntax not supported: {uid}")
+                explicit, order = _DICOM_TRANSFER_SYNTAXES[uid]
+
+        while True:
+            raw = f.read(4)
+            if len(raw) < 4:
+                raise ValueError("No pixel data found")
+            group, element = struct.unpack(order + 'HH', raw)
+            if (group, element) == (0x7FE0, 0x0010):
+                length = _read_dicom_length(f, order, explicit)
+                if length == _DICOM_UNDEFINED_LENGTH:
+                    raise ValueError("Encapsulated (compressed) DICOM pixel data not supported")
+                tags['pixel_offset'] = f.tell()
+                tags['pixel_length'] = length
+                break
+            length, value = _read_dicom_element(f, order, explicit, group, element)
+            if group == 0x0028:
+                tags[element] = value
+
+    def number(element, fmt='H', default=None):
+        if element not in tags:
+            return default
+        if fmt == 'IS':
+            return int(tags[element].rstrip(b'\x00 ').decode('ascii') or default)
+        return struct.unpack(order + fmt, tags[element][:struct.calcsize(fmt)])[0]
+
+    return {
+        'order': order,
+        'rows': number(0x0010),
+        'columns': number(0x0011),
+        'samples': number(0x0002, default=1),
+        'bits_allocated': number(0x0100, default=16),
+        'bits_stored': number(0x0101, default=number(0x0100, default=16)),
+        'signed': number(0x0103, default=0) == 1,
+        'frames': number(0x0008, 'IS', default=1),
+        'pixel_offset': tags['pixel_offset'],
+        'pixel_length': tags['pixel_length'],
+    }
+
+
+def _read_dicom_length(f, order, explicit):
+    """Read the value length of the current element (VR included when explicit)"""
+    if explicit:
+        vr = f.read(2)
+        if vr in _DICOM_LONG_VRS:
+            f.read(2)
+            return struct.unpack(order + 'I', f.read(4))[0]
+        return struct.unpack(order + 'H', f.read(2))[0]
+    return struct.unpack(order + 'I', f.read(4))[0]
+
+
+def _read_dicom_element(f, order, explicit, group, element):
+    """Read (or skip, for sequences) the value of the current element"""
+    if group == 0xFFFE:
+        # Item tags have no VR
+        length = struct.unpack(order + 'I', f.read(4))[0]
+    else:
+        length = _read_dicom_length(f, order, explicit)
+    if length == _DICOM_UNDEFINED_LENGTH:
+        _skip_dicom_sequence(f, order, explicit)
+        return length, b''
+    return length, f.read(length)
+
+
+def _skip_dicom_sequence(f, order, explicit):
+    """Skip a sequence or item of undefined length up to its delimiter"""
+    while True:
+        raw = f.read(4)
+        if len(raw) < 4:
+            raise ValueError("Unterminated DICOM sequence")
+        group, element = struct.unpack(order + 'HH', raw)
+        if group == 0xFFFE and element in (0xE0DD, 0xE00D):
+            f.read(4)
+            return
+        _read_dicom_element(f, order, explicit, group, element)
+
+
+def _read_dicom(path):
+    """Memory-map the first frame of uncompressed DICOM pixel data"""
+    info = _parse_dicom(path)
+    if info['samples'] != 1:
+        raise ValueError("Only single-sample (grayscale) DICOM images are supported")
+    if info['bits_allocated'] not in (8, 16):
+        raise ValueError(f"Unsupported DICOM BitsAllocated: {info['bits_allocated']}")
+
+    kind = 'i' if info['signed'] else 'u'
+    dtype = np.dtype(f"{info['order']}{kind}{info['bits_allocated'] // 8}")
+    gray_image = np.memmap(path, dtype=dtype, mode='r', offset=info['pixel_offset'],
+                           shape=(info['rows'], info['columns']))
+    if info['signed']:
+        # Shift signed values into the unsigned range used by the features,
+        # per crop as they are read
+        gray_image = OffsetFrame(gray_image, 1 << (info['bits_stored'] - 1))
+    return gray_image, info['bits_stored']
@@ -0,0 +1,379 @@
+"""
+Per-region geometry context
+
+A RegionContext wraps one annotated region and lazily computes (and memoizes)
+the geometry every feature extractor and the visualization code need: the
+bounding box, the bbox-local mask, area, perimeter, convex hull, moments and
+the fitted ellipse. Each value is computed at most once per region.
+
+Polygon and rectangle shapes are vertex regions. Circle shapes are rasterized
+and LabelMe mask shapes decoded straight into a bbox-local mask; their
+vertices are traced from that mask.
+"""
+
+import base64
+import binascii
+
+import cv2
+import numpy as np
+
+_PNG_SIGNATURE = b'\x89PNG\r\n\x1a\n'
+
+
+class RegionContext:
+    """Lazily computed, memoized geometry of a single annotated region"""
+
+    def __init__(self, points, image_shape):
+        """
+        Initialize region context
+
+        Args:
+            points (array-like): Polygon vertices as (x, y) pairs in image coordinates
+            image_shape (tuple): Shape of the image the region belongs to (height, width[, channels])
+        """
+        self.points = np.asarray(points, dtype=np.int32).reshape(-1, 2)
+        self.image_shape = tuple(image_shape[:2])
+        self._cache = {}
+
+    @classmethod
+    def from_mask(cls, mask, origin, image_shape):
+        """
+        Create a region from a mask instead of a vertex list
+
+        The mask is clipped to the image and becomes the region's bbox-local
+        mask. The vertices are the outer boundary pixels of its largest
+        connected component, so contour, hull, moments and ellipse come from
+        the rasterized shape, while area and pixel values use the whole mask.
+
+        Args:
+            mask (numpy.ndarray): 2D mask (non-zero inside)
+            origin (tuple): Image coordinates (x, y) of the mask's top-left pixel
+            image_shape (tuple): Shape of the image the region belongs to (height, width[, channels])
+
+        Returns:
+            RegionContext: Region of the mask
+        """
+        height, width = image_shape[:2]
+        x, y = int(origin[0]), int(origin[1])
+        x0, y0 = min(max(x, 0), width), min(max(y, 0), height)
+        x1, y1 = max(min(x + mask.shape[1], width), x0), max(min(y + mask.shape[0], height), y0)
+        local = np.zeros((y1 - y0, x1 - x0), dtype=np.uint8)
+        local[mask[y0-y:y1-y, x0-x:x1-x] > 0] = 255
+
+        region = cls(_trace_outline(local) + (x0, y0), image_shape)
+        region._cache['bbox'] = (x0, y0, x1 - x0, y1 - y0)
+        region.use_mask(local)
+        return region
+
+    def use_mask(self, mask):
+        """
+        Provide a precomputed bbox-local mask instead of rasterizing the polygon
+
+        Args:
+            mask (numpy.ndarray): Binary (0/255) uint8 mask of bbox size
+        """
+        self._cache['mask'] = mask
+
+    def memo(self, key, factory):
+        """
+        Return a memoized value, computing it with factory(self) on first access
+
+        Feature groups can use this to share intermediate results (e.g. a
+        quantized crop) between extractors that process the same region.
+
+        Args:
+            key (hashable): Cache key
+            factory (callable): Function taking this context and returning the value
+
+        Returns:
+            object: The cached value
+        """
+        if key not in self._cache:
+            self._cache[key] = factory(self)
+        return self._cache[key]
+
+    @property
+    def contour(self):
+        """numpy.ndarray: Vertices in OpenCV contour layout (N x 1 x 2)"""
+        return self.memo('contour', lambda r: r.points.reshape(-1, 1, 2))
+
+    @property
+    def bounding_rect(self):
+        """tuple: Upright bounding rectangle (x, y, w, h) of the vertices, unclipped"""
+        return self.memo('bounding_rect', lambda r: cv2.boundingRect(r.contour))
+
+    @property
+    def bbox(self):
+        """tuple: Bounding rectangle (x, y, w, h) clipped to the image, used for crops"""
+        return self.memo('bbox', _clipped_bbox)
+
+    @property
+    def mask_bbox(self):
+        """tuple: Tight bounding rectangle (x, y, w, h) of the mask pixels in image coordinates"""
+        return self.memo('mask_bbox', _mask_bbox)
+
+    @property
+    def mask(self):
+        """numpy.ndarray: Binary (0/255) uint8 mask of the region, local to bbox"""
+        return self.memo('mask', _rasterize)
+
+    @property
+    def area(self):
+        """int: Region area in pixels"""
+        return self.memo('area', lambda r: cv2.countNonZero(r.mask) if r.mask.size else 0)
+
+    @property
+    def perimeter(self):
+        """float: Closed polygon perimeter in pixels"""
+        return self.memo('perimeter', lambda r: cv2.arcLength(r.contour, True))
+
+    @property
+    def hull(self):
+        """numpy.ndarray: Convex hull of the vertices"""
+        return self.memo('hull', lambda r: cv2.convexHull(r.contour))
+
+    @property
+    def hull_area(self):
+        """float: Convex hull area in pixels"""
+        return self.memo('hull_area', lambda r: cv2.contourArea(r.hull))
+
+    @property
+    def hull_perimeter(self):
+        """float: Convex hull perimeter in pixels"""
+        return self.memo('hull_perimeter', lambda r: cv2.arcLength(r.hull, True))
+
+    @property
+    def moments(self):
+        """dict: Spatial moments of the polygon (cv2.moments)"""
+        return self.memo('moments', lambda r: cv2.moments(r.contour))
+
+    @property
+    def centroid(self):
+        """numpy.ndarray: Integer vertex centroid (x, y) used for labelling"""
+        return self.memo('centroid', lambda r: np.mean(r.points, axis=0, dtype=np.int32))
+
+    @property
+    def ellipse(self):
+        """tuple or None: Fitted ellipse ((cx, cy), (w, h), angle), None if it cannot be fitted"""
+        return self.memo('ellipse', _fit_ellipse)
+
+    def crop(self, image):
+        """
+        Crop an image to the region bounding box
+
+        Args:
+            image (numpy.ndarray): Full-frame image
+
+        Returns:
+            numpy.ndarray: View of the bbox window
+        """
+        x, y, w, h = self.bbox
+        return image[y:y+h, x:x+w]
+
+    def mask_in(self, window):
+        """
+        Place the region mask into an arbitrary window
+
+        Args:
+            window (tuple): Window (x, y, w, h) in image coordinates
+
+        Returns:
+            numpy.ndarray: Binary (0/255) uint8 mask of the window size
+        """
+        wx, wy, ww, wh = window
+        out = np.zeros((wh, ww), dtype=np.uint8)
+        x, y, w, h = self.bbox
+        x0, y0 = max(x, wx), max(y, wy)
+        x1, y1 = min(x + w, wx + ww), min(y + h, wy + wh)
+        if x1 > x0 and y1 > y0:
+            out[y0-wy:y1-wy, x0-wx:x1-wx] = self.mask[y0-y:y1-y, x0-x:x1-x]
+        return out
+
+    def pixels(self, image):
+        """
+        Get image values inside the region
+
+        Args:
+            image (numpy.ndarray): Full-frame image
+
+        Returns:
+            numpy.ndarray: Values of the pixels inside the mask, in row-major order
+        """
+        return self.crop(image)[self.mask > 0]
+
+
+def union_bbox(*bboxes):
+    """
+    Smallest rectangle containing all given rectangles
+
+    Args:
+        *bboxes (tuple): Rectangles (x, y, w, h)
+
+    Returns:
+        tuple: Enclosing rectangle (x, y, w, h)
+    """
+    x0 = min(b[0] for b in bboxes)
+    y0 = min(b[1] for b in bboxes)
+    x1 = max(b[0] + b[2] for b in bboxes)
+    y1 = max(b[1] + b[3] for b in bboxes)
+    return (x0, y0, x1 - x0, y1 - y0)
+
+
+def bboxes_overlap(a, b):
+    """
+    Check whether two rectangles (x, y, w, h) share at least one pixel
+
+    Args:
+        a (tuple): First rectangle
+        b (tuple): Second rectangle
+
+    Returns:
+        bool: True if the rectangles intersect
+    """
+    return (a[0] < b[0] + b[2] and b[0] < a[0] + a[2] and
+            a[1] < b[1] + b[3] and b[1] < a[1] + a[3])
+
+
+def decode_shape_mask(data):
+    """
+    Decode the base64 PNG of a LabelMe mask shape
+
+    Args:
+        data (str): Base64-encoded PNG
+
+    Returns:
+        numpy.ndarray or None: Binary (0/255) uint8 mask, None if it cannot be decoded
+    """
+    try:
+        buffer = np.frombuffer(base64.b64decode(data, validate=True), dtype=np.uint8)
+    except (binascii.Error, TypeError, ValueError):
+        return None
+    decoded = cv2.imdecode(buffer, cv2.IMREAD_UNCHANGED) if buffer.size else None
+    if decoded is None:
+        return None
+    if decoded.ndim == 3:
+        decoded = decoded.max(axis=2)
+    return np.where(decoded > 0, 255, 0).astype(np.uint8)
+
+
+def shape_mask_size(data):
+    """
+    Read the size of a LabelMe mask shape from its PNG header
+
+    Only the first 24 bytes of the base64 data are decoded, so large masks
+    can be validated without decoding the image.
+
+    Args:
+        data (str): Base64-encoded PNG
+
+    Returns:
+        tuple or None: (width, height) of the mask, None if the data does not
+            start with a PNG header or the mask is empty
+    """
+    if not isinstance(data, (str, bytes)):
+        return None
+    try:
+        header = base64.b64decode(data[:32], validate=True)
+    except (binascii.Error, ValueError):
+        return None
+    if len(header) < 24 or header[:8] != _PNG_SIGNATURE or header[12:16] != b'IHDR':
+        return None
+    width, height = int.from_bytes(header[16:20], 'big'), int.from_bytes(header[20:24], 'big')
+    if not width or not height:
+        return None
+    return width, height
+
+
+def _circle_mask(points):
+    """Rasterize a LabelMe circle (center, point on the circle) as (mask, origin)"""
+    (cx, cy), (px, py) = np.asarray(points, dtype=np.float64).reshape(-1, 2)[:2]
+    radius = np.hypot(px - cx, py - cy)
+    x0, y0 = int(np.floor(cx - radius)), int(np.floor(cy - radius))
+    x1, y1 = int(np.ceil(cx + radius)), int(np.ceil(cy + radius))
+    mask = np.zeros((y1 - y0 + 1, x1 - x0 + 1), dtype=np.uint8)
+    # Sub-pixel center and radius in 1/16 pixel units
+    center = (int(round((cx - x0) * 16)), int(round((cy - y0) * 16)))
+    cv2.circle(mask, center, int(round(radius * 16)), 255, -1, cv2.LINE_8, 4)
+    return mask, (x0, y0)
+
+
+def region_from_shape(shape, image_shape):
+    """
+    Create the region of a LabelMe shape
+
+    Supported shape types are 'polygon', 'rectangle' (two opposite corners),
+    'circle' (center and a point on the circle) and 'mask' (base64 PNG of the
+    box between two corners, decoded straight into the bbox-local mask).
+
+    Args:
+        shape (dict): LabelMe shape
+        image_shape (tuple): Shape of the image (height, width[, channels])
+
+    Returns:
+        RegionContext or None: Region, None for other shape types and
+            malformed shapes
+    """
+    shape_type = shape.get('shape_type')
+    points = np.asarray(shape.get('points', []), dtype=np.float64).reshape(-1, 2)
+    if shape_type == 'polygon':
+        return RegionContext(shape['points'], image_shape)
+    if shape_type == 'rectangle' and len(points) >= 2:
+        (x0, y0), (x1, y1) = points[:2]
+        return RegionContext([[x0, y0], [x1, y0], [x1, y1], [x0, y1]], image_shape)
+    if shape_type == 'circle' and len(points) >= 2:
+        mask, origin = _circle_mask(points)
+        return RegionContext.from_mask(mask, origin, image_shape)
+    if shape_type == 'mask' and len(points) >= 1:
+        mask = decode_shape_mask(shape.get('mask'))
+        if mask is None:
+            return None
+        # The PNG covers the box starting at the first corner (integer part)
+        return RegionContext.from_mask(mask, points[0].astype(int), image_shape)
+    return None
+
+
+def _trace_outline(mask):
+    """Boundary pixels (x, y) of the largest connected component of a bbox-local mask"""
+    contours = cv2.findContours(mask, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_NONE)[0] if mask.size else ()
+    if not contours:
+        return np.zeros((1, 2), dtype=np.int32)
+    largest = max(contours, key=lambda contour: (cv2.contourArea(contour), len(contour)))
+    return largest.reshape(-1, 2)
+
+
+def _clipped_bbox(region):
+    """Intersect the vertex bounding rectangle with the image"""
+    x, y, w, h = region.bounding_rect
+    height, width = region.image_shape
+    x0, y0 = max(x, 0), max(y, 0)
+    x1, y1 = min(x + w, width), min(y + h, height)
+    return (x0, y0, max(x1 - x0, 0), max(y1 - y0, 0))
+
+
+def _mask_bbox(region):
+    """Bounding rectangle of the non-zero mask pixels, shifted to image coordinates"""
+    x, y, _, _ = region.bbox
+    if not region.area:
+        return (x, y, 0, 0)
+    mx, my, mw, mh = cv2.boundingRect(region.mask)
+    return (x + mx, y + my, mw, mh)
+
+
+def _rasterize(region):
+    """Fill the polygon into a bbox-local mask"""
+    x, y, w, h = region.bbox
+    mask = np.zeros((h, w), dtype=np.uint8)
+    if w and h:
+        cv2.fillPoly(mask, [region.points - (x, y)], 255)
+    return mask
+
+
+def _fit_ellipse(region):
+    """Fit an ellipse to the vertices (at least 5 points are required)"""
+    if len(region.points) < 5:
+        return None
+    try:
+        return cv2.fitEllipse(region.contour)
+    except Exception as e:
+        print(f"Error fitting ellipse: {e}")
+        return None
@@ -0,0 +1,288 @@
+"""
+Declared result schema and columnar result buffer
+
+Every module that produces result columns declares them as FeatureColumn
+entries (name, dtype, unit). The analyzer assembles the columns of the enabled
+options into a FeatureSchema and writes each feature group of a tumor
+straight into a ResultBuffer: one growable NumPy array per column, so no
+per-row dict is merged or kept, and the DataFrame is built from the arrays
+without conversion.
+
+Column dtypes are 'float64', 'int64' or 'object' (strings). Missing values
+are NaN for numbers and None for strings. Integer columns are stored as
+float64 so they can hold NaN whatever order rows arrive in (e.g. Frame of
+image rows written before the first clip), and are exported as integers:
+pandas nullable Int64 columns in to_dataframe (empty CSV cells when missing)
+and int64 scalars or None in row.
+"""
+
+from collections import namedtuple
+
+import numpy as np
+import pandas as pd
+
+# One result column: name, NumPy dtype name and unit ('' if dimensionless)
+FeatureColumn = namedtuple('FeatureColumn', ['name', 'dtype', 'unit'])
+
+# Initial number of rows of a result buffer (doubled whenever it is full)
+_INITIAL_CAPACITY = 1024
+
+
+def float_columns(names, unit=''):
+    """
+    Declare float64 columns sharing a unit
+
+    Args:
+        names (list): Column names
+        unit (str): Unit of every column (default: dimensionless)
+
+    Returns:
+        list: FeatureColumn entries
+    """
+    return [FeatureColumn(name, 'float64', unit) for name in names]
+
+
+class FeatureSchema:
+    """Ordered, typed declaration of result columns"""
+
+    def __init__(self, columns=()):
+        """
+        Initialize schema
+
+        Args:
+            columns (iterable): FeatureColumn entries in output order
+
+        Raises:
+            ValueError: If a column name is declared twice
+        """
+        self.columns = []
+        self._index = {}
+        self.extend(columns)
+
+    def extend(self, columns):
+        """
+        Append columns to the schema
+
+        Args:
+            columns (iterable): FeatureColumn entries
+
+        Raises:
+            ValueError: If a column name is already declared
+        """
+        for column in columns:
+            if column.name in self._index:
+                raise ValueError(f"Column declared twice: {column.name}")
+            self._index[column.name] = len(self.columns)
+            self.columns.append(column)
+
+    @property
+    def names(self):
+        """list: Column names in output order"""
+        return [column.name for column in self.columns]
+
+    def column(self, name):
+        """
+        Get the declaration of a column
+
+        Args:
+            name (str): Column name
+
+        Returns:
+            FeatureColumn: Column declaration
+        """
+        return self.columns[self._index[name]]
+
+    def units(self):
+        """
+        Get the unit of every column
+
+        Returns:
+            dict: Column name -> unit
+        """
+        return {column.name: column.unit for column in self.columns}
+
+    def to_dataframe(self):
+        """
+        Describe the schema as a table
+
+        Returns:
+            pandas.DataFrame: Name, Dtype and Unit of every column
+        """
+        return pd.DataFrame(self.columns, columns=['Name', 'Dtype', 'Unit'])
+
+    def __contains__(self, name):
+        return name in self._index
+
+    def __iter__(self):
+        return iter(self.columns)
+
+    def __len__(self):
+        return len(self.columns)
+
+
+def _empty_column(dtype, size):
+    """Allocate a column with every value missing (integer columns are stored as float64)"""
+    if dtype == 'object':
+        return np.full(size, None, dtype=object)
+    return np.full(size, np.nan)
+
+
+def _integer(value):
+    """Stored integer column value as int64, None if missing"""
+    return None if np.isnan(value) else np.int64(value)
+
+
+class ResultBuffer:
+    """Growable column arrays of result rows following a FeatureSchema"""
+
+    def __init__(self, schema, capacity=_INITIAL_CAPACITY):
+        """
+        Initialize result buffer
+
+        Args:
+            schema (FeatureSchema): Columns of the buffer
+            capacity (int): Initial number of rows to allocate
+        """
+        self.schema = FeatureSchema(schema)
+        self._capacity = max(int(capacity), 1)
+        self._size = 0
+        self._data = {column.name: _empty_column(column.dtype, self._capacity) for column in self.schema}
+
+    def __len__(self):
+        return self._size
+
+    def _reserve(self, rows):
+        """Grow every column to hold at least rows rows"""
+        if rows <= self._capacity:
+            return
+        capacity = self._capacity
+        while capacity < rows:
+            capacity *= 2
+        for name, values in self._data.items():
+            grown = _empty_column(values.dtype.name, capacity)
+            grown[:self._size] = values[:self._size]
+            self._data[name] = grown
+        self._capacity = capacity
+
+    def add_columns(self, columns):
+        """
+        Declare more columns; existing rows get missing values
+
+        Columns already in the schema are skipped.
+
+        Args:
+            columns (iterable): FeatureColumn entries
+        """
+        added = []
+        for column in columns:
+            if column.name in self.schema:
+                continue
+            self._data[column.name] = _empty_column(column.dtype, self._capacity)
+            added.append(column)
+        self.schema.extend(added)
+
+    def new_row(self):
+        """
+        Append a row of missing values
+
+        Returns:
+            int: Index of the new row
+        """
+        self._reserve(self._size + 1)
+        self._size += 1
+        return self._size - 1
+
+    def write(self, row, values):
+        """
+        Write values of one row
+
+        Args:
+            row (int): Row index from new_row
+            values (dict): Column name -> value; every name must be declared
+
+        Raises:
+            KeyError: If a column is not in the schema
+        """
+        data = self._data
+        for name, value in values.items():
+            data[name][row] = value
+
+    def fill(self, name, start, stop, value):
+        """
+        Set one column of a range of rows to the same value
+
+        Args:
+            name (str): Column name
+            start (int): First row
+            stop (int): Row after the last one
+            value: Value to write
+        """
+        self._data[name][start:stop] = value
+
+    def row(self, row):
+        """
+        Read one row
+
+        Args:
+            row (int): Row index
+
+        Returns:
+            dict: Column name -> value, in schema order (int64 or None for
+                integer columns)
+        """
+        return {
+            column.name: _integer(self._data[column.name][row]) if column.dtype == 'int64'
+            else self._data[column.name][row]
+            for column in self.schema
+        }
+
+    def columns(self, start=0, stop=None):
+        """
+        Copy the columns of a range of rows
+
+        Args:
+            start (int): First row (default: 0)
+            stop (int, optional): Row after the last one (default: all rows)
+
+        Returns:
+            dict: Column name -> array, in schema order (integer columns as
+                float64 with NaN for missing values)
+        """
+        stop = self._size if stop is None else min(stop, self._size)
+        return {name: self._data[name][start:stop].copy() for name in self.schema.names}
+
+    def extend(self, columns):
+        """
+        Append rows given as columns (e.g. from another buffer's columns())
+
+        Args:
+            columns (dict): Column name -> array of equal lengths; every name
+                must be declared, missing columns get missing values
+        """
+        count = len(next(iter(columns.values()))) if columns else 0
+        if not count:
+            return
+        self._reserve(self._size + count)
+        for name, values in columns.items():
+            self._data[name][self._size:self._size + count] = values
+        self._size += count
+
+    def clear(self):
+        """Remove all rows, keeping the allocated columns"""
+        for name, values in self._data.items():
+            values[:self._size] = _empty_column(values.dtype.name, self._size)
+        self._size = 0
+
+    def to_dataframe(self):
+        """
+        Export the rows as a DataFrame without copying them through dicts
+
+        Returns:
+            pandas.DataFrame: One column per schema column, in schema order;
+                integer columns as nullable Int64
+        """
+        return pd.DataFrame({
+            column.name: pd.array(self._data[column.name][:self._size], dtype='Int64')
+            if column.dtype == 'int64' else self._data[column.name][:self._size]
+            for column in self.schema
+        })
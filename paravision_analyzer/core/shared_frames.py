@@ -0,0 +1,170 @@
+"""
+Shared-memory handoff of decoded frames between processes
+
+The decoding process writes each frame (BGR image, grayscale image, label
+mask) into a slot of a SharedFrameRing and sends the worker only the slot's
+FrameHandle: segment name, offsets, shapes and dtypes. The worker maps the
+arrays straight from shared memory with attach_frame, so no pixel data is
+pickled or copied between processes.
+
+Slots are recycled explicitly: the owner releases a slot once the worker's
+result has been collected, and the segment is reused for the next frame
+(reallocated only if the frame is larger). All segments are unlinked when the
+ring is closed, when it is garbage collected or at interpreter exit; if the
+owning process is killed, the multiprocessing resource tracker removes them.
+"""
+
+import weakref
+from collections import deque, namedtuple
+
+import numpy as np
+
+try:
+    from multiprocessing import shared_memory
+except ImportError:  # Python < 3.8
+    shared_memory = None
+
+# Location of a frame in the ring; arrays is a tuple of
+# (key, byte offset, shape, dtype string) entries
+FrameHandle = namedtuple('FrameHandle', ['slot', 'segment', 'arrays'])
+
+# Array offsets inside a slot are aligned to this many bytes
+_ALIGNMENT = 64
+
+# Segments attached by this (worker) process: slot -> SharedMemory
+_attached = {}
+
+
+def _layout(arrays):
+    """Byte layout of named arrays packed into one segment"""
+    entries = []
+    offset = 0
+    for key, array in arrays.items():
+        entries.append((key, offset, tuple(array.shape), array.dtype.str))
+        offset += -(-array.nbytes // _ALIGNMENT) * _ALIGNMENT
+    return tuple(entries), offset
+
+
+def _views(segment, entries):
+    """NumPy views of the arrays stored in a segment"""
+    return {
+        key: np.ndarray(shape, dtype=np.dtype(dtype), buffer=segment.buf, offset=offset)
+        for key, offset, shape, dtype in entries
+    }
+
+
+def _close_segment(segment, unlink):
+    """Close (and optionally unlink) a segment, tolerating leftover views"""
+    try:
+        segment.close()
+    except BufferError:
+        # A view is still alive; the mapping is released when it is collected
+        pass
+    if unlink:
+        try:
+            segment.unlink()
+        except FileNotFoundError:
+            pass
+
+
+def _release_segments(segments):
+    """Finalizer: unlink every segment of a ring"""
+    for slot, segment in enumerate(segments):
+        if segment is not None:
+            _close_segment(segment, unlink=True)
+            segments[slot] = None
+
+
+class SharedFrameRing:
+    """Fixed set of shared-memory slots holding decoded frames"""
+
+    def __init__(self, slots):
+        """
+        Initialize frame ring
+
+        Args:
+            slots (int): Number of frames that can be in flight at once
+        """
+        if shared_memory is None:
+            raise RuntimeError("Shared-memory frame handoff requires Python 3.8 or later")
+        self.slots = slots
+        self._segments = [None] * slots
+        self._free = deque(range(slots))
+        self._finalizer = weakref.finalize(self, _release_segments, self._segments)
+
+    @property
+    def free_slots(self):
+        """int: Number of slots available for put"""
+        return len(self._free)
+
+    def put(self, arrays):
+        """
+        Copy named arrays into a free slot
+
+        Args:
+            arrays (dict): Key -> numpy.ndarray (e.g. 'gray', 'bgr', 'labels')
+
+        Returns:
+            FrameHandle: Handle to send to the worker
+
+        Raises:
+            RuntimeError: If every slot is still in use
+        """
+        if not self._free:
+            raise RuntimeError("No free frame slot; release a slot before putting another frame")
+        slot = self._free.popleft()
+        entries, size = _layout(arrays)
+
+        segment = self._segments[slot]
+        if segment is None or segment.size < size:
+            if segment is not None:
+                _close_segment(segment, unlink=True)
+            segment = shared_memory.SharedMemory(create=True, size=max(size, 1))
+            self._segments[slot] = segment
+
+        for key, view in _views(segment, entries).items():
+            np.copyto(view, arrays[key])
+        return FrameHandle(slot, segment.name, entries)
+
+    def release(self, handle):
+        """
+        Return a slot to the ring once its worker has finished
+
+        Args:
+            handle (FrameHandle): Handle returned by put
+        """
+        if handle.slot not in self._free:
+            self._free.append(handle.slot)
+
+    def close(self):
+        """Unlink all segments; the ring cannot be used afterwards"""
+        self._finalizer()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+
+def attach_frame(handle):
+    """
+    Map the arrays of a slot in the current process without copying
+
+    The segment stays attached for later frames in the same slot and is
+    replaced when the ring reallocates the slot.
+
+    Args:
+        handle (FrameHandle): Handle received from the owning process
+
+    Returns:
+        dict: Key -> numpy.ndarray view into shared memory (valid until the
+            owner releases the slot)
+    """
+    segment = _attached.get(handle.slot)
+    if segment is None or segment.name != handle.segment:
+        if segment is not None:
+            _close_segment(segment, unlink=False)
+        segment = shared_memory.SharedMemory(name=handle.segment)
+        _attached[handle.slot] = segment
+    return _views(segment, handle.arrays)
@@ -0,0 +1,109 @@
+"""
+Spatial relations between annotated regions of one image
+
+A sweep line over the bounding boxes finds candidate pairs without comparing
+every pair of regions, and exact overlaps are then measured by rasterizing
+only the intersection of the two bounding boxes.
+"""
+
+import cv2
+import numpy as np
+
+from paravision_analyzer.core.schema import FeatureColumn
+
+# Result columns of the spatial relations (Parent_ID is '' without a parent)
+RELATION_COLUMNS = [
+    FeatureColumn('Overlap_Fraction', 'float64', ''),
+    FeatureColumn('Overlap_Count', 'int64', ''),
+    FeatureColumn('Parent_ID', 'object', ''),
+]
+
+
+def find_overlapping_bboxes(bboxes):
+    """
+    Find all pairs of intersecting rectangles with a sweep line along x
+
+    Rectangles are visited in order of their left edge while an active list
+    keeps those whose right edge has not been passed yet, so only rectangles
+    that share an x-interval are compared.
+
+    Args:
+        bboxes (list): Rectangles (x, y, w, h)
+
+    Returns:
+        list: Index pairs (i, j) with i < j whose rectangles intersect
+    """
+    order = sorted(range(len(bboxes)), key=lambda k: bboxes[k][0])
+    active = []
+    pairs = []
+    for k in order:
+        x, y, w, h = bboxes[k]
+        if w <= 0 or h <= 0:
+            continue
+        active = [a for a in active if bboxes[a][0] + bboxes[a][2] > x]
+        for a in active:
+            ay, ah = bboxes[a][1], bboxes[a][3]
+            if ay < y + h and y < ay + ah:
+                pairs.append((min(a, k), max(a, k)))
+        active.append(k)
+    return sorted(pairs)
+
+
+def _intersection(a, b):
+    """Intersection rectangle of two rectangles (x, y, w, h)"""
+    x0, y0 = max(a[0], b[0]), max(a[1], b[1])
+    x1, y1 = min(a[0] + a[2], b[0] + b[2]), min(a[1] + a[3], b[1] + b[3])
+    return (x0, y0, x1 - x0, y1 - y0)
+
+
+def compute_spatial_relations(regions, containment_threshold=0.95):
+    """
+    Compute overlap and nesting relations between the regions of one image
+
+    Args:
+        regions (list): RegionContext objects of one image
+        containment_threshold (float): Fraction of a region's area that must
+            lie inside a larger region for that region to be its parent
+            (default: 0.95)
+
+    Returns:
+        list: One dict per region with 'overlap_fraction' (fraction of the
+            area covered by any other region), 'overlap_count' (number of
+            overlapping regions) and 'parent' (index of the smallest
+            containing region, or None)
+    """
+    relations = [
+        {'overlap_fraction': 0.0, 'overlap_count': 0, 'parent': None}
+        for _ in regions
+    ]
+    coverage = {}
+    candidates = {}
+
+    for i, j in find_overlapping_bboxes([region.bbox for region in regions]):
+        window = _intersection(regions[i].bbox, regions[j].bbox)
+        shared = cv2.bitwise_and(regions[i].mask_in(window), regions[j].mask_in(window))
+        shared_area = cv2.countNonZero(shared)
+        if not shared_area:
+            continue
+
+        for own, other in ((i, j), (j, i)):
+            relations[own]['overlap_count'] += 1
+
+            # Union of everything covering this region, kept bbox-local
+            x, y, _, _ = regions[own].bbox
+            if own not in coverage:
+                coverage[own] = np.zeros_like(regions[own].mask)
+            wx, wy, ww, wh = window
+            coverage[own][wy-y:wy-y+wh, wx-x:wx-x+ww] |= shared
+
+            if (regions[own].area and shared_area / regions[own].area >= containment_threshold
+                    and regions[other].area > regions[own].area):
+                candidates.setdefault(own, []).append(other)
+
+    for own, covered in coverage.items():
+        if regions[own].area:
+            relations[own]['overlap_fraction'] = cv2.countNonZero(covered) / regions[own].area
+    for own, parents in candidates.items():
+        relations[own]['parent'] = min(parents, key=lambda p: regions[p].area)
+
+    return relations
@@ -0,0 +1,136 @@
+"""
+Parameter sweeps over feature extraction settings
+
+A sweep grid maps FeatureExtractor parameters to the values to try, e.g.
+
+    {"glcm_levels": [8, 16, 32], "glcm_distances": [[1], [1, 2, 3]],
+     "threshold": ["otsu", 128], "px_per_mm": [19]}
+
+and expands to the Cartesian product of configurations. The analyzer decodes
+and rasterizes every image once and measures each region with one extractor
+per configuration; geometry, pixel values, Otsu's threshold and quantized
+crops are memoized on the region and shared between configurations. Results
+are written in long format: one row per tumor and configuration, tagged with
+Config_ID and the configuration's parameter values.
+"""
+
+import json
+import itertools
+
+from paravision_analyzer.core.features import GLCM_DISTANCES, GLCM_LEVELS, FeatureExtractor
+from paravision_analyzer.core.schema import FeatureColumn
+
+# Sweepable FeatureExtractor parameters
+SWEEP_PARAMETERS = ('px_per_mm', 'glcm_levels', 'glcm_distances', 'threshold')
+
+# Configuration tag columns of sweep results (distances joined with ';',
+# threshold 'otsu' or the fixed gray level)
+SWEEP_COLUMNS = [
+    FeatureColumn('Config_ID', 'object', ''),
+    FeatureColumn('Config_Px_Per_Mm', 'float64', 'px/mm'),
+    FeatureColumn('Config_GLCM_Levels', 'int64', ''),
+    FeatureColumn('Config_GLCM_Distances', 'object', 'px'),
+    FeatureColumn('Config_Threshold', 'object', 'gray'),
+]
+
+
+def _normalize_value(parameter, value):
+    """Validate one grid value and convert it to the FeatureExtractor argument"""
+    if parameter == 'px_per_mm':
+        value = float(value)
+        if value <= 0:
+            raise ValueError(f"px_per_mm must be positive, got {value}")
+    elif parameter == 'glcm_levels':
+        value = int(value)
+        if not 2 <= value <= 256:
+            raise ValueError(f"glcm_levels must be between 2 and 256, got {value}")
+    elif parameter == 'glcm_distances':
+        value = tuple(int(d) for d in (value if isinstance(value, (list, tuple)) else [value]))
+        if not value or min(value) < 1:
+            raise ValueError(f"glcm_distances must be positive integers, got {list(value)}")
+    elif parameter == 'threshold':
+        value = None if value is None or str(value).lower() == 'otsu' else int(value)
+    return value
+
+
+def expand_sweep_grid(grid):
+    """
+    Expand a sweep grid into configurations
+
+    Args:
+        grid (dict): Parameter -> list of values (a single value is treated as
+            a one-element list); parameters are listed in SWEEP_PARAMETERS
+
+    Returns:
+        list: Configuration dicts with 'Config_ID' and FeatureExtractor
+            arguments, in grid order (the last parameter varies fastest)
+
+    Raises:
+        ValueError: If the grid has unknown parameters or invalid values
+    """
+    unknown = set(grid) - set(SWEEP_PARAMETERS)
+    if unknown:
+        raise ValueError(f"Unknown sweep parameters: {', '.join(sorted(unknown))}")
+
+    parameters = [name for name in SWEEP_PARAMETERS if name in grid]
+    value_lists = []
+    for name in parameters:
+        values = grid[name]
+        # A bare distance list is one value of glcm_distances, not several
+        if not isinstance(values, list) or (name == 'glcm_distances' and values and
+                                            not isinstance(values[0], list)):
+            values = [values]
+        value_lists.append([_normalize_value(name, value) for value in values])
+
+    configs = []
+    for number, combination in enumerate(itertools.product(*value_lists), start=1):
+        config = {'Config_ID': f"config_{number}"}
+        config.update(zip(parameters, combination))
+        configs.append(config)
+    return configs
+
+
+def load_sweep_grid(path):
+    """
+    Load and expand a sweep grid JSON file
+
+    Args:
+        path (str): JSON file with a grid object (see expand_sweep_grid)
+
+    Returns:
+        list: Configurations from expand_sweep_grid
+    """
+    with open(path, 'r', encoding='utf-8') as f:
+        return expand_sweep_grid(json.load(f))
+
+
+def build_sweep_extractors(configs, px_per_mm=19, approx_max_pixels=None):
+    """
+    Create one feature extractor per configuration
+
+    Args:
+        configs (list): Configurations from expand_sweep_grid
+        px_per_mm (float): Value for configurations without px_per_mm
+        approx_max_pixels (int, optional): Approximate mode of every extractor
+
+    Returns:
+        list: (configuration tag columns, FeatureExtractor) pairs
+    """
+    extractors = []
+    for config in configs:
+        extractor = FeatureExtractor(
+            px_per_mm=config.get('px_per_mm', px_per_mm),
+            approx_max_pixels=approx_max_pixels,
+            glcm_levels=config.get('glcm_levels', GLCM_LEVELS),
+            glcm_distances=config.get('glcm_distances', GLCM_DISTANCES),
+            threshold=config.get('threshold'),
+        )
+        tags = {
+            'Config_ID': config['Config_ID'],
+            'Config_Px_Per_Mm': extractor.px_per_mm,
+            'Config_GLCM_Levels': extractor.glcm_levels,
+            'Config_GLCM_Distances': ';'.join(str(d) for d in extractor.glcm_distances),
+            'Config_Threshold': 'otsu' if extractor.threshold is None else extractor.threshold,
+        }
+        extractors.append((tags, extractor))
+    return extractors
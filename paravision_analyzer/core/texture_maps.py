@@ -0,0 +1,176 @@
+"""
+Per-pixel texture maps of a region
+
+Each map pixel holds co-occurrence statistics (contrast, homogeneity,
+entropy) of the window centered on it. Instead of building a GLCM per window,
+every pixel pair at a GLCM offset is assigned to its first pixel and the
+per-pair quantities (squared difference, homogeneity weight, pair-code
+indicators) are summed over all windows at once with separable running box
+sums, the same sums an integral image gives at a fraction of the cost. Only
+pairs with both pixels inside the region mask are counted, and map values are
+averaged over the offsets (angles and distances) like the scalar GLCM features.
+
+Maps are stored as float16 arrays in compressed NPZ files, NaN outside the
+region, together with the image coordinates of their top-left pixel.
+"""
+
+import cv2
+import numpy as np
+
+from paravision_analyzer.core.utils import atomic_path
+
+# Texture maps computed for every region
+TEXTURE_MAP_NAMES = ('contrast', 'homogeneity', 'entropy')
+
+
+def window_sums(values, window):
+    """
+    Sum of every window x window neighbourhood
+
+    Args:
+        values (numpy.ndarray): 2D uint8 (exact integer sums) or float64 array
+        window (int): Odd window side length
+
+    Returns:
+        numpy.ndarray: Sums centered on each pixel (int32 for uint8 input,
+            float64 otherwise); values outside the array count as zero
+    """
+    depth = cv2.CV_32S if values.dtype == np.uint8 else cv2.CV_64F
+    return cv2.boxFilter(values, depth, (window, window), normalize=False, borderType=cv2.BORDER_CONSTANT)
+
+
+def texture_maps(quantized, mask, levels, offsets, window=7):
+    """
+    Compute windowed co-occurrence statistics of a quantized crop
+
+    Per window and offset the symmetric GLCM of the pairs inside the mask gives
+    contrast = sum p (i - j)^2, homogeneity = sum p / (1 + (i - j)^2) and
+    entropy = -sum p log2 p, evaluated without building the matrices.
+
+    Args:
+        quantized (numpy.ndarray): Crop quantized to [0, levels)
+        mask (numpy.ndarray): Region mask of the crop (non-zero inside)
+        levels (int): Number of gray levels
+        offsets (list): (row, column) pixel offsets of the GLCM
+        window (int): Odd window side length in pixels (default: 7)
+
+    Returns:
+        dict: TEXTURE_MAP_NAMES -> float32 map of the crop's shape, NaN outside
+            the mask and where a window holds no pair
+    """
+    height, width = quantized.shape
+    values = quantized.astype(np.int32)
+    inside = mask > 0
+    totals = {name: np.zeros((height, width)) for name in TEXTURE_MAP_NAMES}
+    measured = np.zeros((height, width))
+    # n log2 n of every possible pair count in a window
+    counts_range = np.arange(window * window + 1, dtype=np.float64)
+    n_log2_n = counts_range * np.log2(np.maximum(counts_range, 1))
+
+    for dr, dc in offsets:
+        # Pair of each pixel with its neighbour at the offset, both inside the mask
+        first = np.full((height, width), -1, dtype=np.int32)
+        second = np.full((height, width), -1, dtype=np.int32)
+        r0, r1 = max(0, -dr), min(height, height - dr)
+        c0, c1 = max(0, -dc), min(width, width - dc)
+        if r1 <= r0 or c1 <= c0:
+            continue
+        first[r0:r1, c0:c1] = np.where(inside[r0:r1, c0:c1], values[r0:r1, c0:c1], -1)
+        second[r0:r1, c0:c1] = np.where(inside[r0+dr:r1+dr, c0+dc:c1+dc], values[r0+dr:r1+dr, c0+dc:c1+dc], -1)
+        valid = (first >= 0) & (second >= 0)
+
+        pairs = window_sums(valid.astype(np.uint8), window)
+        squared = np.where(valid, (first - second) ** 2, 0).astype(np.float64)
+        contrast = window_sums(squared, window)
+        homogeneity = window_sums(np.where(valid, 1.0 / (1.0 + squared), 0.0), window)
+        off_diagonal = window_sums((valid & (first != second)).astype(np.uint8), window)
+
+        # Entropy of the symmetric GLCM from windowed counts n of each unordered
+        # pair: log2 N - sum(n log2 n) / N + (off-diagonal pairs) / N
+        codes = np.where(valid, np.minimum(first, second) * levels + np.maximum(first, second), -1)
+        n_log_n = np.zeros((height, width))
+        for code in np.unique(codes[valid]):
+            n_log_n += n_log2_n[window_sums((codes == code).astype(np.uint8), window)]
+
+        with np.errstate(divide='ignore', invalid='ignore'):
+            has_pairs = pairs > 0
+            totals['contrast'] += np.where(has_pairs, contrast / pairs, 0.0)
+            totals['homogeneity'] += np.where(has_pairs, homogeneity / pairs, 0.0)
+            totals['entropy'] += np.where(
+                has_pairs, np.log2(np.maximum(pairs, 1)) - n_log_n / pairs + off_diagonal / pairs, 0.0
+            )
+        measured += has_pairs
+
+    defined = inside & (measured > 0)
+    return {
+        name: np.where(defined, total / np.maximum(measured, 1), np.nan).astype(np.float32)
+        for name, total in totals.items()
+    }
+
+
+def save_texture_maps(path, maps, origin):
+    """
+    Save the texture maps of a region as compressed float16 arrays
+
+    Args:
+        path (str): Output .npz path
+        maps (dict): Maps from texture_maps
+        origin (tuple): Image coordinates (x, y) of the maps' top-left pixel
+    """
+    arrays = {name: texture_map.astype(np.float16) for name, texture_map in maps.items()}
+    with atomic_path(path) as temp_path, open(temp_path, 'wb') as f:
+        np.savez_compressed(f, origin=np.asarray(origin, dtype=np.int64), **arrays)
+
+
+def load_texture_maps(path):
+    """
+    Load texture maps saved by save_texture_maps
+
+    Args:
+        path (str): Path to the .npz file
+
+    Returns:
+        tuple: (dict of float32 maps, (x, y) origin in image coordinates)
+    """
+    with np.load(path) as data:
+        maps = {name: data[name].astype(np.float32) for name in data.files if name != 'origin'}
+        return maps, tuple(int(v) for v in data['origin'])
+
+
+def overlay_texture_map(visualization, texture_map, origin, alpha=0.5, scale=1.0):
+    """
+    Blend a colorized texture map into a visualization in place
+
+    The map is scaled to its own minimum and maximum and colorized with the
+    JET colormap; pixels where the map is NaN are left unchanged.
+
+    Args:
+        visualization (numpy.ndarray): BGR image to draw on
+        texture_map (numpy.ndarray): Map from texture_maps
+        origin (tuple): Image coordinates (x, y) of the map's top-left pixel
+        alpha (float): Opacity of the overlay (default: 0.5)
+        scale (float): Output pixels per image pixel of a downscaled
+            visualization (default: 1.0)
+    """
+    x, y = origin
+    if scale != 1.0:
+        # Nearest-neighbour resampling keeps undefined (NaN) pixels undefined
+        x, y = int(round(x * scale)), int(round(y * scale))
+        height, width = texture_map.shape
+        size = (max(int(round(width * scale)), 1), max(int(round(height * scale)), 1))
+        texture_map = cv2.resize(texture_map, size, interpolation=cv2.INTER_NEAREST)
+        texture_map = texture_map[:visualization.shape[0] - y, :visualization.shape[1] - x]
+
+    defined = np.isfinite(texture_map)
+    if not np.any(defined):
+        return
+    low, high = np.min(texture_map[defined]), np.max(texture_map[defined])
+    scaled = np.zeros(texture_map.shape, dtype=np.uint8)
+    if high > low:
+        scaled[defined] = np.round((texture_map[defined] - low) * (255.0 / (high - low))).astype(np.uint8)
+    colors = cv2.applyColorMap(scaled, cv2.COLORMAP_JET)
+
+    height, width = texture_map.shape
+    target = visualization[y:y+height, x:x+width]
+    blended = cv2.addWeighted(target, 1.0 - alpha, colors, alpha, 0)
+    target[defined] = blended[defined]
@@ -2,26 +2,204 @@
 Utility functions for visualization and helper operations
 """
 
+import os
 import cv2
 import numpy as np
+from contextlib import contextmanager
 from math import pi, cos, sin, radians
 
+from paravision_analyzer.core.region import shape_mask_size
 
-def draw_visualization(visualization, contour_points, ellipse_features):
+# Image formats searched for each annotation, in priority order
+SUPPORTED_IMAGE_EXTENSIONS = ['.jpg', '.jpeg', '.png', '.bmp', '.tif', '.tiff', '.dcm']
+
+# Shape types the analyzer measures; other LabelMe shapes are skipped
+SUPPORTED_SHAPE_TYPES = ['polygon', 'rectangle', 'circle', 'mask']
+
+# Visualization colors (BGR, visualizations are drawn on the decoded frame)
+CONTOUR_COLOR = (0, 0, 255)        # Red
+TEXT_COLOR = (255, 255, 255)       # White
+ELLIPSE_COLOR = (0, 255, 0)        # Green
+MAJOR_AXIS_COLOR = (255, 0, 0)     # Blue
+MINOR_AXIS_COLOR = (0, 255, 255)   # Yellow
+REFERENCE_COLOR = (255, 0, 255)    # Purple
+
+# Visualization file formats: extension, OpenCV quality parameter and its range
+# (PNG compression level 0-9, JPEG quality 0-100, WebP quality 1-100)
+VISUALIZATION_FORMATS = {
+    'png': ('.png', cv2.IMWRITE_PNG_COMPRESSION, (0, 9)),
+    'jpeg': ('.jpg', cv2.IMWRITE_JPEG_QUALITY, (0, 100)),
+    'webp': ('.webp', cv2.IMWRITE_WEBP_QUALITY, (1, 100)),
+}
+
+# Edge pairs tested at once by polygon_self_intersects (bounds its memory use)
+_INTERSECTION_BLOCK = 1 << 18
+
+
+def read_image(image_path, flags=cv2.IMREAD_COLOR):
+    """
+    Decode an image file, supporting non-ASCII paths
+
+    Args:
+        image_path (str): Path to image file
+        flags (int): cv2.imdecode flags (default: cv2.IMREAD_COLOR)
+
+    Returns:
+        numpy.ndarray or None: Decoded image, None if it cannot be read
+    """
+    # Read image file as numpy array to avoid Chinese path errors
+    image_data = np.fromfile(image_path, dtype=np.uint8)
+    return cv2.imdecode(image_data, flags)
+
+
+@contextmanager
+def atomic_path(path):
+    """
+    Write a file atomically: yield a temporary path next to path, which is
+    renamed over path when the block completes (and removed if it fails), so
+    readers and resumed runs never see a partially written file
+
+    Args:
+        path (str): Final path of the file
+
+    Yields:
+        str: Temporary path to write to
+    """
+    temp_path = f"{path}.tmp"
+    try:
+        yield temp_path
+        os.replace(temp_path, path)
+    finally:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+
+
+def write_image(image_path, image, image_format='png', quality=None):
+    """
+    Encode an image file, supporting non-ASCII paths
+
+    Args:
+        image_path (str): Path of the file to write
+        image (numpy.ndarray): Image to encode
+        image_format (str): Key of VISUALIZATION_FORMATS (default: 'png')
+        quality (int, optional): PNG compression level or JPEG/WebP quality
+            (default: None, the OpenCV default of the format; lossless for WebP)
+
+    Returns:
+        bool: True if the image was written
+    """
+    extension, parameter, _ = VISUALIZATION_FORMATS[image_format]
+    params = [parameter, int(quality)] if quality is not None else []
+    success, data = cv2.imencode(extension, image, params)
+    if success:
+        with atomic_path(image_path) as temp_path:
+            data.tofile(temp_path)
+    return success
+
+
+def fit_visualization(image, max_size=None):
+    """
+    Downscale a frame so that its longer side is at most max_size pixels
+
+    Args:
+        image (numpy.ndarray): Frame to draw the visualization on
+        max_size (int, optional): Maximum output width and height (default: None, no limit)
+
+    Returns:
+        tuple: (frame, scale) where scale is output pixels per image pixel;
+            the frame itself and 1.0 if it already fits
+    """
+    height, width = image.shape[:2]
+    if not max_size or max(height, width) <= max_size:
+        return image, 1.0
+    scale = max_size / max(height, width)
+    size = (max(int(round(width * scale)), 1), max(int(round(height * scale)), 1))
+    return cv2.resize(image, size, interpolation=cv2.INTER_AREA), scale
+
+
+def find_image_file(image_dir, base_name):
+    """
+    Find the image belonging to an annotation
+
+    Args:
+        image_dir (str): Directory containing original images
+        base_name (str): Base filename (without extension)
+
+    Returns:
+        str or None: Path of the first existing image with a supported extension
+    """
+    for ext in SUPPORTED_IMAGE_EXTENSIONS:
+        image_file = os.path.join(image_dir, f"{base_name}{ext}")
+        if os.path.exists(image_file):
+            return image_file
+    return None
+
+
+def index_image_files(image_dir):
+    """
+    Map base names to image paths with a single directory listing
+
+    Equivalent to calling find_image_file for every base name, but avoids
+    several stat calls per annotation on large directories.
+
+    Args:
+        image_dir (str): Directory containing original images
+
+    Returns:
+        dict: Base name -> image path
+    """
+    priority = {ext: rank for rank, ext in enumerate(SUPPORTED_IMAGE_EXTENSIONS)}
+    index = {}
+    ranks = {}
+    with os.scandir(image_dir) as entries:
+        for entry in entries:
+            base_name, ext = os.path.splitext(entry.name)
+            if ext in priority and entry.is_file():
+                if base_name not in ranks or priority[ext] < ranks[base_name]:
+                    ranks[base_name] = priority[ext]
+                    index[base_name] = entry.path
+    return index
+
+
+def draw_contour(visualization, region, scale=1.0):
+    """
+    Draw the region outline on image
+
+    Args:
+        visualization (numpy.ndarray): Image to draw on
+        region (RegionContext): Region whose outline is drawn
+        scale (float): Output pixels per image pixel (default: 1.0)
+    """
+    if scale == 1.0:
+        cv2.polylines(visualization, [region.contour], True, CONTOUR_COLOR, 2)
+        return
+    # Scaled vertices keep 4 fractional bits (shift) so the outline stays smooth
+    contour = np.round(region.contour * (scale * 16)).astype(np.int32)
+    cv2.polylines(visualization, [contour], True, CONTOUR_COLOR, 2, cv2.LINE_8, 4)
+
+
+def draw_visualization(visualization, region, scale=1.0):
     """
     Draw ellipse visualization on image
 
     Args:
         visualization (numpy.ndarray): Image to draw on
-        contour_points (numpy.ndarray): Contour points
-        ellipse_features (dict): Dictionary containing ellipse features
+        region (RegionContext): Region whose fitted ellipse is drawn
+        scale (float): Output pixels per image pixel; line widths and dash
+            lengths stay in output pixels (default: 1.0)
     """
+    ellipse = region.ellipse
+    if ellipse is None:
+        return
+    if scale != 1.0:
+        (cx, cy), (width, height), angle = ellipse
+        ellipse = ((cx * scale, cy * scale), (width * scale, height * scale), angle)
+
     try:
-        ellipse = cv2.fitEllipse(contour_points)
         center, axes, angle = ellipse
 
         # Draw ellipse contour
-        cv2.ellipse(visualization, ellipse, (0, 255, 0), 2)
+        cv2.ellipse(visualization, ellipse, ELLIPSE_COLOR, 2)
 
         # Determine major and minor axes
         width, height = axes
@@ -48,7 +226,7 @@ def draw_visualization(visualization, contour_points, ellipse_features):
         y2 = int(center[1] + major_axis_length * sin(major_angle_rad))
 
         # Draw major axis
-        cv2.line(visualization, (x1, y1), (x2, y2), (0, 0, 255), 2)
+        cv2.line(visualization, (x1, y1), (x2, y2), MAJOR_AXIS_COLOR, 2)
 
         # Minor axis angle is always major axis angle + 90 degrees
         minor_angle_rad = major_angle_rad + pi/2
@@ -60,7 +238,7 @@ def draw_visualization(visualization, contour_points, ellipse_features):
         y4 = int(center[1] + minor_axis_length * sin(minor_angle_rad))
 
         # Draw minor axis
-        cv2.line(visualization, (x3, y3), (x4, y4), (255, 255, 0), 2)
+        cv2.line(visualization, (x3, y3), (x4, y4), MINOR_AXIS_COLOR, 2)
 
         # Draw horizontal reference line to show angle (using dashed line effect)
         line_length = max(major_axis_length, 100)
@@ -73,29 +251,152 @@ def draw_visualization(visualization, contour_points, ellipse_features):
 
         for x in range(start_x, end_x, dash_length + gap_length):
             line_end = min(x + dash_length, end_x)
-            cv2.line(visualization, (x, y), (line_end, y), (255, 0, 255), 1)
+            cv2.line(visualization, (x, y), (line_end, y), REFERENCE_COLOR, 1)
 
     except Exception as e:
         print(f"Error drawing ellipse: {e}")
 
 
-def validate_annotation(annotation_data):
+def polygon_self_intersects(points):
     """
-    Validate annotation data format
+    Check whether a closed polygon has crossing edges
+
+    Pairs of non-adjacent edges are tested with vectorized orientation
+    tests, a block of edges against all edges at a time, so memory stays
+    bounded for densely traced polygons.
 
     Args:
-        annotation_data (dict): Annotation data to validate
+        points (array-like): Polygon vertices as (x, y) pairs
 
     Returns:
-        bool: True if valid, False otherwise
+        bool: True if two non-adjacent edges properly cross
     """
-    if 'shapes' not in annotation_data:
+    pts = np.asarray(points, dtype=np.float64).reshape(-1, 2)
+    n = len(pts)
+    if n < 4:
         return False
 
-    for shape in annotation_data['shapes']:
+    start = pts
+    end = np.roll(pts, -1, axis=0)
+
+    def orientation(a, b, c):
+        return np.sign((b[..., 0] - a[..., 0]) * (c[..., 1] - a[..., 1]) -
+                       (b[..., 1] - a[..., 1]) * (c[..., 0] - a[..., 0]))
+
+    c, d = start[None, :, :], end[None, :, :]
+    j = np.arange(n)[None, :]
+    rows = max(1, _INTERSECTION_BLOCK // n)
+    for first in range(0, n, rows):
+        # Edges first..last against every edge
+        last = min(first + rows, n)
+        a, b = start[first:last, None, :], end[first:last, None, :]
+        crosses = ((orientation(a, b, c) * orientation(a, b, d) < 0) &
+                   (orientation(c, d, a) * orientation(c, d, b) < 0))
+
+        # Count each pair once, ignoring each edge against itself and its neighbours
+        i = np.arange(first, last)[:, None]
+        crosses &= (j >= i + 2) & ~((i == 0) & (j == n - 1))
+        if crosses.any():
+            return True
+    return False
+
+
+def find_annotation_issues(annotation_data, image_size=None):
+    """
+    Check annotation data for problems that break or degrade analysis
+
+    Args:
+        annotation_data (dict): Annotation data to validate
+        image_size (tuple, optional): Actual (width, height) of the image
+
+    Returns:
+        list: Issue dicts with 'shape_index', 'severity' ('error' or
+            'warning'), 'code' and 'message' keys
+    """
+    issues = []
+
+    def add(shape_index, severity, code, message):
+        issues.append({
+            'shape_index': shape_index,
+            'severity': severity,
+            'code': code,
+            'message': message
+        })
+
+    if not isinstance(annotation_data, dict) or 'shapes' not in annotation_data:
+        add(None, 'error', 'missing_shapes', "Annotation has no 'shapes' list")
+        return issues
+    if not isinstance(annotation_data['shapes'], list):
+        add(None, 'error', 'invalid_shapes', "Annotation 'shapes' is not a list")
+        return issues
+
+    width = annotation_data.get('imageWidth')
+    height = annotation_data.get('imageHeight')
+    if image_size is not None:
+        if (width, height) != tuple(image_size) and width is not None and height is not None:
+            add(None, 'error', 'size_mismatch',
+                f"Annotation size {width}x{height} differs from image size {image_size[0]}x{image_size[1]}")
+        width, height = image_size
+
+    for idx, shape in enumerate(annotation_data['shapes']):
+        if not isinstance(shape, dict):
+            add(idx, 'error', 'invalid_shape', "Shape is not a JSON object")
+            continue
         if 'shape_type' not in shape or 'points' not in shape:
-            return False
-        if shape['shape_type'] == 'polygon' and len(shape['points']) < 3:
-            return False
+            add(idx, 'error', 'missing_fields', "Shape lacks 'shape_type' or 'points'")
+            continue
+        if shape['shape_type'] not in SUPPORTED_SHAPE_TYPES:
+            add(idx, 'warning', 'unsupported_shape_type',
+                f"Shape type '{shape['shape_type']}' is not analyzed")
+            continue
+
+        try:
+            points = np.asarray(shape['points'], dtype=np.float64).reshape(-1, 2)
+        except (ValueError, TypeError):
+            add(idx, 'error', 'invalid_points', "Shape points are not a list of (x, y) number pairs")
+            continue
+        shape_type = shape['shape_type']
+        if shape_type in ('rectangle', 'circle'):
+            if len(points) != 2:
+                add(idx, 'error', 'too_few_points',
+                    f"{shape_type.capitalize()} has {len(points)} points (2 required)")
+                continue
+            if np.all(points[0] == points[1]) or (shape_type == 'rectangle' and np.any(points[0] == points[1])):
+                add(idx, 'error', 'degenerate_shape', f"{shape_type.capitalize()} has zero size")
+                continue
+        elif shape_type == 'mask':
+            # Header only: decoding every mask would make the check as slow as the analysis
+            if not len(points) or shape_mask_size(shape.get('mask')) is None:
+                add(idx, 'error', 'invalid_mask', "Mask shape has no valid PNG 'mask' image")
+                continue
+        elif len(points) < 3:
+            add(idx, 'error', 'too_few_points', f"Polygon has {len(points)} points (at least 3 required)")
+            continue
+        elif len(points) < 5:
+            add(idx, 'warning', 'no_ellipse_fit',
+                f"Polygon has {len(points)} points (at least 5 required for ellipse features)")
+        if shape_type == 'polygon' and polygon_self_intersects(points):
+            add(idx, 'warning', 'self_intersection', "Polygon edges cross each other")
+        if width is not None and height is not None:
+            outside = ((points[:, 0] < 0) | (points[:, 0] > width) |
+                       (points[:, 1] < 0) | (points[:, 1] > height))
+            if np.any(outside):
+                add(idx, 'warning', 'out_of_bounds',
+                    f"{int(np.count_nonzero(outside))} vertices outside the {width}x{height} image")
 
-    return True
+    return issues
+
+
+def validate_annotation(annotation_data, image_size=None):
+    """
+    Validate annotation data format
+
+    Args:
+        annotation_data (dict): Annotation data to validate
+        image_size (tuple, optional): Actual (width, height) of the image
+
+    Returns:
+        bool: True if valid, False otherwise
+    """
+    issues = find_annotation_issues(annotation_data, image_size)
+    return not any(issue['severity'] == 'error' for issue in issues)
@@ -0,0 +1,194 @@
+"""
+Cine clip support
+
+Ultrasound cine clips are analyzed straight from the video file. Per-frame
+LabelMe annotations are named <clip>_<frame>.json (zero-based frame index,
+optionally prefixed with "frame", e.g. clip01_000123.json or
+clip01_frame123.json). Frames are streamed through cv2.VideoCapture; frames
+without annotation are only grabbed, never retrieved into memory, and no
+intermediate image files are written.
+"""
+
+import os
+import re
+
+import cv2
+import numpy as np
+
+from paravision_analyzer.core.schema import FeatureColumn
+
+# Video formats searched in the image directory
+SUPPORTED_VIDEO_EXTENSIONS = ['.mp4', '.avi', '.mov', '.mkv']
+
+# Result columns added to the rows of clip frames
+VIDEO_COLUMNS = [FeatureColumn('Clip', 'object', ''), FeatureColumn('Frame', 'int64', 'frame')]
+
+_FRAME_PATTERN = re.compile(r'^(?P<clip>.+)_(?:frame)?(?P<frame>\d+)$')
+
+
+def index_video_files(image_dir):
+    """
+    Map clip names to video paths
+
+    Args:
+        image_dir (str): Directory containing images and video clips
+
+    Returns:
+        dict: Clip name (filename without extension) -> video path
+    """
+    priority = {ext: rank for rank, ext in enumerate(SUPPORTED_VIDEO_EXTENSIONS)}
+    index = {}
+    ranks = {}
+    with os.scandir(image_dir) as entries:
+        for entry in entries:
+            clip_name, ext = os.path.splitext(entry.name)
+            ext = ext.lower()
+            if ext in priority and entry.is_file():
+                if clip_name not in ranks or priority[ext] < ranks[clip_name]:
+                    ranks[clip_name] = priority[ext]
+                    index[clip_name] = entry.path
+    return index
+
+
+def parse_frame_name(base_name):
+    """
+    Split a per-frame annotation name into clip name and frame index
+
+    Args:
+        base_name (str): Annotation base filename (without extension)
+
+    Returns:
+        tuple or None: (clip name, frame index), None if the name has no frame suffix
+    """
+    match = _FRAME_PATTERN.match(base_name)
+    if match is None:
+        return None
+    return match.group('clip'), int(match.group('frame'))
+
+
+def group_frame_annotations(base_names, clip_names):
+    """
+    Assign per-frame annotations to clips
+
+    Args:
+        base_names (iterable): Annotation base names
+        clip_names (iterable): Names of available clips
+
+    Returns:
+        dict: Clip name -> list of (frame index, base name), sorted by frame
+    """
+    clip_names = set(clip_names)
+    groups = {}
+    for base_name in base_names:
+        parsed = parse_frame_name(base_name)
+        if parsed is not None and parsed[0] in clip_names:
+            groups.setdefault(parsed[0], []).append((parsed[1], base_name))
+    for frames in groups.values():
+        frames.sort()
+    return groups
+
+
+def iter_annotated_frames(video_path, frame_indices):
+    """
+    Stream the requested frames of a clip in one sequential pass
+
+    Frames in between are skipped with VideoCapture.grab(), which advances
+    the stream without retrieving or converting the frame. Reading stops
+    after the last requested frame.
+
+    Args:
+        video_path (str): Path to the video clip
+        frame_indices (iterable): Zero-based indices of the frames to decode
+
+    Yields:
+        tuple: (frame index, BGR frame); frames that cannot be read are
+            yielded as (frame index, None)
+    """
+    wanted = sorted(set(frame_indices))
+    capture = cv2.VideoCapture(video_path)
+    try:
+        if not capture.isOpened():
+            for index in wanted:
+                yield index, None
+            return
+
+        position = 0
+        for index in wanted:
+            while position < index:
+                if not capture.grab():
+                    break
+                position += 1
+            if position < index:
+                # Clip ended before this frame
+                yield index, None
+                continue
+            ok, frame = capture.read()
+            position += 1
+            yield index, frame if ok else None
+    finally:
+        capture.release()
+
+
+def video_properties(video_path):
+    """
+    Read frame rate and frame count of a clip
+
+    Args:
+        video_path (str): Path to the video clip
+
+    Returns:
+        dict: 'fps' and 'frame_count' (NaN if unknown)
+    """
+    capture = cv2.VideoCapture(video_path)
+    try:
+        fps = capture.get(cv2.CAP_PROP_FPS) if capture.isOpened() else 0
+        count = capture.get(cv2.CAP_PROP_FRAME_COUNT) if capture.isOpened() else 0
+    finally:
+        capture.release()
+    return {
+        'fps': fps if fps > 0 else np.nan,
+        'frame_count': int(count) if count > 0 else np.nan
+    }
+
+
+def summarize_clip(clip_name, frame_columns, frames_annotated, properties):
+    """
+    Build the per-clip summary row
+
+    Args:
+        clip_name (str): Clip name
+        frame_columns (dict): Result columns of the clip's frames (column
+            name -> array, see ResultBuffer.columns)
+        frames_annotated (int): Number of annotated frames
+        properties (dict): Output of video_properties
+
+    Returns:
+        dict: Clip summary
+    """
+    def column(name):
+        return np.asarray(frame_columns.get(name, []), dtype=np.float64)
+
+    area = column('Area_mm2')
+    major_axis = column('Ellipse_MajorAxis_mm')
+    intensity = column('Mean_Intensity')
+    # No Frame column if no frame of the clip could be read
+    frames = frame_columns.get('Frame', [])
+    frames_with_tumors = len(np.unique(frames))
+
+    def stat(func, values):
+        return func(values) if len(values) and not np.all(np.isnan(values)) else np.nan
+
+    return {
+        'Clip': clip_name,
+        'FPS': properties['fps'],
+        'Frame_Count': properties['frame_count'],
+        'Frames_Annotated': frames_annotated,
+        'Frames_With_Tumors': frames_with_tumors,
+        'Tumors': len(frames),
+        'Mean_Area_mm2': stat(np.nanmean, area),
+        'Max_Area_mm2': stat(np.nanmax, area),
+        'Std_Area_mm2': stat(np.nanstd, area),
+        'Mean_Ellipse_MajorAxis_mm': stat(np.nanmean, major_axis),
+        'Max_Ellipse_MajorAxis_mm': stat(np.nanmax, major_axis),
+        'Mean_Mean_Intensity': stat(np.nanmean, intensity),
+    }
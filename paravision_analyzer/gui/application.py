@@ -3,12 +3,14 @@ GUI application for ParaVision Analyzer
 """
 
 import os
+import cv2
 import tkinter as tk
 from tkinter import filedialog, ttk, messagebox
 from PIL import Image, ImageTk
 import threading
 
 from paravision_analyzer.core.analyzer import ParathyroidTumorAnalyzer
+from paravision_analyzer.core.utils import read_image
 
 
 class ParathyroidAnalyzerGUI:
@@ -34,6 +36,7 @@ class ParathyroidAnalyzerGUI:
         self.center_window()
 
         # Analysis results
+        self.analyzer = None
         self.results_csv = None
         self.current_image_index = 0
         self.processed_images = []
@@ -105,7 +108,12 @@ class ParathyroidAnalyzerGUI:
         control_frame.pack(fill=tk.X, padx=5, pady=10)
 
         self.analyze_button = ttk.Button(control_frame, text="Start Analysis", command=self.start_analysis)
-        self.analyze_button.pack(fill=tk.X, pady=(0, 10))
+        self.analyze_button.pack(fill=tk.X, pady=(0, 5))
+
+        self.reanalyze_button = ttk.Button(
+            control_frame, text="Re-analyze Current Image", command=self.reanalyze_current_image, state=tk.DISABLED
+        )
+        self.reanalyze_button.pack(fill=tk.X, pady=(0, 10))
 
         self.progress_var = tk.DoubleVar()
         self.progress = ttk.Progressbar(control_frame, variable=self.progress_var, maximum=100)
@@ -241,8 +249,9 @@ class ParathyroidAnalyzerGUI:
             messagebox.showerror("Error", "Annotation directory does not exist!")
             return
 
-        # Disable button
+        # Disable buttons
         self.analyze_button.configure(state=tk.DISABLED)
+        self.reanalyze_button.configure(state=tk.DISABLED)
 
         # Reset progress
         self.progress_var.set(0)
@@ -275,6 +284,7 @@ class ParathyroidAnalyzerGUI:
                 self.update_progress
             )
             analyzer.analyze_all_images()
+            self.analyzer = analyzer
             self.results_csv = os.path.join(analyzer.output_dir, "parathyroid_analysis_results.csv")
             self.processed_images = analyzer.processed_images
 
@@ -296,6 +306,7 @@ class ParathyroidAnalyzerGUI:
             self.show_image(self.processed_images[0])
 
             # Enable navigation buttons
+            self.reanalyze_button.configure(state=tk.NORMAL)
             self.prev_button.configure(state=tk.NORMAL)
             self.next_button.configure(state=tk.NORMAL)
             self.zoom_in_button.configure(state=tk.NORMAL)
@@ -307,6 +318,52 @@ class ParathyroidAnalyzerGUI:
 
         messagebox.showinfo("Complete", "Image analysis completed!")
 
+    def reanalyze_current_image(self):
+        """Re-analyze the displayed image after its annotation was corrected"""
+        if self.analyzer is None or not self.processed_images:
+            return
+
+        # Visualizations are saved as <base name>_analysis.<png|jpg|webp>
+        image_path = self.processed_images[self.current_image_index]
+        base_name = os.path.splitext(os.path.basename(image_path))[0][:-len("_analysis")]
+        self.status_var.set(f"Re-analyzing: {base_name}")
+
+        # Disable buttons
+        self.analyze_button.configure(state=tk.DISABLED)
+        self.reanalyze_button.configure(state=tk.DISABLED)
+
+        # Run re-analysis in new thread
+        self.analysis_thread = threading.Thread(target=self.run_reanalysis, args=(base_name, image_path))
+        self.analysis_thread.daemon = True
+        self.analysis_thread.start()
+
+    def run_reanalysis(self, base_name, image_path):
+        """Run single-image re-analysis in background thread"""
+        try:
+            rows = self.analyzer.reanalyze_image(base_name)
+            error = None
+        except Exception as e:
+            rows, error = None, str(e)
+        self.master.after(0, self.reanalysis_complete, base_name, image_path, rows, error)
+
+    def reanalysis_complete(self, base_name, image_path, rows, error):
+        """Handle re-analysis completion"""
+        self.analyze_button.configure(state=tk.NORMAL)
+        self.reanalyze_button.configure(state=tk.NORMAL)
+        if error is not None:
+            messagebox.showerror("Error", f"Error during re-analysis: {error}")
+            self.status_var.set("Re-analysis failed")
+            return
+        if rows is None:
+            messagebox.showerror("Error", f"Cannot re-analyze image: {base_name}")
+            self.status_var.set("Re-analysis failed")
+            return
+
+        self.status_var.set(f"Re-analyzed {base_name}: {len(rows)} tumors")
+        # Refresh the view unless another image was selected meanwhile
+        if self.processed_images[self.current_image_index] == image_path:
+            self.show_image(image_path)
+
     def open_csv(self):
         """Open CSV results file"""
         if self.results_csv and os.path.exists(self.results_csv):
@@ -334,7 +391,7 @@ class ParathyroidAnalyzerGUI:
         try:
             if os.path.exists(image_path):
                 self.canvas.delete("all")
-                self.original_image = Image.open(image_path)
+                self.original_image = self.open_preview(image_path)
                 self.current_zoom = 1.0
                 self.drag_data = {"x": 0, "y": 0, "dragging": False}
                 self.can_drag = False
@@ -343,6 +400,16 @@ class ParathyroidAnalyzerGUI:
         except Exception as e:
             messagebox.showerror("Error", f"Cannot display image: {str(e)}")
 
+    def open_preview(self, image_path):
+        """Open a visualization, decoding it with OpenCV if Pillow lacks the format (e.g. WebP)"""
+        try:
+            return Image.open(image_path)
+        except OSError:
+            image = read_image(image_path)
+            if image is None:
+                raise
+            return Image.fromarray(cv2.cvtColor(image, cv2.COLOR_BGR2RGB))
+
     def update_image(self):
         """Update displayed image with current zoom"""
         if self.original_image:
@@ -0,0 +1,99 @@
+#!/usr/bin/env python3
+"""
+Numerical equivalence check for the feature extraction code
+
+Measures the fixed golden corpus (synthetic lesions and edge cases) and
+compares every feature column with the stored reference outputs, reporting
+drift per feature. Run it before switching on any optimized feature path.
+
+Usage:
+    python scripts/check_equivalence.py [--reference REFERENCE_CSV] [--report REPORT_CSV] [--update]
+
+Example:
+    python scripts/check_equivalence.py
+    python scripts/check_equivalence.py --approximate 1000 --report drift.csv
+"""
+
+import sys
+import os
+import argparse
+
+# Add parent directory to path to import paravision_analyzer
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from paravision_analyzer.core.equivalence import DEFAULT_REFERENCE_PATH, check_equivalence, save_reference
+from paravision_analyzer.core.features import FeatureExtractor
+
+
+def parse_args():
+    """Parse command line arguments"""
+    parser = argparse.ArgumentParser(
+        description='Compare feature outputs with the golden reference'
+    )
+
+    parser.add_argument(
+        '--reference',
+        default=DEFAULT_REFERENCE_PATH,
+        help='Reference CSV (default: scripts/golden_reference.csv)'
+    )
+
+    parser.add_argument(
+        '--report',
+        default=None,
+        help='Also write the per-feature drift report to this CSV file'
+    )
+
+    parser.add_argument(
+        '--approximate',
+        type=int,
+        metavar='MAX_PIXELS',
+        default=None,
+        help='Check the approximate feature mode instead of the exact path'
+    )
+
+    parser.add_argument(
+        '--update',
+        action='store_true',
+        help='Overwrite the reference with the outputs of the current code (only after reviewing any drift)'
+    )
+
+    return parser.parse_args()
+
+
+def main():
+    """Main entry point for the equivalence check"""
+    args = parse_args()
+    feature_extractor = FeatureExtractor(approx_max_pixels=args.approximate)
+
+    if args.update:
+        reference = save_reference(args.reference, feature_extractor)
+        print(f"Reference with {len(reference)} cases written to: {args.reference}")
+        return
+
+    if not os.path.exists(args.reference):
+        print(f"Error: Reference file does not exist: {args.reference}")
+        sys.exit(1)
+
+    report = check_equivalence(feature_extractor, args.reference)
+    if args.report:
+        report.to_csv(args.report, index=False)
+
+    print("=" * 60)
+    print(f"{'Feature':<26}{'Max abs diff':>14}{'Max rel diff':>14}  Status")
+    print("-" * 60)
+    for _, row in report.iterrows():
+        status = "OK" if row['Passed'] else f"DRIFT ({row['Drifting_Cases']}/{row['Cases']})"
+        print(f"{row['Feature']:<26}{row['Max_Abs_Diff']:>14.3g}{row['Max_Rel_Diff']:>14.3g}  {status}")
+    print("=" * 60)
+
+    drifting = report[~report['Passed']]
+    if len(drifting):
+        print(f"{len(drifting)} of {len(report)} features drift from the reference:")
+        for _, row in drifting.iterrows():
+            print(f"  - {row['Feature']}: {row['Drifting_Case_Names']}")
+        sys.exit(1)
+    print(f"All {len(report)} features match the reference")
+
+
+if __name__ == "__main__":
+    main()
@@ -20,6 +20,8 @@ import argparse
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
 
 from paravision_analyzer import ParathyroidTumorAnalyzer
+from paravision_analyzer.core.sweep import load_sweep_grid
+from paravision_analyzer.core.utils import VISUALIZATION_FORMATS
 
 
 def parse_args():
@@ -35,6 +37,12 @@ Examples:
   # Custom conversion ratio
   python scripts/run_cli.py --image-dir data/images --annotation-dir data/annotations --output-dir data/results --px-per-mm 20
 
+  # Compare annotations of two raters
+  python scripts/run_cli.py --image-dir data/images --output-dir data/results --raters dr_a=data/rater_a dr_b=data/rater_b
+
+  # Validate annotations and images without running the analysis
+  python scripts/run_cli.py --image-dir data/images --annotation-dir data/annotations --output-dir data/results --check
+
 For more information, see the README.md file.
         """
     )
@@ -43,14 +51,14 @@ For more information, see the README.md file.
         '--image-dir',
         type=str,
         required=True,
-        help='Directory containing medical images (JPG, PNG, BMP)'
+        help='Directory containing medical images (JPG, PNG, BMP, 16-bit TIFF, DICOM) and cine clips (MP4, AVI, MOV, MKV)'
     )
 
     parser.add_argument(
         '--annotation-dir',
         type=str,
-        required=True,
-        help='Directory containing LabelMe JSON annotation files'
+        default=None,
+        help='Directory containing LabelMe JSON annotation files (required unless --raters is used)'
     )
 
     parser.add_argument(
@@ -67,13 +75,244 @@ For more information, see the README.md file.
         help='Pixel to millimeter conversion ratio (default: 19, meaning 1mm = 19px)'
     )
 
+    parser.add_argument(
+        '--no-visualizations',
+        action='store_true',
+        help='Skip drawing and saving the annotated result images'
+    )
+
+    parser.add_argument(
+        '--grayscale-decode',
+        action='store_true',
+        help='With --no-visualizations, decode images straight to grayscale (faster; '
+             'gray levels may differ by one from the default color decode)'
+    )
+
+    parser.add_argument(
+        '--visualization-format',
+        choices=['png', 'jpeg', 'webp'],
+        default='png',
+        help='File format of the visualizations (default: png)'
+    )
+
+    parser.add_argument(
+        '--visualization-quality',
+        type=int,
+        metavar='LEVEL',
+        default=None,
+        help='PNG compression level (0-9) or JPEG/WebP quality (0/1-100) of the visualizations '
+             '(default: OpenCV default of the format; lossless for WebP)'
+    )
+
+    parser.add_argument(
+        '--visualization-max-size',
+        type=int,
+        metavar='PX',
+        default=None,
+        help='Downscale visualizations to at most this width and height before drawing the overlays'
+    )
+
+    parser.add_argument(
+        '--decode-cache',
+        metavar='DIR',
+        default=None,
+        help='Cache decoded frames in DIR as memory-mapped .npy files so later runs skip decoding'
+    )
+
+    parser.add_argument(
+        '--decode-cache-mb',
+        type=float,
+        default=2048,
+        help='Size cap of the decode cache in megabytes; least recently used frames are evicted (default: 2048)'
+    )
+
+    parser.add_argument(
+        '--overlaps',
+        action='store_true',
+        help='Detect overlapping and nested regions (adds Overlap_Fraction, Overlap_Count and Parent_ID columns)'
+    )
+
+    parser.add_argument(
+        '--parent-features',
+        action='store_true',
+        help='With --overlaps, add features of nested regions relative to their parent region'
+    )
+
+    parser.add_argument(
+        '--label-masks',
+        choices=['npz', 'png'],
+        default=None,
+        help='Write a per-image label mask (shape index + 1 per pixel) to label_masks/ in this format'
+    )
+
+    parser.add_argument(
+        '--reuse-label-masks',
+        action='store_true',
+        help='Take region masks from NPZ label masks of an earlier run instead of rasterizing polygons '
+             '(not with --label-masks png)'
+    )
+
+    parser.add_argument(
+        '--contour-features',
+        action='store_true',
+        help='Add contour signature features: elliptic Fourier harmonics, curvature statistics and bending energy'
+    )
+
+    parser.add_argument(
+        '--texture-bank',
+        action='store_true',
+        help='Add run-length (GLRLM), size-zone (GLSZM) and local binary pattern (LBP) texture features'
+    )
+
+    parser.add_argument(
+        '--peritumoral-rings',
+        type=float,
+        nargs='+',
+        metavar='MM',
+        default=None,
+        help='Add intensity, texture and lesion-to-ring contrast features of concentric rings '
+             'around each polygon, given by their outer edges in millimeters (e.g. 1 3 5)'
+    )
+
+    parser.add_argument(
+        '--qa-report',
+        action='store_true',
+        help='Write dataset, per-image and per-clip feature statistics (feature_summary.csv) and '
+             'outlier tumors (outliers.csv), aggregated while the analysis runs'
+    )
+
+    parser.add_argument(
+        '--outlier-z',
+        type=float,
+        default=3.0,
+        help='Absolute z-score from which a tumor is listed in outliers.csv (default: 3.0)'
+    )
+
+    parser.add_argument(
+        '--memory-profile',
+        action='store_true',
+        help='Trace memory per image and stage and write memory_profile.csv and '
+             'memory_allocators.csv (slows the analysis down)'
+    )
+
+    parser.add_argument(
+        '--resume',
+        action='store_true',
+        help='Continue a run interrupted in the output directory from its run_journal.jsonl '
+             '(written with --journal); images it completed are not analyzed again'
+    )
+
+    parser.add_argument(
+        '--journal',
+        action='store_true',
+        help='Record completed images in run_journal.jsonl so an interrupted run can be continued '
+             'with --resume (one fsync per image)'
+    )
+
+    parser.add_argument(
+        '--texture-maps',
+        action='store_true',
+        help='Save per-pixel contrast, homogeneity and entropy maps of each tumor to texture_maps/'
+    )
+
+    parser.add_argument(
+        '--texture-window',
+        type=int,
+        default=7,
+        help='Odd window side length of the texture maps in pixels (default: 7)'
+    )
+
+    parser.add_argument(
+        '--texture-overlay',
+        choices=['contrast', 'homogeneity', 'entropy'],
+        default=None,
+        help='Blend this texture map as a color overlay into the visualizations'
+    )
+
+    parser.add_argument(
+        '--approximate',
+        type=int,
+        metavar='MAX_PIXELS',
+        default=None,
+        help='Estimate intensity and GLCM features of regions larger than MAX_PIXELS from a '
+             'stratified sample of about that size; adds sampling rate and error columns'
+    )
+
+    parser.add_argument(
+        '--sweep',
+        metavar='GRID_JSON',
+        default=None,
+        help='Parameter sweep: measure every region under each combination of the GLCM levels, '
+             'GLCM distances, thresholds and px/mm values in GRID_JSON, decoding each image once; '
+             'results get one row per tumor and configuration'
+    )
+
+    parser.add_argument(
+        '--export-patches',
+        action='store_true',
+        help='Write an image patch, mask patch and feature row per tumor to tar shards in patches/'
+    )
+
+    parser.add_argument(
+        '--patch-size',
+        type=int,
+        default=None,
+        help='Side length of fixed-size patches centered on the tumor (default: bounding box plus margin)'
+    )
+
+    parser.add_argument(
+        '--patch-margin',
+        type=float,
+        default=0.25,
+        help='Fraction of the bounding box size added on each side of margin-padded patches (default: 0.25)'
+    )
+
+    parser.add_argument(
+        '--patch-shard-mb',
+        type=float,
+        default=512,
+        help='Start a new patch shard after this many megabytes (default: 512)'
+    )
+
+    parser.add_argument(
+        '--raters',
+        nargs='+',
+        metavar='NAME=DIR',
+        default=None,
+        help='Inter-rater agreement mode: compare annotation directories of two or more raters'
+    )
+
+    parser.add_argument(
+        '--min-iou',
+        type=float,
+        default=0.1,
+        help='Minimum IoU for polygons of two raters to be matched (default: 0.1)'
+    )
+
+    parser.add_argument(
+        '--check',
+        action='store_true',
+        help='Dry run: validate every annotation/image pair and write a preflight report, then exit'
+    )
+
+    parser.add_argument(
+        '--workers',
+        type=int,
+        default=None,
+        help='Number of worker processes for parallel stages (default: CPU count for --check and '
+             '--raters; the analysis runs in one process unless a number above 1 is given)'
+    )
+
     parser.add_argument(
         '--version',
         action='version',
         version='ParaVision Analyzer 1.0.0'
     )
 
-    return parser.parse_args()
+    args = parser.parse_args()
+    if args.annotation_dir is None and args.raters is None:
+        parser.error("--annotation-dir is required unless --raters is used")
+    return args
 
 
 def progress_callback(current, total, message):
@@ -82,6 +321,76 @@ def progress_callback(current, total, message):
     print(f"[{progress:3d}%] {message}")
 
 
+def run_check(args):
+    """Run the preflight check and exit with status 1 if errors were found"""
+    analyzer = ParathyroidTumorAnalyzer(
+        image_dir=args.image_dir,
+        json_dir=args.annotation_dir,
+        output_dir=args.output_dir,
+        px_per_mm=args.px_per_mm
+    )
+
+    print("Checking annotations...")
+    report = analyzer.check_annotations(max_workers=args.workers)
+    summary = report['summary']
+
+    print()
+    print("=" * 60)
+    print(f"Files checked:       {summary['files_checked']}")
+    print(f"Files with errors:   {summary['files_with_errors']}")
+    print(f"Files with warnings: {summary['files_with_warnings']}")
+    for code, count in summary['issue_counts'].items():
+        print(f"  - {code}: {count}")
+    print("=" * 60)
+
+    if summary['files_with_errors']:
+        sys.exit(1)
+
+
+def parse_rater_dirs(raters):
+    """Parse NAME=DIR rater arguments into an ordered dict"""
+    rater_dirs = {}
+    for item in raters:
+        name, sep, path = item.partition('=')
+        if not sep:
+            name, path = os.path.basename(os.path.normpath(item)), item
+        rater_dirs[name] = path
+    return rater_dirs
+
+
+def run_agreement(args):
+    """Run the inter-rater agreement analysis"""
+    rater_dirs = parse_rater_dirs(args.raters)
+    if len(rater_dirs) < 2:
+        print("Error: At least two rater directories are required for --raters")
+        sys.exit(1)
+    for name, path in rater_dirs.items():
+        if not os.path.exists(path):
+            print(f"Error: Annotation directory of rater '{name}' does not exist: {path}")
+            sys.exit(1)
+
+    analyzer = ParathyroidTumorAnalyzer(
+        image_dir=args.image_dir,
+        json_dir=args.annotation_dir,
+        output_dir=args.output_dir,
+        px_per_mm=args.px_per_mm,
+        progress_callback=progress_callback
+    )
+
+    print("Comparing raters: " + ", ".join(rater_dirs))
+    _, summary = analyzer.analyze_agreement(rater_dirs, min_iou=args.min_iou, max_workers=args.workers)
+
+    print()
+    print("=" * 60)
+    for _, row in summary.iterrows():
+        print(f"{row['Rater_A']} vs {row['Rater_B']}: {row['Matched']} matched, "
+              f"mean Dice {row['Mean_Dice']:.3f}, mean IoU {row['Mean_IoU']:.3f}, "
+              f"mean Hausdorff {row['Mean_Hausdorff_mm']:.2f} mm")
+    print(f"  - Per image: {os.path.join(args.output_dir, 'agreement_per_image.csv')}")
+    print(f"  - Summary:   {os.path.join(args.output_dir, 'agreement_summary.csv')}")
+    print("=" * 60)
+
+
 def main():
     """Main entry point for CLI"""
     args = parse_args()
@@ -91,7 +400,7 @@ def main():
         print(f"Error: Image directory does not exist: {args.image_dir}")
         sys.exit(1)
 
-    if not os.path.exists(args.annotation_dir):
+    if args.annotation_dir is not None and not os.path.exists(args.annotation_dir):
         print(f"Error: Annotation directory does not exist: {args.annotation_dir}")
         sys.exit(1)
 
@@ -100,6 +409,50 @@ def main():
         print(f"Error: Pixel to millimeter ratio must be positive, got: {args.px_per_mm}")
         sys.exit(1)
 
+    if args.visualization_quality is not None:
+        low, high = VISUALIZATION_FORMATS[args.visualization_format][2]
+        if not low <= args.visualization_quality <= high:
+            print(f"Error: --visualization-quality for {args.visualization_format} must be between "
+                  f"{low} and {high}, got: {args.visualization_quality}")
+            sys.exit(1)
+
+    if args.reuse_label_masks and args.label_masks == 'png':
+        print("Error: --reuse-label-masks needs NPZ label masks; use --label-masks npz "
+              "(PNG masks carry no reusable region masks)")
+        sys.exit(1)
+
+    if args.visualization_max_size is not None and args.visualization_max_size <= 0:
+        print(f"Error: --visualization-max-size must be positive, got: {args.visualization_max_size}")
+        sys.exit(1)
+
+    if args.patch_size is not None and args.patch_size <= 0:
+        print(f"Error: --patch-size must be positive, got: {args.patch_size}")
+        sys.exit(1)
+
+    if args.peritumoral_rings and min(args.peritumoral_rings) <= 0:
+        print(f"Error: --peritumoral-rings must be positive distances in mm, got: {args.peritumoral_rings}")
+        sys.exit(1)
+
+    if args.outlier_z <= 0:
+        print(f"Error: --outlier-z must be positive, got: {args.outlier_z}")
+        sys.exit(1)
+
+    if args.texture_window < 3 or args.texture_window % 2 == 0:
+        print(f"Error: --texture-window must be an odd number of at least 3, got: {args.texture_window}")
+        sys.exit(1)
+
+    if args.approximate is not None and args.approximate <= 0:
+        print(f"Error: --approximate must be a positive pixel count, got: {args.approximate}")
+        sys.exit(1)
+
+    sweep_configs = None
+    if args.sweep:
+        try:
+            sweep_configs = load_sweep_grid(args.sweep)
+        except (OSError, ValueError) as e:
+            print(f"Error: Cannot load sweep grid {args.sweep}: {e}")
+            sys.exit(1)
+
     print("=" * 60)
     print("ParaVision Analyzer")
     print("Parathyroid Pattern Recognition System")
@@ -108,9 +461,19 @@ def main():
     print(f"Annotation directory: {args.annotation_dir}")
     print(f"Output directory:     {args.output_dir}")
     print(f"Conversion ratio:     1mm = {args.px_per_mm}px")
+    if sweep_configs:
+        print(f"Sweep configurations: {len(sweep_configs)}")
     print("=" * 60)
     print()
 
+    if args.raters:
+        run_agreement(args)
+        return
+
+    if args.check:
+        run_check(args)
+        return
+
     try:
         # Create analyzer
         analyzer = ParathyroidTumorAnalyzer(
@@ -118,7 +481,36 @@ def main():
             json_dir=args.annotation_dir,
             output_dir=args.output_dir,
             px_per_mm=args.px_per_mm,
-            progress_callback=progress_callback
+            progress_callback=progress_callback,
+            save_visualizations=not args.no_visualizations,
+            grayscale_decode=args.grayscale_decode,
+            visualization_format=args.visualization_format,
+            visualization_quality=args.visualization_quality,
+            visualization_max_size=args.visualization_max_size,
+            spatial_relations=args.overlaps or args.parent_features,
+            parent_features=args.parent_features,
+            label_mask_format=args.label_masks,
+            reuse_label_masks=args.reuse_label_masks,
+            approx_max_pixels=args.approximate,
+            contour_features=args.contour_features,
+            texture_bank=args.texture_bank,
+            peritumoral_rings=args.peritumoral_rings,
+            texture_maps=args.texture_maps,
+            texture_window=args.texture_window,
+            texture_overlay=args.texture_overlay,
+            qa_report=args.qa_report,
+            outlier_threshold=args.outlier_z,
+            memory_profile=args.memory_profile,
+            journal=args.journal,
+            resume=args.resume,
+            decode_cache_dir=args.decode_cache,
+            decode_cache_mb=args.decode_cache_mb,
+            max_workers=args.workers or 1,
+            export_patches=args.export_patches,
+            patch_size=args.patch_size,
+            patch_margin=args.patch_margin,
+            patch_shard_mb=args.patch_shard_mb,
+            sweep_configs=sweep_configs
         )
 
         # Run analysis
@@ -131,6 +523,16 @@ def main():
         print(f"Results saved to: {args.output_dir}")
         print(f"  - CSV file: {os.path.join(args.output_dir, 'parathyroid_analysis_results.csv')}")
         print(f"  - Visualizations: {os.path.join(args.output_dir, 'visualizations')}")
+        if args.export_patches:
+            print(f"  - Patch shards: {os.path.join(args.output_dir, 'patches')}")
+        if args.texture_maps:
+            print(f"  - Texture maps: {os.path.join(args.output_dir, 'texture_maps')}")
+        if args.qa_report:
+            print(f"  - Feature summary: {os.path.join(args.output_dir, 'feature_summary.csv')}")
+            print(f"  - Outliers: {os.path.join(args.output_dir, 'outliers.csv')}")
+        if args.memory_profile:
+            print(f"  - Memory profile: {os.path.join(args.output_dir, 'memory_profile.csv')}")
+            print(f"  - Memory allocators: {os.path.join(args.output_dir, 'memory_allocators.csv')}")
         print("=" * 60)
 
     except Exception as e:
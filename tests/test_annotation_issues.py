@@ -0,0 +1,38 @@
+"""
+Tests for the annotation checks behind --check
+"""
+
+import base64
+
+import cv2
+import numpy as np
+
+from paravision_analyzer.core import region
+from paravision_analyzer.core.utils import find_annotation_issues
+
+
+def _codes(annotation_data):
+    return [(issue['shape_index'], issue['code']) for issue in find_annotation_issues(annotation_data)]
+
+
+def _mask_shape(mask):
+    data = base64.b64encode(cv2.imencode('.png', mask)[1].tobytes()).decode('ascii')
+    return {'shape_type': 'mask', 'points': [[2, 3], [9, 7]], 'mask': data}
+
+
+def test_malformed_shapes_are_reported():
+    assert _codes({'shapes': None}) == [(None, 'invalid_shapes')]
+    assert _codes({'shapes': {'shape_type': 'polygon'}}) == [(None, 'invalid_shapes')]
+    polygon = {'shape_type': 'polygon', 'points': [[0, 0], [4, 0], [5, 3], [2, 5], [-1, 3]]}
+    assert _codes({'shapes': ['polygon', None, polygon]}) == [(0, 'invalid_shape'), (1, 'invalid_shape')]
+
+
+def test_mask_shapes_are_checked_from_the_header(monkeypatch):
+    monkeypatch.setattr(region.cv2, 'imdecode', None)
+    valid = _mask_shape(np.full((5, 8), 255, dtype=np.uint8))
+    not_png = dict(valid, mask=base64.b64encode(b'GIF89a' + bytes(40)).decode('ascii'))
+    not_base64 = dict(valid, mask='not base64!')
+    missing = {'shape_type': 'mask', 'points': [[2, 3], [9, 7]]}
+    assert _codes({'shapes': [valid, not_png, not_base64, missing]}) == [
+        (1, 'invalid_mask'), (2, 'invalid_mask'), (3, 'invalid_mask')]
+    assert region.shape_mask_size(valid['mask']) == (8, 5)
@@ -0,0 +1,45 @@
+"""
+Tests for the decoded frame cache
+"""
+
+import os
+
+import numpy as np
+
+from paravision_analyzer.core import decode_cache
+from paravision_analyzer.core.decode_cache import DecodeCache
+
+
+def _cached_frame(tmp_path):
+    """Cache with one stored frame; returns (cache, image path, frame)"""
+    image_path = tmp_path / "image.png"
+    image_path.write_bytes(b"not decoded here")
+    cache = DecodeCache(str(tmp_path / "cache"))
+    frame = np.arange(12, dtype=np.uint8).reshape(3, 4)
+    cache.store(str(image_path), 'gray', frame)
+    return cache, str(image_path), frame
+
+
+def test_load_entry_read_only_to_caller(tmp_path, monkeypatch):
+    cache, image_path, frame = _cached_frame(tmp_path)
+    entry = cache.path(image_path, 'gray')
+    os.chmod(entry, 0o444)
+
+    # Only the owner may set the times of a file it cannot write; emulate
+    # another account of a shared cache (root would be allowed anyway)
+    def utime(path, times=None):
+        raise PermissionError(1, "Operation not permitted", path)
+    monkeypatch.setattr(decode_cache.os, 'utime', utime)
+
+    loaded = cache.load(image_path, 'gray')
+    assert loaded is not None
+    np.testing.assert_array_equal(loaded, frame)
+    assert os.path.exists(entry)
+
+
+def test_entries_follow_umask(tmp_path):
+    cache, image_path, _ = _cached_frame(tmp_path)
+    umask = os.umask(0)
+    os.umask(umask)
+    mode = os.stat(cache.path(image_path, 'gray')).st_mode & 0o777
+    assert mode == 0o666 & ~umask
@@ -0,0 +1,49 @@
+"""
+Tests for the result schema and buffer
+"""
+
+import io
+
+import numpy as np
+import pandas as pd
+
+from paravision_analyzer.core.schema import FeatureColumn, ResultBuffer
+from paravision_analyzer.core.video import VIDEO_COLUMNS
+
+
+def _image_then_clip_rows():
+    """Buffer with one image row followed by the rows of frames 0 and 4 of a clip"""
+    results = ResultBuffer([FeatureColumn('Image', 'object', ''), FeatureColumn('Area_Pixels', 'int64', 'px2')])
+    row = results.new_row()
+    results.write(row, {'Image': 'img_0', 'Area_Pixels': 120})
+
+    results.add_columns(VIDEO_COLUMNS)
+    for frame in (0, 4):
+        row = results.new_row()
+        results.write(row, {'Image': f'clip_{frame:06d}', 'Area_Pixels': 80, 'Clip': 'clip', 'Frame': frame})
+    return results
+
+
+def test_frame_missing_for_images_and_zero_for_first_frame():
+    frame = _image_then_clip_rows().to_dataframe()['Frame']
+    assert str(frame.dtype) == 'Int64'
+    assert frame.isna().tolist() == [True, False, False]
+    assert frame[1] == 0
+    assert frame[2] == 4
+
+
+def test_integer_columns_written_as_integers():
+    buffer = io.StringIO()
+    _image_then_clip_rows().to_dataframe().to_csv(buffer, index=False)
+    lines = buffer.getvalue().splitlines()
+    assert lines[1:] == ['img_0,120,,', 'clip_000000,80,clip,0', 'clip_000004,80,clip,4']
+
+    table = pd.read_csv(io.StringIO(buffer.getvalue()))
+    assert pd.isna(table['Frame'][0]) and table['Frame'][1] == 0
+
+
+def test_row_returns_integers_and_none():
+    results = _image_then_clip_rows()
+    assert results.row(0)['Frame'] is None
+    assert results.row(1)['Frame'] == 0
+    assert isinstance(results.row(1)['Area_Pixels'], np.integer)